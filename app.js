@@ -199,8 +199,9 @@ const LEAGUES = [
   { key:"handball_men", label:"Håndball Menn", url:"/data/2026/handball_men.json", listKeys:["items","games"] },
   { key:"handball_women", label:"Håndball Damer", url:"/data/2026/handball_women.json", listKeys:["items","games"] },
 
-  { key:"wintersport_men", label:"Vintersport Menn", url:"/data/2026/wintersport_men.json", listKeys:["items","games"] },
-  { key:"wintersport_women", label:"Vintersport Kvinner", url:"/data/2026/wintersport_women.json", listKeys:["items","games"] },
+  // ett kanonisk dokument (gender per item), filtrert per kjønn i appen
+  { key:"wintersport_men", label:"Vintersport Menn", url:"/data/2026/wintersport.json", gender:"men", listKeys:["items","games"] },
+  { key:"wintersport_women", label:"Vintersport Kvinner", url:"/data/2026/wintersport.json", gender:"women", listKeys:["items","games"] },
 ];
 
 function getListFromPayload(payload, listKeys){
@@ -211,6 +212,20 @@ function getListFromPayload(payload, listKeys){
   return [];
 }
 
+/* Kanoniske dokumenter lastes én gang per sidevisning og deles mellom visningene (menn/kvinner) */
+const DOC_CACHE = new Map();
+function fetchJsonShared(url){
+  if(!DOC_CACHE.has(url)){
+    DOC_CACHE.set(url, fetchJson(url).catch(e=>{ DOC_CACHE.delete(url); throw e; }));
+  }
+  return DOC_CACHE.get(url);
+}
+
+function filterGender(list, gender){
+  if(!gender) return list;
+  return list.filter(x => !x.gender || x.gender === gender || x.gender === "mixed");
+}
+
 function normalizeGame(x, fallbackLeague){
   const league = x.league || x.competition || x.tournament || fallbackLeague || "Ukjent";
   const home = x.home || x.homeTeam || x.hjemme || x.team1 || x.athlete || "Ukjent";
@@ -326,8 +341,8 @@ async function loadSport(){
   const q = ( $("searchInput").value || "" ).trim().toLowerCase();
 
   try{
-    const payload = await fetchJson(league.url);
-    const raw = getListFromPayload(payload, league.listKeys);
+    const payload = league.gender ? await fetchJsonShared(league.url) : await fetchJson(league.url);
+    const raw = filterGender(getListFromPayload(payload, league.listKeys), league.gender);
 
     const games = raw
       .map(x=>normalizeGame(x, league.label))
@@ -0,0 +1,9 @@
+# tests/conftest.py
+# samme sys.path-oppsett som skriptene i tools/: repo-roten (tools.lib.*) og tools/ (providers.*)
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+for p in (ROOT / "tools", ROOT):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
@@ -0,0 +1,31 @@
+# tests/test_ehf_eurocup.py
+from pathlib import Path
+
+from tools.bench.bench_ehf_cards import synthetic_page
+from tools.fetch_handball_damer_ehf_eurocup import _games_from_dom, _games_from_text, extract_games
+from tools.lib.timeutil import iso_from_epoch
+
+FIXTURE = Path(__file__).parent / "fixtures" / "ehf_euro_cup_2026_women.html"
+
+
+def _rows(games):
+    return [(iso_from_epoch(g["start_ts"]), g["home"], g["away"], g["venue"]) for g in games]
+
+
+def test_fixture_page_cards():
+    games = extract_games(FIXTURE.read_text(encoding="utf-8"))
+    assert _rows(games) == [
+        ("2025-10-15T18:15:00+02:00", "Norway", "Denmark", "Larvik (NOR)"),
+        ("2025-10-16T18:00:00+02:00", "Sweden", "Hungary", "Malmö (SWE)"),
+        ("2025-10-19T15:30:00+02:00", "Denmark", "Sweden", "Herning (DEN)"),
+        ("2025-10-19T18:00:00+02:00", "Hungary", "Norway", "Debrecen (HUN)"),
+        ("2026-04-01T20:30:00+02:00", "Norway", "Sweden", "Trondheim (NOR)"),
+    ]
+    assert all(g["gender"] == "women" for g in games)
+
+
+def test_text_fallback_takes_teams_from_its_own_card():
+    html = synthetic_page(30)
+    dom, text = _games_from_dom(html), _games_from_text(html)
+    assert len(dom) == 30
+    assert _rows(text) == _rows(dom)
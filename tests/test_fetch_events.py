@@ -0,0 +1,37 @@
+# tests/test_fetch_events.py
+import feedparser
+
+from tools.fetch_events import merge_feed
+
+URL = "https://example.org/feed.xml"
+SRC = {"name": "Kulturhuset", "city": "Skien"}
+RSS = """<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Kulturhuset</title>
+<item><guid>a-1</guid><title>Konsert</title><link>https://example.org/a-1</link>
+<pubDate>Fri, 13 Mar 2026 18:30:00 GMT</pubDate></item>
+<item><guid>b-2</guid><title>Standup</title><link>https://example.org/b-2</link>
+<pubDate>Sat, 14 Mar 2026 19:00:00 GMT</pubDate></item>
+<item><guid>c-3</guid><title>Uten dato</title><link>https://example.org/c-3</link></item>
+</channel></rss>"""
+
+
+def test_unchanged_entries_keep_previous_events():
+    feed = feedparser.parse(RSS)
+    state, events, n = merge_feed(SRC, URL, feed, {}, {})
+    assert n == 3 and len(events) == 2
+
+    state2, events2, n2 = merge_feed(SRC, URL, feed, state, events)
+    assert n2 == 0
+    assert events2 == events and state2["entries"] == state["entries"]
+
+
+def test_primed_state_with_empty_old_events_rebuilds_entries():
+    feed = feedparser.parse(RSS)
+    state, events, _ = merge_feed(SRC, URL, feed, {}, {})
+
+    # events.json borte/tilbakestilt, men state sier "uendret": eventene må bygges på nytt
+    state2, events2, n = merge_feed(SRC, URL, feed, state, {})
+    assert n == 2  # entryen uten dato har ingen event og hoppes fortsatt over
+    assert events2 == events
+    assert sorted(ev["title"] for ev in events2.values()) == ["Konsert", "Standup"]
+    assert state2["entries"] == state["entries"]
@@ -0,0 +1,37 @@
+# tests/test_normalize.py
+import json
+
+from tools.lib.normalize import ITEM_FIELDS, MIXED, Item, gender_items, merge_genders, render_items
+
+
+def test_to_dict_keeps_every_key():
+    it = Item(id="x1", sport="wintersport", start_ts=1773422400, title="Sprint")
+    d = render_items([it])[0]
+    assert list(d) == list(ITEM_FIELDS)
+    assert d["home"] is None and d["gender"] is None and d["where"] == ()
+    assert json.loads(json.dumps(d))["venue"] is None
+
+
+def test_dict_interface_still_hides_none():
+    it = Item(id="x1", sport="wintersport", title="Sprint")
+    assert "home" not in it and it.get("home", "-") == "-"
+    assert dict(it.items()) == {"id": "x1", "sport": "wintersport", "start": "", "title": "Sprint", "where": ()}
+    assert Item.from_dict(it.to_dict()) == it
+
+
+def test_merge_genders_combines_fields_of_mixed_ids():
+    men = Item(id="r1", sport="wintersport", start_ts=1, title="Stafett", tv="", gender="men")
+    women = Item(id="r1", sport="wintersport", start_ts=1, title="Stafett", tv="NRK", venue="Oslo", gender="women")
+    only_w = {"id": "r2", "title": "Sprint", "gender": "women"}
+    unknown = {"id": "r3", "title": "Hopp"}
+
+    out = merge_genders([men, women, only_w, unknown])
+    assert [it["id"] for it in out] == ["r1", "r2", "r3"]
+    r1 = out[0]
+    assert type(r1) is Item and r1.gender == MIXED
+    assert (r1.tv, r1.venue, r1.title) == ("NRK", "Oslo", "Stafett")
+    assert r1.sources is None  # samme kilde: "sources" legges ikke til
+    assert out[2]["gender"] == MIXED
+
+    assert [it["id"] for it in gender_items(out, "men")] == ["r1", "r3"]
+    assert [it["id"] for it in gender_items(out, "women")] == ["r1", "r2", "r3"]
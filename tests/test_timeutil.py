@@ -0,0 +1,32 @@
+# tests/test_timeutil.py
+from datetime import timezone
+
+from tools.lib.normalize import normalize_item, render_items
+from tools.lib.timeutil import iso_from_epoch, to_epoch, to_oslo_iso_from_iso
+
+
+def _item(start):
+    return normalize_item(
+        sport="football", season="2026", league="Eliteserien", start=start, home="Odd", away="Brann",
+        title=None, channel=None, where=None, venue=None, country=None, status=None,
+        source_id="test", source_type="test", source_url=None,
+    )
+
+
+def test_naive_summer_time_is_oslo_everywhere():
+    naive = "2026-07-01T18:00:00"
+    assert to_oslo_iso_from_iso(naive) == "2026-07-01T18:00:00+02:00"
+
+    it = _item(naive)
+    assert it.start_ts == to_epoch(naive) == to_epoch(to_oslo_iso_from_iso(naive))
+    assert render_items([it])[0]["start"] == "2026-07-01T18:00:00+02:00"
+
+
+def test_naive_winter_time_round_trip():
+    naive = "2026-01-17 13:30:00"
+    assert iso_from_epoch(_item(naive).start_ts) == to_oslo_iso_from_iso(naive) == "2026-01-17T13:30:00+01:00"
+
+
+def test_explicit_utc_for_utc_sources():
+    assert to_oslo_iso_from_iso("2026-07-01T16:00:00", timezone.utc) == "2026-07-01T18:00:00+02:00"
+    assert to_oslo_iso_from_iso("2026-07-01T16:00:00Z") == "2026-07-01T18:00:00+02:00"
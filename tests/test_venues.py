@@ -0,0 +1,93 @@
+# tests/test_venues.py
+import json
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from tools.lib import venues
+from tools.lib.timeutil import iso_from_epoch, oslo_epoch
+from tools.lib.venues import extract_events, parse_when
+
+ROOT = Path(__file__).resolve().parents[1]
+FIXTURES = Path(__file__).parent / "fixtures" / "venues"
+TODAY = date(2026, 2, 1)
+
+
+class _Today(date):
+    @classmethod
+    def today(cls):
+        return TODAY
+
+
+@pytest.fixture(autouse=True)
+def _fixed_today(monkeypatch):
+    # år for datoer uten år ("fre 13.03") regnes fra dagens dato
+    monkeypatch.setattr(venues, "date", _Today)
+
+
+def _source(name):
+    doc = json.loads((ROOT / "data" / "events" / "event_sources.json").read_text(encoding="utf-8"))
+    return next(s for s in doc["sources"] if s["name"] == name)
+
+
+def _parse(fixture, name):
+    src = _source(name)
+    page = (FIXTURES / fixture).read_bytes()
+    return [(r["title"], iso_from_epoch(r["start_ts"]), r["url"]) for r in extract_events(page, src["link"], src["scrape"])]
+
+
+def test_parkbiografen():
+    assert _parse("parkbiografen.html", "Parkbiografen") == [
+        ("Vamp – Månetoppen-turneen", "2026-03-13T20:00:00+01:00",
+         "https://www.parkbiografen.no/konserter-show/vamp-2026"),
+        ("Standup-kveld", "2026-04-02T19:30:00+02:00", "https://www.parkbiografen.no/konserter-show/standup-kveld"),
+    ]
+
+
+def test_ibsenhuset():
+    # "fre 13.03" + "kl 19.30" (uten punktum etter måneden); "31.02" finnes ikke og hoppes over
+    assert _parse("ibsenhuset.html", "Ibsenhuset") == [
+        ("Peer Gynt", "2026-03-13T19:30:00+01:00", "https://www.ibsenhuset.no/program/peer-gynt"),
+        ("Nyttårskonsert", "2027-01-09T18:00:00+01:00", "https://www.ibsenhuset.no/program/nyttarskonsert"),
+    ]
+
+
+def test_elvespeilet():
+    assert _parse("elvespeilet.html", "Ælvespeilet") == [
+        ("Porsgrunn Storband", "2026-03-14T19:00:00+01:00", "https://www.elvespeilet.no/Program/Arrangement/?id=1201"),
+        ("Barneteater: Reven og månen", "2026-03-15T12:00:00+01:00",
+         "https://www.elvespeilet.no/Program/Arrangement/?id=1202"),
+    ]
+
+
+def test_jsonld():
+    page = (FIXTURES / "jsonld.html").read_bytes()
+    recs = extract_events(page, "https://example.no/program", {"extractor": "jsonld"})
+    assert [(r["title"], iso_from_epoch(r["start_ts"]), r["url"]) for r in recs] == [
+        ("Jazz i kjelleren", "2026-03-20T21:00:00+01:00", "https://example.no/arrangement/jazz"),
+        ("Sommerrevy", "2026-07-01T18:00:00+02:00", "https://example.no/revy"),
+    ]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("13.03 kl 19.30", "2026-03-13T19:30:00+01:00"),
+    ("fre 13.03. kl. 19.30", "2026-03-13T19:30:00+01:00"),
+    ("13.03.26", "2026-03-13T00:00:00+01:00"),
+    ("13.03.2026 19:30", "2026-03-13T19:30:00+01:00"),
+    ("32.12.", None),
+    ("31.02.", None),
+    ("32. desember", None),
+    ("kl 19.30", None),
+])
+def test_parse_when(text, expected):
+    ts = parse_when(text, today=TODAY)
+    assert (iso_from_epoch(ts) if ts is not None else None) == expected
+
+
+def test_oslo_epoch_rejects_invalid_dates():
+    assert oslo_epoch(2026, 2, 31) is None
+    assert oslo_epoch(2026, 12, 32) is None
+    assert oslo_epoch(2026, 13, 1) is None
+    assert oslo_epoch(2026, 3, 13, 24, 0) is None
+    assert iso_from_epoch(oslo_epoch(2028, 2, 29, 12)) == "2028-02-29T12:00:00+01:00"
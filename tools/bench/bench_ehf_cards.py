@@ -0,0 +1,83 @@
+# tools/bench/bench_ehf_cards.py
+# EHF EURO Cup-skraperen: lxml-kampkort (DOM) mot tekst-heuristikken (BeautifulSoup html.parser + nabolinjer).
+#   python tools/bench/bench_ehf_cards.py [--html lagret_side.html] [--cards N] [--repeat R]
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from tools.fetch_handball_damer_ehf_eurocup import _games_from_dom, _games_from_text  # noqa: E402
+
+TEAMS = ["Norway", "Denmark", "Sweden", "Germany", "France", "Spain", "Hungary", "Poland", "Iceland", "Croatia",
+         "Czechia", "Slovenia", "Romania", "Montenegro", "Netherlands", "Portugal"]
+VENUES = [("Larvik", "NOR"), ("Herning", "DEN"), ("Malmö", "SWE"), ("Debrecen", "HUN"), ("Metz", "FRA")]
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def synthetic_page(cards: int, seed: int = 2026) -> str:
+    """Kampkort i samme form som turneringssiden: lag-blokk, dato/sted-lenke, pynt og navigasjon rundt."""
+    rnd = random.Random(seed)
+    out = ["<html><head><title>EHF EURO Cup 2026</title></head><body>",
+           "<nav><ul>" + "".join(f"<li><a href='/x{i}'>Menu {i}</a></li>" for i in range(40)) + "</ul></nav>",
+           "<section class='matches'><h2>Matches</h2>"]
+    for i in range(cards):
+        home, away = rnd.sample(TEAMS, 2)
+        city, nat = rnd.choice(VENUES)
+        when = f"{rnd.choice(DAYS)} {rnd.choice(MONTHS)} {rnd.randint(1, 28)}, 2026 {rnd.choice(('16:00', '18:15', '20:30'))}"
+        out.append(
+            "<div class='match-card'>"
+            f"<div class='match-card__round'>Round {i % 6 + 1}</div>"
+            "<div class='match-card__teams'>"
+            f"<div class='match-team match-team--home'><img src='/flags/{home}.svg' alt=''/><span class='match-team__name'>{home}</span></div>"
+            "<div class='match-card__score'><span>-</span><span>:</span><span>-</span></div>"
+            f"<div class='match-team match-team--away'><span class='match-team__name'>{away}</span><img src='/flags/{away}.svg' alt=''/></div>"
+            "</div>"
+            f"<a class='match-card__details' href='/game/{i}'>{when}, {city} ({nat}) view game details</a>"
+            "</div>"
+        )
+    out.append("</section><footer><p>European Handball Federation</p></footer></body></html>")
+    return "\n".join(out)
+
+
+def bench(fn, html: str, repeat: int):
+    best = float("inf")
+    res = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        res = fn(html)
+        best = min(best, time.perf_counter() - t0)
+    return best, res
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--html", help="lagret turneringsside (default: syntetisk side)")
+    ap.add_argument("--cards", type=int, default=400)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    html = Path(args.html).read_text(encoding="utf-8") if args.html else synthetic_page(args.cards)
+    print(f"page: {len(html) / 1024:.0f} KiB ({args.html or f'synthetic, {args.cards} cards'}), best of {args.repeat}")
+
+    t_text, text_games = bench(_games_from_text, html, args.repeat)
+    t_dom, dom_games = bench(_games_from_dom, html, args.repeat)
+    for name, sec, games in (("text heuristic (html.parser)", t_text, text_games), ("lxml cards", t_dom, dom_games)):
+        print(f"  {name:30s} {sec * 1000:8.1f} ms  games={len(games)}")
+
+    # begge går i dokumentrekkefølge: sammenlign kamp for kamp
+    differ = sum(1 for a, b in zip(text_games, dom_games) if (a["home"], a["away"]) != (b["home"], b["away"]))
+    differ += abs(len(text_games) - len(dom_games))
+    print(f"  speedup x{t_text / t_dom:.1f}; text heuristic assigned different teams for {differ}/{len(text_games)} games")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# tools/bench/bench_handball_lines.py
+# Linje-parseren i providers/handball.py (master-regex + tilstandsmaskin) mot den gamle per-linje-regexen.
+#   python tools/bench/bench_handball_lines.py [--lines N] [--repeat R]
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from tools.lib.entities import entities  # noqa: E402
+from tools.lib.normalize import sort_items  # noqa: E402
+from tools.lib.timeutil import iso_from_epoch, oslo_epoch  # noqa: E402
+from tools.providers.handball import OSLO, _parse_matches, _stable_id  # noqa: E402
+
+TEAMS = ["Norway", "Denmark", "Sweden", "Germany", "France", "Spain", "Hungary", "Poland", "Iceland", "Croatia"]
+
+
+def synthetic_lines(n: int, year: int = 2026, seed: int = 2026) -> list[str]:
+    """Blanding av tekst- og tabell-linjer slik de kommer ut av EHF-PDFene, pluss støy."""
+    rnd = random.Random(seed)
+    out: list[str] = []
+    while len(out) < n:
+        d, mo = rnd.randint(1, 28), rnd.randint(1, 12)
+        hh, mi = rnd.choice((15, 18, 20, 21)), rnd.choice((0, 15, 30, 45))
+        a, b = rnd.sample(TEAMS, 2)
+        kind = rnd.random()
+        if kind < 0.35:
+            out.append(f"{d:02d}.{mo:02d}.{year} {hh:02d}:{mi:02d} {a} - {b}")
+        elif kind < 0.50:
+            out += [f"{d:02d}.{mo:02d}. {hh:02d}:{mi:02d} | Main Round | Group {rnd.choice('ABCD')}", f"{a} vs {b}"]
+        elif kind < 0.60:
+            out += [f"{year}-{mo:02d}-{d:02d} {hh:02d}:{mi:02d}", "Arena", f"{a} v {b}"]
+        elif kind < 0.70:
+            out.append(f"{d:02d}.{mo:02d}.{year} | {hh:02d}:{mi:02d} | {a} | {b}")
+        elif kind < 0.75:
+            out.append(f"Date - Time | {d:02d}.{mo:02d}.{year - 1} {hh:02d}:{mi:02d}")
+        else:
+            out.append(rnd.choice(["EHF EURO 2026", "Preliminary Round", "Page 3 of 12", "Venue: Oslo Spektrum",
+                                   f"Group {rnd.choice('ABCD')}", "Match No. Date Time Teams", "Subject to change"]))
+    return out[:n]
+
+
+# -----------------------------
+# gammel parser (før tokenizeren), uendret for sammenligning
+# -----------------------------
+_DT_PATTERNS = [
+    (re.compile(r"(\d{2}\.\d{2}\.\d{4})\s+(\d{2}:\d{2})"), "%d.%m.%Y %H:%M"),
+    (re.compile(r"(\d{2}\.\d{2}\.)\s+(\d{2}:\d{2})"), "%d.%m.%Y %H:%M"),
+    (re.compile(r"(\d{4}-\d{2}-\d{2})\s+(\d{2}:\d{2})"), "%Y-%m-%d %H:%M"),
+]
+
+
+def _legacy_dt(year: int, text: str):
+    s = (text or "").strip()
+    for rx, fmt in _DT_PATTERNS:
+        m = rx.search(s)
+        if not m:
+            continue
+        dpart, tpart = m.group(1), m.group(2)
+        if dpart.endswith(".") and len(dpart) == 6:
+            dpart = f"{dpart}{year}"
+        try:
+            dt = datetime.strptime(f"{dpart} {tpart}", fmt).replace(tzinfo=OSLO)
+        except Exception:
+            continue
+        if dt.year != year:
+            return None
+        return dt
+    return None
+
+
+def _legacy_matchup(text: str):
+    s = (text or "").strip()
+    for pat in (r"(.+?)\s-\s(.+)", r"(.+?)\svs\.?\s(.+)", r"(.+?)\sv\s(.+)"):
+        m = re.search(pat, s, flags=re.IGNORECASE)
+        if m:
+            a = m.group(1).strip(" |:-")
+            b = m.group(2).strip(" |:-")
+            if a and b and a.lower() != "date" and b.lower() != "time":
+                return a, b
+    return None
+
+
+def legacy_parse(lines: list[str], year: int, category: str, tv: str) -> list[dict]:
+    items: list[dict] = []
+    seen: set[str] = set()
+    for i, ln in enumerate(lines):
+        dt = _legacy_dt(year, ln)
+        if not dt:
+            continue
+        tail = ln
+        tail = re.sub(r"\d{2}\.\d{2}\.\d{4}\s+\d{2}:\d{2}", "", tail)
+        tail = re.sub(r"\d{2}\.\d{2}\.\s+\d{2}:\d{2}", "", tail)
+        tail = re.sub(r"\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}", "", tail)
+        tail = tail.strip(" |:-")
+        candidates = [tail] if tail else []
+        if i + 1 < len(lines):
+            candidates.append(lines[i + 1])
+        if i + 2 < len(lines):
+            candidates.append(lines[i + 2])
+        home_away = None
+        for cand in candidates:
+            home_away = _legacy_matchup(cand)
+            if home_away:
+                break
+        if not home_away:
+            continue
+        teams = entities().team_fields(*home_away)
+        title = f"{teams['home']} – {teams['away']}"
+        start_ts = oslo_epoch(dt.year, dt.month, dt.day, dt.hour, dt.minute)
+        start = iso_from_epoch(start_ts)
+        eid = _stable_id("handball", category, start, title)
+        if eid in seen:
+            continue
+        seen.add(eid)
+        items.append({"id": eid, "sport": "handball", "category": category, "start": start, "start_ts": start_ts,
+                      "title": title, **{k: v for k, v in teams.items() if k.endswith("_id")}, "tv": tv or "Ukjent", "where": [], "source": "ehf_pdf"})
+    return sort_items(items)
+
+
+def bench(fn, lines: list[str], repeat: int) -> tuple[float, list[dict]]:
+    best = float("inf")
+    res: list[dict] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        res = fn(lines, 2026, "EHF EURO 2026", "TV 2")
+        best = min(best, time.perf_counter() - t0)
+    return best, res
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--lines", type=int, default=20_000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    lines = synthetic_lines(args.lines)
+    print(f"{len(lines)} lines, best of {args.repeat}")
+    t_old, old = bench(legacy_parse, lines, args.repeat)
+    t_new, new = bench(_parse_matches, lines, args.repeat)
+    # samme JSON (Item.where er en tom tuple der referansen har []); referansen har ikke null-feltene
+    assert json.dumps([dict(it.items()) for it in new]) == json.dumps(old), "items differ"
+    for name, sec in (("legacy (per-line regex)", t_old), ("tokenizer", t_new)):
+        print(f"  {name:26s} {sec * 1000:8.1f} ms  {len(lines) / sec:10,.0f} lines/s")
+    print(f"  items: {len(new)} (identical), speedup x{t_old / t_new:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+# tools/bench/bench_ics.py
+# Gjennomstrømning for tools/lib/ics.py mot de gamle, håndskrevne ICS-parserne
+# på en syntetisk kalender (standard 50 000 VEVENT).
+#   python tools/bench/bench_ics.py [--events N] [--repeat R]
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from tools.lib.http import text_lines  # noqa: E402
+from tools.lib.ics import iter_events  # noqa: E402
+
+
+def make_calendar(n: int) -> str:
+    out = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//bench//EN"]
+    for i in range(n):
+        day = 1 + i % 28
+        month = 1 + (i // 28) % 12
+        out += [
+            "BEGIN:VEVENT",
+            f"UID:{i}@bench",
+            f"DTSTAMP:20260101T000000Z",
+            (f"DTSTART;TZID=Europe/Oslo:2026{month:02d}{day:02d}T180000" if i % 2
+             else f"DTSTART:2026{month:02d}{day:02d}T170000Z"),
+            f"SUMMARY:Lag {i % 97} - Lag {(i + 13) % 97}",
+            "LOCATION:Skagerak Arena\\, Skien",
+            "DESCRIPTION:Lang beskrivelse som er brettet over flere linjer slik RFC 5545 t",
+            " illater\\, med ekstra tekst for å gjøre hendelsen realistisk stor og for",
+            " å gi unfold-steget noe å jobbe med.",
+            "BEGIN:VALARM",
+            "TRIGGER:-PT30M",
+            "ACTION:DISPLAY",
+            "END:VALARM",
+            "END:VEVENT",
+        ]
+    out.append("END:VCALENDAR")
+    return "\r\n".join(out) + "\r\n"
+
+
+# -----------------------------
+# gamle parsere (slik de så ut før tools/lib/ics.py)
+# -----------------------------
+def legacy_update_all(ics_text: str) -> list[dict]:
+    lines = [ln.rstrip("\n") for ln in ics_text.splitlines()]
+    unfolded = []
+    for ln in lines:
+        if ln.startswith(" ") and unfolded:
+            unfolded[-1] += ln[1:]
+        else:
+            unfolded.append(ln)
+    events = []
+    cur = None
+    for ln in unfolded:
+        if ln == "BEGIN:VEVENT":
+            cur = {}
+        elif ln == "END:VEVENT":
+            if cur:
+                events.append(cur)
+            cur = None
+        elif cur is not None:
+            if ln.startswith("DTSTART"):
+                cur["DTSTART"] = ln.split(":", 1)[-1].strip()
+            elif ln.startswith("SUMMARY:"):
+                cur["SUMMARY"] = ln.split(":", 1)[-1].strip()
+            elif ln.startswith("LOCATION:"):
+                cur["LOCATION"] = ln.split(":", 1)[-1].strip()
+    return events
+
+
+def legacy_block_split(text: str) -> list[dict]:
+    # nff_ics / handball_provider / wintersport_provider
+    events = []
+    blocks = re.split(r"BEGIN:VEVENT", text)
+    for b in blocks[1:]:
+        b = b.split("END:VEVENT")[0]
+        lines = [ln.strip() for ln in b.splitlines() if ln.strip()]
+        kv = {}
+        for ln in lines:
+            if ":" not in ln:
+                continue
+            k, val = ln.split(":", 1)
+            k = k.split(";", 1)[0].upper()
+            kv[k] = val.strip()
+        if "DTSTART" in kv:
+            events.append(kv)
+    return events
+
+
+def legacy_fis(raw: str) -> list[dict]:
+    out: list[str] = []
+    for ln in raw.splitlines():
+        if not ln:
+            out.append("")
+            continue
+        if ln.startswith(" ") or ln.startswith("\t"):
+            if out:
+                out[-1] += ln[1:]
+            else:
+                out.append(ln.lstrip())
+        else:
+            out.append(ln)
+    events = []
+    cur = None
+    for ln in out:
+        if ln == "BEGIN:VEVENT":
+            cur = {}
+            continue
+        if ln == "END:VEVENT":
+            if cur:
+                events.append(cur)
+            cur = None
+            continue
+        if cur is None or ":" not in ln:
+            continue
+        k, v = ln.split(":", 1)
+        k = k.split(";", 1)[0].strip().upper()
+        if k in ("DTSTART", "SUMMARY", "LOCATION"):
+            cur[k] = v.strip()
+    return events
+
+
+def shared_all(text: str) -> list:
+    return list(iter_events(text))
+
+
+def shared_keys(text: str) -> list:
+    return list(iter_events(text, keys=("DTSTART", "SUMMARY", "LOCATION")))
+
+
+def shared_lazy(text: str) -> int:
+    # slik providerne bruker den: postene konsumeres etter hvert, ingen liste av hendelser
+    n = 0
+    for _ in iter_events(text, keys=("DTSTART", "SUMMARY", "LOCATION")):
+        n += 1
+    return n
+
+
+def shared_stream(raw: bytes) -> int:
+    # som fis_ical: linje-strøm inn (text_lines over den spoolede nedlastingen)
+    n = 0
+    for _ in iter_events(text_lines(io.BytesIO(raw)), keys=("DTSTART", "SUMMARY", "LOCATION")):
+        n += 1
+    return n
+
+
+def bench(fn, text: str | bytes, repeat: int) -> tuple[float, int, float]:
+    best = float("inf")
+    count = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        res = fn(text)
+        best = min(best, time.perf_counter() - t0)
+        count = res if isinstance(res, int) else len(res)
+        del res
+
+    # egen kjøring for minne: tracemalloc gjør koden tregere, så den holdes utenfor tidtakingen
+    tracemalloc.start()
+    res = fn(text)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del res
+    return best, count, peak / 1e6
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=50_000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    text = make_calendar(args.events)
+    raw = text.encode("utf-8")
+    mb = len(raw) / 1e6
+    print(f"calendar: {args.events} events, {mb:.1f} MB, best of {args.repeat}")
+
+    # samme felt ut som de gamle parserne
+    for a, b in zip(legacy_fis(text), shared_keys(text)):
+        assert a == b.props, (a, b)
+
+    for name, fn in [
+        ("legacy update_all", legacy_update_all),
+        ("legacy block split", legacy_block_split),
+        ("legacy fis_ical", legacy_fis),
+        ("ics.iter_events (all props)", shared_all),
+        ("ics.iter_events (3 keys)", shared_keys),
+        ("ics.iter_events (3 keys, lazy)", shared_lazy),
+        ("ics.iter_events (line stream)", shared_stream),
+    ]:
+        sec, n, peak_mb = bench(fn, raw if fn is shared_stream else text, args.repeat)
+        print(f"  {name:32s} {sec * 1000:8.1f} ms  {n / sec:10,.0f} ev/s  {mb / sec:6.1f} MB/s"
+              f"  peak {peak_mb:7.1f} MB  ({n} events)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# tools/bench/bench_items.py
+# Item-records gjennom pipelinen: normalize.Item (__slots__) mot løse dicts, på en syntetisk sesong.
+#   python tools/bench/bench_items.py [--items N] [--repeat R]
+from __future__ import annotations
+
+import argparse
+import copy
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from tools.lib.normalize import Item, merge_genders, render_items, sort_items  # noqa: E402
+
+YEAR_START = 1767222000  # 2026-01-01 00:00 Oslo
+RACES = ["Sprint", "Pursuit", "Mass Start", "Individual", "Relay", "Skiathlon", "Downhill", "Slalom", "Large Hill HS140"]
+VENUES = ["Holmenkollen", "Lillehammer", "Oberhof", "Ruhpolding", "Antholz", "Kontiolahti", "Östersund", "Lahti"]
+SOURCES = ["fis_ical", "biathlon_api"]
+
+
+def synthetic_rows(n: int, seed: int = 2026) -> list[tuple]:
+    """Rådata som en provider ser dem: (start_ts, title, venue, source, gender)."""
+    rnd = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        gender = rnd.choice(("men", "women", None))
+        title = f"{rnd.choice(RACES)} {gender or 'Mixed'} {rnd.randrange(1000)}"
+        rows.append((YEAR_START + rnd.randrange(0, 365 * 96) * 900, title, rnd.choice(VENUES),
+                     rnd.choice(SOURCES), gender))
+    return rows
+
+
+def feed_dicts(rows: list[tuple]) -> list[dict]:
+    return [{"sport": "wintersport", "start": "", "start_ts": ts, "title": title, "where": [], "venue": venue,
+             "source": source, "gender": gender} for ts, title, venue, source, gender in rows]
+
+
+def feed_items(rows: list[tuple]) -> list[Item]:
+    return [Item(sport="wintersport", start_ts=ts, title=title, venue=venue, source=source, gender=gender)
+            for ts, title, venue, source, gender in rows]
+
+
+# -----------------------------
+# før: delt feed-liste (memo) deep-kopieres, endres, og hvert item bygges på nytt som dict
+# -----------------------------
+def build_dicts(feed: list[dict]) -> list[dict]:
+    items = copy.deepcopy(feed)
+    out = []
+    for i, it in enumerate(items):
+        it["tv"] = "NRK"
+        out.append({
+            "id": f"ws{i}",
+            "sport": "wintersport",
+            "start": it["start"],
+            "start_ts": it["start_ts"],
+            "title": it["title"],
+            "tv": it.get("tv") or "",
+            "where": it.get("where") or [],
+            "venue": it.get("venue") or "",
+            "source": it.get("source") or "unknown",
+            "gender": it.get("gender"),
+        })
+    return out
+
+
+# -----------------------------
+# nå: Item fra provideren; delt feed leses uten kopi, dict først i render_items()
+# -----------------------------
+def build_items(feed: list[Item]) -> list[Item]:
+    out = []
+    for i, it in enumerate(feed):
+        out.append(Item(
+            id=f"ws{i}",
+            sport="wintersport",
+            start=it.start,
+            start_ts=it.start_ts,
+            title=it.title,
+            tv="NRK",
+            where=it.where,
+            venue=it.venue or "",
+            source=it.source or "unknown",
+            gender=it.gender,
+        ))
+    return out
+
+
+def pipeline(build, feed: list) -> list[dict]:
+    return render_items(merge_genders(sort_items(build(feed))))
+
+
+def built_memory(build, feed: list) -> int:
+    """Bytes som er i live etter build (items + alt de eier, utenom delte strenger fra feeden)."""
+    gc.collect()
+    tracemalloc.start()
+    items = build(feed)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del items
+    return size
+
+
+def bench(build, feed: list, repeat: int) -> float:
+    # resultatet slippes før neste runde, så ingen av variantene betaler GC for den andres items
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        res = pipeline(build, feed)
+        best = min(best, time.perf_counter() - t0)
+        del res
+    return best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=100_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    rows = synthetic_rows(args.items)
+    print(f"{len(rows)} items, best of {args.repeat} (build -> sort -> merge_genders -> render)")
+    variants = (("dict", build_dicts, feed_dicts(rows)), ("Item (__slots__)", build_items, feed_items(rows)))
+    results = []
+    for name, build, feed in variants:
+        mem = built_memory(build, feed)
+        sec = bench(build, feed, args.repeat)
+        results.append((mem, sec))
+        print(f"  {name:18s} {sec * 1000:8.1f} ms  {len(rows) / sec:10,.0f} items/s  "
+              f"{mem / 2**20:7.1f} MiB built ({mem / len(rows):.0f} B/item)")
+    (m_old, t_old), (m_new, t_new) = results
+    # samme JSON (Item.where er en tom tuple der dict-varianten har []); Item skriver også null-feltene
+    old, new = (json.dumps([{k: v for k, v in it.items() if v is not None} for it in pipeline(build, feed)],
+                           ensure_ascii=False) for _name, build, feed in variants)
+    print(f"  memory x{m_old / m_new:.2f} less, speedup x{t_old / t_new:.2f}; identical output: {old == new}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# tools/bench/bench_merge.py
+# Kryss-kilde-merge: blokket indeks (sport, kickoff-time) mot parvis sammenligning av alle items.
+#   python tools/bench/bench_merge.py [--fixtures N] [--sources S] [--repeat R]
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from tools.lib.merge import DEFAULT_TOLERANCE, _Cluster, _combine, merge_sources, sides  # noqa: E402
+
+CLUBS = ["Bodø/Glimt", "Brann", "Molde", "Rosenborg", "Viking", "Vålerenga", "Lillestrøm", "Odd", "Sarpsborg 08",
+         "Strømsgodset", "Tromsø", "Sandefjord", "HamKam", "Haugesund", "KFUM Oslo", "Fredrikstad"]
+PREFIX = ["", "FK ", "SK ", "IL "]
+YEAR_START = 1767222000  # 2026-01-01 00:00 Oslo
+
+
+def synthetic_sources(fixtures: int, sources: int, seed: int = 2026) -> list[tuple[str, list[dict]]]:
+    """Samme kamper fra flere kilder: ulike klubbprefiks, noen med kickoff én time feil (fast +01:00)."""
+    rnd = random.Random(seed)
+    base = []
+    for _ in range(fixtures):
+        home, away = rnd.sample(CLUBS, 2)
+        base.append((home, away, YEAR_START + rnd.randrange(0, 365 * 86400 // 900) * 900))
+    out = []
+    for s in range(sources):
+        items = []
+        for home, away, ts in base:
+            if rnd.random() < 0.3:
+                continue
+            shift = 3600 if rnd.random() < 0.2 else 0
+            items.append({"home": rnd.choice(PREFIX) + home, "away": rnd.choice(PREFIX) + away,
+                          "start_ts": ts + shift, "channel": "Ukjent" if s == 0 else "TV 2"})
+        out.append((f"src{s}", items))
+    return out
+
+
+def pairwise(sources: list[tuple[str, list[dict]]]) -> list[dict]:
+    # referanse: hvert item mot alle klynger så langt (O(n²))
+    clusters: list[_Cluster] = []
+    for name, items in sources:
+        for it in items:
+            sd = sides(it)
+            hit = next((cl for cl in clusters if cl.matches(it["start_ts"], sd, DEFAULT_TOLERANCE)), None)
+            if hit is None:
+                hit = _Cluster(it["start_ts"], sd)
+                clusters.append(hit)
+            hit.members.append((name, it))
+    return [_combine(cl.members) for cl in clusters]
+
+
+def bench(fn, srcs, repeat: int):
+    best = float("inf")
+    res = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        res = fn(srcs)
+        best = min(best, time.perf_counter() - t0)
+    return best, res
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fixtures", type=int, default=3000)
+    ap.add_argument("--sources", type=int, default=3)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    srcs = synthetic_sources(args.fixtures, args.sources)
+    n = sum(len(items) for _name, items in srcs)
+    print(f"{n} items from {args.sources} sources ({args.fixtures} fixtures), best of {args.repeat}")
+
+    t_pair, pair = bench(pairwise, srcs, args.repeat)
+    t_block, block = bench(lambda s: merge_sources(s, sport="football"), srcs, args.repeat)
+    for name, sec, res in (("pairwise", t_pair, pair), ("blocked (sport, hour)", t_block, block)):
+        print(f"  {name:24s} {sec * 1000:9.1f} ms  merged={len(res)}")
+    key = lambda it: (it["start_ts"], it["home"], it["away"])  # noqa: E731
+    same = sorted(map(key, pair)) == sorted(map(key, block))
+    print(f"  speedup x{t_pair / t_block:.1f}; identical output: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# tools/bench/bench_pdf_text.py
+# Paritetssjekk for tekst-trinnet i pdfextract: pypdf mot pdfplumber på den faktiske EHF-PDF-en.
+# Samme linjer per side og samme kamper fra providers/handball -> trygt å sette
+# EXTRACT_SETTINGS["text"] = "pypdf" i providers/handball.py.
+#   python tools/bench/bench_pdf_text.py [PDF-sti eller URL ...] [--show N]
+# Uten argument brukes alle pdf_url-ene i data/_meta/sources.json.
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from tools.lib.http import download  # noqa: E402
+from tools.lib.pdfextract import TEXT_ENGINES, extract_pages  # noqa: E402
+from tools.providers.handball import LOOKAHEAD_LINES, PDF_MAX_BYTES, _page_needs_tables, _parse_matches  # noqa: E402
+
+
+def source_pdfs() -> list[str]:
+    """Alle pdf_url-verdier i sources.json (uansett nesting)."""
+    out: list[str] = []
+
+    def walk(v) -> None:
+        if isinstance(v, dict):
+            for k, x in v.items():
+                if k == "pdf_url" and isinstance(x, str) and x.strip():
+                    out.append(x.strip())
+                else:
+                    walk(x)
+        elif isinstance(v, list):
+            for x in v:
+                walk(x)
+
+    walk(json.loads((Path(ROOT) / "data" / "_meta" / "sources.json").read_text(encoding="utf-8")))
+    return list(dict.fromkeys(out))
+
+
+def parse_items(pages: list[list[str]]) -> list[dict]:
+    # som _parse_pdf_incremental: hver side med starten av neste som matchup-kandidater
+    items: dict[str, dict] = {}
+    for i, lines in enumerate(pages):
+        lookahead = pages[i + 1][:LOOKAHEAD_LINES] if i + 1 < len(pages) else []
+        for it in _parse_matches(lines, 2026, "EHF", "TV", lookahead=lookahead):
+            items.setdefault(it.id, it.to_dict())
+    return sorted(items.values(), key=lambda it: (it["start_ts"], it["id"]))
+
+
+def check(src: str, show: int) -> bool:
+    is_url = src.startswith(("http://", "https://"))
+    with (download(src, timeout=90, max_bytes=PDF_MAX_BYTES, expect="pdf") if is_url else nullcontext(open(src, "rb"))) as fh:
+        res = {}
+        for engine in TEXT_ENGINES:
+            t0 = time.perf_counter()
+            pages = extract_pages(fh, needs_tables=_page_needs_tables, text=engine)
+            res[engine] = (time.perf_counter() - t0, pages, parse_items(pages))
+
+    print(src)
+    for engine, (sec, pages, items) in res.items():
+        print(f"  {engine:10s} {sec * 1000:9.1f} ms  pages={len(pages)} lines={sum(map(len, pages))} items={len(items)}")
+    (_, fast, fast_items), (_, ref, ref_items) = res["pypdf"], res["pdfplumber"]
+    same_pages = sum(1 for a, b in zip(fast, ref) if a == b)
+    print(f"  identical lines on {same_pages}/{len(ref)} pages; identical items: {fast_items == ref_items}")
+
+    fast_ids = {it["id"]: it for it in fast_items}
+    ref_ids = {it["id"]: it for it in ref_items}
+    for label, a, b in (("only pdfplumber", ref_ids, fast_ids), ("only pypdf", fast_ids, ref_ids)):
+        missing = [a[k] for k in a if k not in b]
+        for it in missing[:show]:
+            print(f"    {label}: {it['start']} {it['title']}")
+        if len(missing) > show:
+            print(f"    {label}: ... {len(missing) - show} more")
+    return fast_items == ref_items
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("pdfs", nargs="*", help="PDF-stier eller URL-er (default: pdf_url i sources.json)")
+    ap.add_argument("--show", type=int, default=10, help="antall avvikende kamper som vises per retning")
+    args = ap.parse_args()
+
+    srcs = args.pdfs or source_pdfs()
+    if not srcs:
+        raise SystemExit("ingen PDF-er å sjekke")
+    ok = all([check(s, args.show) for s in srcs])
+    print("parity OK: pypdf can replace pdfplumber for the text pass" if ok else "parity FAILED: keep pdfplumber text")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
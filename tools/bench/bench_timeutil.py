@@ -0,0 +1,137 @@
+# tools/bench/bench_timeutil.py
+# Europe/Oslo-konvertering: offset-tabellen i tools/lib/timeutil.py mot per-item ZoneInfo/pytz.
+#   python tools/bench/bench_timeutil.py [--n N] [--repeat R]
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from tools.lib.timeutil import OSLO, oslo_epoch, oslo_table, parse_iso_any  # noqa: E402
+
+try:
+    import pytz
+except ImportError:  # pytz er ikke lenger nødvendig for pipeline
+    pytz = None
+
+
+# -----------------------------
+# UTC epoch -> Oslo ISO
+# -----------------------------
+def zoneinfo_per_item(stamps: list[int]) -> list[str]:
+    return [datetime.fromtimestamp(ts, OSLO).isoformat(timespec="seconds") for ts in stamps]
+
+
+def fis_legacy(stamps: list[int]) -> list[str]:
+    # gamle fis_ical._parse_dt: ny ZoneInfo("UTC") per event, så astimezone
+    return [datetime.fromtimestamp(ts, ZoneInfo("UTC")).astimezone(OSLO).isoformat(timespec="seconds") for ts in stamps]
+
+
+def pytz_per_item(stamps: list[int]) -> list[str]:
+    tz = pytz.timezone("Europe/Oslo")
+    out = []
+    for ts in stamps:
+        dt = pytz.utc.localize(datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None))
+        out.append(dt.astimezone(tz).isoformat())
+    return out
+
+
+def iso_roundtrip(isos: list[str]) -> list[str]:
+    # gamle to_oslo_iso_from_iso: fromisoformat + astimezone per verdi
+    return [parse_iso_any(s).astimezone(OSLO).isoformat(timespec="seconds") for s in isos]
+
+
+def table_per_item(stamps: list[int]) -> list[str]:
+    iso = oslo_table().iso
+    return [iso(ts) for ts in stamps]
+
+
+def table_batch(stamps: list[int]) -> list[str]:
+    return oslo_table().iso_many(stamps)
+
+
+# -----------------------------
+# Oslo veggklokke -> UTC epoch
+# -----------------------------
+def pytz_localize(walls: list[tuple]) -> list[int]:
+    tz = pytz.timezone("Europe/Oslo")
+    return [int(tz.localize(datetime(*w)).timestamp()) for w in walls]
+
+
+def zoneinfo_localize(walls: list[tuple]) -> list[int]:
+    return [int(datetime(*w, tzinfo=OSLO).timestamp()) for w in walls]
+
+
+def table_localize(walls: list[tuple]) -> list[int]:
+    return [oslo_epoch(*w) for w in walls]
+
+
+def bench(fn, data, repeat: int) -> tuple[float, list]:
+    best = float("inf")
+    res: list = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        res = fn(data)
+        best = min(best, time.perf_counter() - t0)
+    return best, res
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=200_000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    rnd = random.Random(2026)
+    lo, hi = oslo_epoch(2025, 7, 1), oslo_epoch(2027, 7, 1)
+    random_ts = [rnd.randrange(lo, hi) for _ in range(args.n)]
+    sorted_ts = sorted(random_ts)
+    isos = [datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ") for ts in random_ts]
+    walls = [datetime.fromtimestamp(ts, timezone.utc).timetuple()[:5] for ts in random_ts]
+
+    oslo_table()  # bygg tabellen utenfor tidtakingen
+    t0 = time.perf_counter()
+    oslo_table.cache_clear()
+    table = oslo_table()
+    print(f"table: {len(table.starts)} segments for {table.lo}..{table.hi}, built in {(time.perf_counter() - t0) * 1000:.1f} ms")
+    print(f"{args.n} timestamps, best of {args.repeat}")
+
+    expected = zoneinfo_per_item(random_ts)
+    cases = [
+        ("epoch->iso  ZoneInfo per item", zoneinfo_per_item, random_ts),
+        ("epoch->iso  fis_ical (old)", fis_legacy, random_ts),
+        ("iso->iso    to_oslo_iso_from_iso (old)", iso_roundtrip, isos),
+        ("epoch->iso  table per item", table_per_item, random_ts),
+        ("epoch->iso  table batch (random)", table_batch, random_ts),
+        ("epoch->iso  table batch (sorted)", table_batch, sorted_ts),
+    ]
+    if pytz is not None:
+        cases.insert(2, ("epoch->iso  pytz per item", pytz_per_item, random_ts))
+
+    for name, fn, data in cases:
+        sec, res = bench(fn, data, args.repeat)
+        if data is random_ts or data is isos:
+            assert res == expected, name
+        print(f"  {name:42s} {sec * 1000:8.1f} ms  {args.n / sec:12,.0f} /s")
+
+    expected_ts = zoneinfo_localize(walls)
+    local_cases = [("local->epoch ZoneInfo", zoneinfo_localize), ("local->epoch table", table_localize)]
+    if pytz is not None:
+        local_cases.insert(0, ("local->epoch pytz localize", pytz_localize))
+    for name, fn in local_cases:
+        sec, res = bench(fn, walls, args.repeat)
+        if fn is not pytz_localize:  # pytz velger is_dst=False i den doble høsttimen
+            assert res == expected_ts, name
+        print(f"  {name:42s} {sec * 1000:8.1f} ms  {args.n / sec:12,.0f} /s")
+
+
+if __name__ == "__main__":
+    main()
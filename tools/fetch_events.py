@@ -1,71 +1,266 @@
-import json
-from pathlib import Path
-from datetime import datetime
-from dateutil import parser as dtparser
-import feedparser
-
-BASE = Path(__file__).resolve().parents[1]
-DATA = BASE / "data"
-SOURCES_FILE = DATA / "event_sources.json"
-OUT_FILE = DATA / "events.json"
-
-def load_sources():
-    if not SOURCES_FILE.exists():
-        return []
-    obj = json.loads(SOURCES_FILE.read_text(encoding="utf-8"))
-    return obj.get("sources", []) or obj.get("places", []) or []
-
-def iso(dt: datetime):
-    return dt.isoformat()
-
-def normalize_date(entry):
-    for key in ["published", "updated", "created"]:
-        val = entry.get(key)
-        if val:
-            try:
-                return dtparser.parse(val)
-            except Exception:
-                pass
-    return None
-
-def main():
-    events = []
-    sources = load_sources()
-
-    for src in sources:
-        stype = (src.get("type") or "rss").lower().strip()
-        url = (src.get("url") or src.get("link") or "").strip()
-        name = (src.get("name") or "").strip()
-
-        if not url:
-            continue
-
-        if stype == "rss":
-            feed = feedparser.parse(url)
-            for e in feed.entries[:200]:
-                dt = normalize_date(e)
-                if not dt:
-                    continue
-
-                title = (e.get("title") or "").strip()
-                link = (e.get("link") or "").strip()
-
-                events.append({
-                    "title": title or f"Arrangement ({name})",
-                    "venue": name,
-                    "city": "",
-                    "start": iso(dt),
-                    "category": "Event",
-                    "url": link
-                })
-
-    DATA.mkdir(parents=True, exist_ok=True)
-    OUT_FILE.write_text(
-        json.dumps({"events": events}, ensure_ascii=False, indent=2),
-        encoding="utf-8"
-    )
-
-    print(f"WROTE {OUT_FILE} ({len(events)} events)")
-
-if __name__ == "__main__":
-    main()
+import calendar
+import hashlib
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from dateutil import parser as dtparser
+import feedparser
+
+BASE = Path(__file__).resolve().parents[1]
+if str(BASE) not in sys.path:
+    sys.path.insert(0, str(BASE))
+
+from tools.lib.http import USER_AGENT, add_hook, get_bytes  # noqa: E402
+from tools.lib.jsonio import atomic_write_json  # noqa: E402
+from tools.lib.metrics import metrics, start_run  # noqa: E402
+from tools.lib.pool import Task, run_tasks  # noqa: E402
+from tools.lib.timeutil import OSLO, iso_from_epoch, to_epoch  # noqa: E402
+from tools.lib.venues import PageCache  # noqa: E402
+
+DATA = BASE / "data"
+SOURCES_FILE = DATA / "events" / "event_sources.json"
+OUT_FILE = DATA / "events" / "events.json"
+# per feed: etag/modified fra forrige svar + id -> signatur for entries vi allerede har normalisert
+STATE_FILE = DATA / "_meta" / "events_feeds.json"
+
+MAX_ENTRIES = 200
+FEED_WORKERS = 6
+FEED_PER_HOST = 2
+FEED_DEADLINE = 120
+# programside-arrangementer som er ferdige for mer enn dette (sek) ryddes ut ved merge;
+# RSS-entries har publiseringsdato som start_ts og blir stående til de faller ut av feeden
+KEEP_PAST_SECONDS = 24 * 3600
+
+_TITLE_KEY_RE = re.compile(r"[\W_]+")
+
+def load_sources():
+    if not SOURCES_FILE.exists():
+        return []
+    obj = json.loads(SOURCES_FILE.read_text(encoding="utf-8"))
+    return obj.get("sources", []) or obj.get("places", []) or []
+
+def source_type(src: dict) -> str:
+    # "rss" (feed), "html" (programside med scrape-config); andre typer (f.eks. "link") hentes ikke
+    t = (src.get("type") or "").lower().strip()
+    if t:
+        return t
+    return "html" if src.get("scrape") else "rss"
+
+def _load_json(path: Path, default):
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return data if isinstance(data, type(default)) else default
+    except Exception:
+        return default
+
+def _write_json(path: Path, data, indent=2) -> None:
+    atomic_write_json(path, data, indent=indent)
+
+def entry_id(url: str, entry) -> str:
+    # GUID, ellers lenke; tittel+dato bare som siste utvei
+    key = (entry.get("id") or entry.get("guid") or entry.get("link") or "").strip()
+    if not key:
+        key = f"{entry.get('title') or ''}|{entry.get('published') or entry.get('updated') or ''}"
+    return hashlib.sha1(f"{url}|{key}".encode("utf-8")).hexdigest()[:16]
+
+def entry_sig(entry) -> str:
+    raw = "|".join(str(entry.get(k) or "") for k in ("title", "link", "published", "updated", "created"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+def normalize_date(entry):
+    # feedparser har allerede tolket RFC 822/ISO-datoer (UTC struct_time); dateutil bare som fallback
+    for key in ["published", "updated", "created"]:
+        parsed = entry.get(f"{key}_parsed")
+        if parsed:
+            return calendar.timegm(parsed)
+        val = entry.get(key)
+        if val:
+            try:
+                dt = dtparser.parse(val)
+            except Exception:
+                continue
+            return to_epoch(dt if dt.tzinfo else dt.replace(tzinfo=OSLO))
+    return None
+
+def fetch_feed(url: str, prev: dict):
+    """Conditional GET via feedparser (etag/modified); status 304 -> ingen entries."""
+    return feedparser.parse(url, etag=prev.get("etag"), modified=prev.get("modified"), agent=USER_AGENT)
+
+def merge_feed(src: dict, url: str, feed, prev: dict, old_events: dict) -> tuple[dict, dict, int]:
+    """
+    Entries fra ett feed-svar -> (state for feeden, events for feeden, antall normalisert).
+    Uendrede entries (samme id og signatur som sist) hoppes over og beholder forrige events.json-event;
+    bare nye/endrede går gjennom dato-tolkning og normalisering. Mangler eventet i old_events
+    (events.json slettet/tilbakestilt) bygges det på nytt selv om signaturen er lik. Entries som har falt ut av feeden
+    forsvinner fra både state og events.
+    """
+    name = (src.get("name") or "").strip()
+    seen = dict(prev.get("entries") or {})  # id -> [signatur, har_event]
+    events = dict(old_events)
+    current = set()
+    normalized = 0
+
+    for e in feed.entries[:MAX_ENTRIES]:
+        eid = entry_id(url, e)
+        sig = entry_sig(e)
+        current.add(eid)
+        was = seen.get(eid)
+        if was and was[0] == sig and (not was[1] or eid in events):
+            continue
+
+        normalized += 1
+        ts = normalize_date(e)
+        seen[eid] = [sig, ts is not None]
+        if ts is None:
+            events.pop(eid, None)
+            continue
+
+        title = (e.get("title") or "").strip()
+        link = (e.get("link") or "").strip()
+
+        events[eid] = {
+            "id": eid,
+            "title": title or f"Arrangement ({name})",
+            "venue": name,
+            "city": (src.get("city") or "").strip(),
+            "start": iso_from_epoch(ts),
+            "start_ts": ts,
+            "category": "Event",
+            "url": link,
+            "feed": url,
+        }
+
+    events = {eid: ev for eid, ev in events.items() if eid in current}
+    state = {
+        "etag": feed.get("etag") or prev.get("etag"),
+        "modified": feed.get("modified") or prev.get("modified"),
+        "checked_at": int(time.time()),
+        "entries": {eid: v for eid, v in seen.items() if eid in current},
+    }
+    return state, events, normalized
+
+def venue_event(src: dict, url: str, rec: dict) -> dict:
+    """Record fra en programside ({title, start_ts, url}) -> event i samme form som RSS-eventene."""
+    name = (src.get("name") or "").strip()
+    ts = int(rec["start_ts"])
+    link = rec.get("url") or ""
+    eid = hashlib.sha1(f"{url}|{link or rec['title']}|{ts}".encode("utf-8")).hexdigest()[:16]
+    return {
+        "id": eid,
+        "title": rec["title"],
+        "venue": name,
+        "city": (src.get("city") or "").strip(),
+        "start": iso_from_epoch(ts),
+        "start_ts": ts,
+        "category": "Event",
+        "url": link,
+        "page": url,
+    }
+
+def dedup_events(events: list, cutoff: int) -> list:
+    """
+    Én passering over alle kilders events (i kilderekkefølge): samme tittel (uten tegnsetting/case)
+    og samme start regnes som samme arrangement; første forekomst vinner og arver manglende lenke.
+    Arrangementer fra programsider som sluttet før cutoff droppes; RSS-entries (med "feed") har
+    publiseringsdato som start_ts og beholdes så lenge de står i feeden.
+    """
+    out: dict = {}
+    for ev in events:
+        ts = ev.get("start_ts")
+        if ts is not None and ts < cutoff and not ev.get("feed"):
+            continue
+        key = (_TITLE_KEY_RE.sub("", (ev.get("title") or "").casefold()), ts)
+        have = out.get(key)
+        if have is None:
+            out[key] = ev
+        elif not have.get("url") and ev.get("url"):
+            have["url"] = ev["url"]
+    return list(out.values())
+
+def main():
+    run_metrics = start_run("fetch_events")
+    add_hook(run_metrics.on_http)
+    sources = load_sources()
+    state = _load_json(STATE_FILE, {})
+    old = _load_json(OUT_FILE, {}).get("events") or []
+    pages = PageCache()
+
+    # forrige kjørings RSS-events, gruppert per feed
+    old_by_feed: dict = {}
+    for ev in old:
+        if isinstance(ev, dict) and ev.get("feed") and ev.get("id"):
+            old_by_feed.setdefault(ev["feed"], {})[ev["id"]] = ev
+
+    jobs = []
+    for src in sources:
+        typ = source_type(src)
+        url = (src.get("url") or src.get("link") or "").strip()
+        if url and typ in ("rss", "html"):
+            jobs.append((src, typ, url))
+
+    def run(src: dict, typ: str, url: str):
+        # metrics-kilden settes i arbeidertråden; samme id som arkivet bruker for programsidene
+        with metrics().source(f"events:{url}"):
+            if typ == "rss":
+                # feedparser henter selv (utenom http-laget): hele kallet telles som parse
+                with metrics().stage("parse"):
+                    return fetch_feed(url, state.get(url) or {})
+            # programside: body hashes; uendret side -> forrige records uten parsing
+            body = get_bytes(url, source_id=f"events:{url}")
+            with metrics().stage("parse"):
+                return pages.scrape(url, body, src.get("scrape") or {})
+
+    # alle kilder parallelt (maks FEED_PER_HOST samtidig mot samme host)
+    tasks = [Task(key=url, url=url, fn=lambda s=src, t=typ, u=url: run(s, t, u)) for src, typ, url in jobs]
+    outcomes = run_tasks(tasks, max_workers=FEED_WORKERS, per_host=FEED_PER_HOST, deadline=FEED_DEADLINE)
+
+    new_state: dict = {}
+    collected: list = []
+    unchanged = normalized = 0
+    for (src, typ, url), (result, err) in zip(jobs, outcomes):
+        if typ == "html":
+            if err is not None:
+                # feilet: behold forrige kjørings records for siden
+                print(f"[events] WARN {url}: {err}")
+                result = pages.records(url)
+            collected.extend(venue_event(src, url, rec) for rec in result)
+            continue
+
+        feed = result
+        prev = state.get(url) or {}
+        old_events = old_by_feed.get(url, {})
+        status = getattr(feed, "status", None) if err is None else None
+        if err is not None or status == 304 or (feed.get("bozo") and not feed.entries):
+            # ikke endret (304) eller feilet: behold forrige events og state for feeden
+            if status == 304:
+                unchanged += 1
+            else:
+                print(f"[events] WARN {url}: {err or feed.get('bozo_exception')}")
+            if prev:
+                new_state[url] = prev
+            collected.extend(old_events.values())
+            continue
+
+        with metrics().stage("normalize", f"events:{url}"):
+            new_state[url], evs, n = merge_feed(src, url, feed, prev, old_events)
+        metrics().items(after=len(evs), source_id=f"events:{url}")
+        collected.extend(evs.values())
+        normalized += n
+
+    events = dedup_events(collected, int(time.time()) - KEEP_PAST_SECONDS)
+    events.sort(key=lambda ev: (ev.get("start_ts") is None, ev.get("start_ts") or 0, ev.get("title") or ""))
+
+    with run_metrics.write(OUT_FILE.relative_to(BASE).as_posix(), len(events)):
+        _write_json(OUT_FILE, {"events": events})
+    _write_json(STATE_FILE, new_state, indent=1)
+    pages.save(keep={url for _src, typ, url in jobs if typ == "html"})
+
+    n_feeds = sum(1 for _src, typ, _url in jobs if typ == "rss")
+    print(f"[events] feeds={n_feeds} unchanged={unchanged} normalized={normalized} pages={len(jobs) - n_feeds} {pages.report()}")
+    print(f"WROTE {OUT_FILE} ({len(events)} events)")
+    run_metrics.publish()
+
+if __name__ == "__main__":
+    main()
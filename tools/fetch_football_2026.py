@@ -13,7 +13,7 @@ import sys
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Tuple
-from urllib.request import Request, urlopen
+
 
 # -----------------------------
 # Paths
@@ -23,6 +23,18 @@ DATA_DIR = os.path.join(ROOT, "data")
 OUT_DIR_2026 = os.path.join(DATA_DIR, "2026")
 META_SOURCES = os.path.join(DATA_DIR, "_meta", "sources.json")
 
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from tools.lib.archive import setup_from_argv  # noqa: E402
+from tools.lib.entities import entities  # noqa: E402
+from tools.lib.http import get_bytes  # noqa: E402
+from tools.lib.jsonio import atomic_write_json  # noqa: E402
+from tools.lib.ics import iter_events  # noqa: E402
+from tools.lib.merge import merge_sources  # noqa: E402
+from tools.lib.normalize import sort_items  # noqa: E402
+from tools.lib.timeutil import OSLO, to_epoch, year_window  # noqa: E402
+
 TZ_NAME = "Europe/Oslo"
 
 # -----------------------------
@@ -74,10 +86,7 @@ def read_json(path: str) -> Optional[dict]:
 
 
 def write_json(path: str, obj: dict) -> None:
-    tmp = path + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2)
-    os.replace(tmp, path)
+    atomic_write_json(path, obj, indent=2)
 
 
 def safe_write_games(path: str, payload: dict, games: List[dict]) -> None:
@@ -92,16 +101,7 @@ def safe_write_games(path: str, payload: dict, games: List[dict]) -> None:
 
 
 def http_get_text(url: str, accept: str) -> str:
-    req = Request(
-        url,
-        headers={
-            "User-Agent": "GrenlandLiveBot/1.0 (+https://grenland-live.no)",
-            "Accept": accept,
-        },
-        method="GET",
-    )
-    with urlopen(req, timeout=60) as resp:
-        data = resp.read()
+    data = get_bytes(url, timeout=60, headers={"Accept": accept})
     # Try utf-8 first, fallback latin-1
     try:
         return data.decode("utf-8")
@@ -173,69 +173,31 @@ def parse_match_summary(summary: str) -> Tuple[str, str]:
 
 def parse_ics_events(ics_text: str) -> List[dict]:
     """
-    Very small ICS parser for VEVENT.
+    VEVENT -> kamp via felles strømmende ICS-parser (tools/lib/ics.py).
     Extracts DTSTART + SUMMARY + LOCATION (optional).
     """
-    # Unfold lines (RFC5545): lines starting with space are continuations
-    lines = ics_text.splitlines()
-    unfolded = []
-    for line in lines:
-        if line.startswith((" ", "\t")) and unfolded:
-            unfolded[-1] += line.strip()
-        else:
-            unfolded.append(line.strip())
-
     events: List[dict] = []
-    current: Dict[str, str] = {}
-    in_event = False
 
-    for line in unfolded:
-        if line == "BEGIN:VEVENT":
-            in_event = True
-            current = {}
-            continue
-        if line == "END:VEVENT":
-            if in_event:
-                dt_raw = None
-
-                # DTSTART can look like:
-                # DTSTART:20260118T180000
-                # DTSTART;TZID=Europe/Oslo:20260118T180000
-                for k, v in current.items():
-                    if k.startswith("DTSTART"):
-                        dt_raw = v
-                        break
-
-                kickoff = parse_dt_ics(dt_raw or "")
-                summary = current.get("SUMMARY", "").strip()
-                location = current.get("LOCATION", "").strip()
-
-                home, away = parse_match_summary(summary)
-
-                if kickoff and home and away:
-                    events.append({
-                        "league": "",  # filled by caller
-                        "home": home,
-                        "away": away,
-                        "kickoff": kickoff,
-                        "channel": "Ukjent",
-                        "where": [],
-                        "location": location if location else None,
-                    })
-            in_event = False
-            current = {}
-            continue
-
-        if not in_event:
-            continue
-
-        if ":" not in line:
-            continue
-
-        key, value = line.split(":", 1)
-        key = key.strip()
-        value = value.strip()
-        current[key] = value
+    # DTSTART can look like:
+    # DTSTART:20260118T180000
+    # DTSTART;TZID=Europe/Oslo:20260118T180000
+    for ev in iter_events(ics_text, keys=("DTSTART", "SUMMARY", "LOCATION")):
+        kickoff = parse_dt_ics(ev.get("DTSTART") or "")
+        summary = ev.get("SUMMARY") or ""
+        location = ev.get("LOCATION") or ""
+
+        home, away = parse_match_summary(summary)
+
+        if kickoff and home and away:
+            events.append({
+                "league": "",  # filled by caller
+                "home": home,
+                "away": away,
+                "kickoff": kickoff,
+                "channel": "Ukjent",
+                "where": [],
+                "location": location if location else None,
+            })
 
     return events
 
@@ -385,28 +347,29 @@ def fetch_league_games(league_key: str, league_name: str, src: SourceSpec) -> Li
         obj = http_get_json(src.url)
         games = parse_fixturedownload_json(obj)
 
-    # fill league + defaults
+    # fill league + defaults; lagnavn -> kanoniske navn + home_id/away_id (data/_meta/entities.json)
+    team_fields = entities().team_fields
     for g in games:
         g["league"] = league_name
+        g.update(team_fields(g["home"], g["away"]))
         if not g.get("channel") or g["channel"] == "Ukjent":
             g["channel"] = DEFAULT_CHANNEL.get(league_name, "Ukjent")
 
-    # Filter to year 2026 if kickoff has a year in first 4 chars
+    # kickoff blander naive (Oslo), +01:00 og Z -> parses én gang til epoch (start_ts)
+    lo, hi = year_window(2026)
     filtered = []
     for g in games:
-        ko = (g.get("kickoff") or "")
-        if isinstance(ko, str) and len(ko) >= 4 and ko[:4].isdigit():
-            year = int(ko[:4])
-            if year != 2026:
-                continue
+        ts = g["start_ts"] = to_epoch(g.get("kickoff"), OSLO)
+        if ts is not None and not lo <= ts < hi:
+            continue
         filtered.append(g)
 
-    # Sort by kickoff string (works for ISO-ish)
-    filtered.sort(key=lambda x: (x.get("kickoff") or ""))
-    return filtered
+    # tidsrekkefølge på heltall (strengsortering av blandede offsets er ikke tidsrekkefølge)
+    return sort_items(filtered)
 
 
 def main() -> int:
+    setup_from_argv("fetch_football_2026")
     ensure_dir(OUT_DIR_2026)
 
     sources = load_sources()
@@ -424,7 +387,7 @@ def main() -> int:
         }, ensure_ascii=False, indent=2))
         return 2
 
-    all_games: List[dict] = []
+    league_games: List[Tuple[str, List[dict]]] = []
     any_ok = False
 
     for league_key, league_name in LEAGUES:
@@ -449,14 +412,16 @@ def main() -> int:
 
         if len(games) > 0:
             any_ok = True
-            all_games.extend(games)
+            league_games.append((league_key, games))
 
     # Optional: write combined football.json (useful for calendar/feed building)
+    # samme kamp i flere ligafiler (ulik staving/tidsformat) -> ett item i samlefilen
+    all_games = sort_items(merge_sources(league_games, sport="football"))
     combined_path = os.path.join(OUT_DIR_2026, "football.json")
     combined_payload = {
         "generated_at": utc_now_iso(),
         "timezone": TZ_NAME,
-        "games": sorted(all_games, key=lambda x: (x.get("kickoff") or "")),
+        "games": all_games,
     }
     safe_write_games(combined_path, combined_payload, all_games)
     print(f"WROTE {os.path.relpath(combined_path, ROOT)}: {len(all_games)} games")
@@ -2,16 +2,22 @@
 # -*- coding: utf-8 -*-
 
 import sys
-import json
 from pathlib import Path
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
 TOOLS_DIR = Path(__file__).resolve().parent
-if str(TOOLS_DIR) not in sys.path:
-    sys.path.insert(0, str(TOOLS_DIR))
+ROOT = TOOLS_DIR.parent
+for p in (TOOLS_DIR, ROOT):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
 
 from providers.handball import fetch_handball_items  # noqa: E402
+from tools.lib.archive import setup_from_argv  # noqa: E402
+from tools.lib.http import add_hook  # noqa: E402
+from tools.lib.jsonio import atomic_write_json  # noqa: E402
+from tools.lib.metrics import start_run  # noqa: E402
+from tools.lib.normalize import render_items  # noqa: E402
 
 OSLO = ZoneInfo("Europe/Oslo")
 
@@ -20,13 +26,13 @@ OUT_WOMEN = Path("data") / "2026" / "handball_women.json"
 
 
 def _write(path: Path, payload: dict) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    tmp = path.with_suffix(path.suffix + ".tmp")
-    tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-    tmp.replace(path)
+    atomic_write_json(path, payload, indent=2)
 
 
 def main() -> None:
+    setup_from_argv("fetch_handball_2026")
+    run = start_run("fetch_handball_2026")
+    add_hook(run.on_http)
     men_items, women_items = fetch_handball_items(year=2026)
 
     base = {
@@ -35,11 +41,12 @@ def main() -> None:
         "generatedAt": datetime.now(OSLO).isoformat(timespec="seconds"),
     }
 
-    _write(OUT_MEN, {**base, "items": men_items})
-    _write(OUT_WOMEN, {**base, "items": women_items})
-
-    print(f"WROTE {OUT_MEN}: {len(men_items)} items")
-    print(f"WROTE {OUT_WOMEN}: {len(women_items)} items")
+    # "start" formateres fra start_ts først her (Europe/Oslo)
+    for path, items in ((OUT_MEN, men_items), (OUT_WOMEN, women_items)):
+        with run.write(path.as_posix(), len(items)):
+            _write(path, {**base, "items": render_items(items)})
+        print(f"WROTE {path}: {len(items)} items")
+    run.publish()
 
 
 if __name__ == "__main__":
@@ -1,15 +1,25 @@
-import json
 import re
-from datetime import datetime
+import sys
+from pathlib import Path
 from typing import List, Dict, Any, Optional
 
-import pytz
-import requests
 from bs4 import BeautifulSoup
+from lxml import html as lxml_html
 
-OSLO = pytz.timezone("Europe/Oslo")
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tools.lib.archive import setup_from_argv  # noqa: E402
+from tools.lib.http import add_hook, get_text  # noqa: E402
+from tools.lib.jsonio import atomic_write_json  # noqa: E402
+from tools.lib.metrics import metrics, start_run  # noqa: E402
+from tools.lib.normalize import dedup_items, render_items, sort_items  # noqa: E402
+from tools.lib.timeutil import now_oslo_iso, oslo_epoch  # noqa: E402
 
 URL = "https://www.eurohandball.com/en/competitions/national-team-competitions/women/ehf-euro-cup-2026/"
+SOURCE_ID = "handball_ehf_euro_cup_2026_women"
+OUT = "data/handball_vm_2026_damer.json"
 
 
 MONTHS = {
@@ -18,11 +28,7 @@ MONTHS = {
 }
 
 
-def _now_iso() -> str:
-    return datetime.now(OSLO).isoformat()
-
-
-def _to_dt(day_mon_year: str, hhmm: str) -> Optional[datetime]:
+def _to_ts(day_mon_year: str, hhmm: str) -> Optional[int]:
     # "Wed Oct 15, 2025" + "18:15"
     m = re.match(r"^(Mon|Tue|Wed|Thu|Fri|Sat|Sun)\s+([A-Za-z]{3})\s+(\d{1,2}),\s*(\d{4})$", day_mon_year.strip())
     if not m:
@@ -33,54 +39,193 @@ def _to_dt(day_mon_year: str, hhmm: str) -> Optional[datetime]:
     day = int(m.group(3))
     year = int(m.group(4))
     hh, mm = hhmm.split(":")
-    return OSLO.localize(datetime(year, mon, day, int(hh), int(mm)))
+    return oslo_epoch(year, mon, day, int(hh), int(mm))
 
 
-def main() -> None:
-    r = requests.get(URL, timeout=60, headers={"User-Agent": "Mozilla/5.0"})
-    r.raise_for_status()
+DAYS = ("mon ", "tue ", "wed ", "thu ", "fri ", "sat ", "sun ")
+LINK_TEXT = "view game details"
+
+# "Wed Oct 15, 2025 18:15, Larvik (NOR)" (+ "view game details" i tekst-varianten)
+_CARD_RE = re.compile(
+    r"\b((?:Mon|Tue|Wed|Thu|Fri|Sat|Sun)\s+[A-Za-z]{3}\s+\d{1,2},\s*\d{4})\s+(\d{1,2}:\d{2}),\s*(.+?)\s+\(([A-Z]{3})\)",
+    re.IGNORECASE,
+)
+_WS_RE = re.compile(r"\s+")
+
+
+def _is_team(s: str) -> bool:
+    # typiske landnavn: "Norway", "Denmark", "Czechia", etc
+    low = s.lower()
+    if low.startswith(DAYS) or LINK_TEXT in low or low == "matches":
+        return False
+    if any(ch.isdigit() for ch in s) or len(s) < 3:
+        return False
+    return s[0].isalpha() and s[0].isupper()
+
+
+def _game(start_ts: int, home: str, away: str, venue: str) -> Dict[str, Any]:
+    return {
+        "league": "Håndball (Damer) – EHF EURO Cup 2026",
+        "home": home,
+        "away": away,
+        "venue": venue,
+        "start_ts": start_ts,
+        "channel": "TV 2 / TV 2 Play",
+        "kind": "handball",
+        "gender": "women"
+    }
+
+
+# -----------------------------
+# DOM: én passering over kampkortene (lxml)
+# -----------------------------
+def _norm(x: str) -> str:
+    return _WS_RE.sub(" ", x).strip()
+
+
+class _CardText:
+    """
+    Tekstene (som itertext(), normalisert) og dato/lag-testene per node, regnet ut én gang og delt
+    mellom _cards og _card_game. En nodes tekster bygges fra barnas (nedenfra og opp), så klatringen
+    mot <html> går ikke gjennom de samme undertrærne på nytt for hvert nivå.
+    """
+
+    def __init__(self) -> None:
+        self._texts: Dict[Any, List[str]] = {}
+        self._dated: Dict[Any, bool] = {}
+        self._card: Dict[Any, bool] = {}
+
+    def texts(self, el) -> List[str]:
+        out = self._texts.get(el)
+        if out is None:
+            out = []
+            # kommentarer/PI: bare tail, som itertext()
+            if isinstance(el.tag, str) and el.text and (t := _norm(el.text)):
+                out.append(t)
+            for child in el:
+                out.extend(self.texts(child))
+                if child.tail and (t := _norm(child.tail)):
+                    out.append(t)
+            self._texts[el] = out
+        return out
+
+    def dated(self, el) -> bool:
+        v = self._dated.get(el)
+        if v is None:
+            v = self._dated[el] = _CARD_RE.search(" ".join(self.texts(el))) is not None
+        return v
+
+    def is_card(self, el) -> bool:
+        """Har både dato/sted-linjen og minst to lag-lignende tekster."""
+        v = self._card.get(el)
+        if v is None:
+            v = self._card[el] = self.dated(el) and sum(1 for t in self.texts(el) if _is_team(t)) >= 2
+        return v
+
+
+def _cards(root, ct: _CardText) -> List[Any]:
+    """
+    Kampkort = nærmeste forfar til en "view game details"-node som har dato og to lag.
+    Klatringen stopper der, og aldri over en node med flere slike lenker (telles i én runde: hver
+    lenke-node øker telleren til alle forfedrene sine). Uten et helt kort brukes nærmeste node med
+    datoen, så en side med bare én lenke ikke ender på <html>.
+    """
+    anchors = [el for el in root.iter() if isinstance(el.tag, str) and LINK_TEXT in (el.text or "").lower()]
+    counts: Dict[Any, int] = {}
+    for a in anchors:
+        for anc in a.iterancestors():
+            counts[anc] = counts.get(anc, 0) + 1
+    cards = []
+    for a in anchors:
+        card = a
+        dated = a if ct.dated(a) else None
+        for anc in a.iterancestors():
+            if counts[anc] > 1 or ct.is_card(card):
+                break
+            card = anc
+            if dated is None and ct.dated(anc):
+                dated = anc
+        if not ct.is_card(card):
+            card = dated if dated is not None else a
+        cards.append(card)
+    return cards
+
 
-    soup = BeautifulSoup(r.text, "html.parser")
+def _card_game(card, ct: _CardText) -> Optional[Dict[str, Any]]:
+    texts = ct.texts(card)
+    m = _CARD_RE.search(" ".join(texts))
+    if not m:
+        return None
+    start_ts = _to_ts(m.group(1), m.group(2))
+    if start_ts is None:
+        return None
+
+    # lag: helst de innerste nodene merket som team (class), ellers lag-lignende tekst i kortet,
+    # i dokumentrekkefølge
+    marked = [el for el in card.iter() if isinstance(el.tag, str) and "team" in (el.get("class") or "").lower()]
+    marked_set = set(marked)
+    outer = {anc for el in marked for anc in el.iterancestors() if anc in marked_set}
+    teams = []
+    for el in marked:
+        if el in outer:
+            continue
+        # innerste team-node: liten, og text_content() skjøter inline-biter uten mellomrom
+        t = _norm(el.text_content())
+        if t and _is_team(t):
+            teams.append(t)
+    if len(teams) < 2:
+        teams = [t for t in texts if _is_team(t)]
+    if len(teams) < 2:
+        return None
+    return _game(start_ts, teams[0], teams[1], f"{m.group(3).strip()} ({m.group(4).upper()})")
+
+
+def _games_from_dom(html: str) -> List[Dict[str, Any]]:
+    root = lxml_html.fromstring(html)
+    ct = _CardText()
+    games = []
+    for card in _cards(root, ct):
+        g = _card_game(card, ct)
+        if g:
+            games.append(g)
+    return games
+
+
+# -----------------------------
+# fallback: flat tekst + lag i samme kort (gammel heuristikk)
+# -----------------------------
+def _games_from_text(html: str) -> List[Dict[str, Any]]:
+    soup = BeautifulSoup(html, "html.parser")
     text = soup.get_text("\n")
     lines = [re.sub(r"\s+", " ", x).strip() for x in text.splitlines()]
     lines = [x for x in lines if x]
 
     # Vi leter etter mønstre som:
     # "Wed Oct 15, 2025 18:15, Larvik (NOR) view game details"
-    # og nær samme blokk finner vi teamA / teamB i nærheten.
+    # og finner teamA / teamB i samme kort: linjene mellom forrige dato-linje og denne.
     match_re = re.compile(
         r"^(Mon|Tue|Wed|Thu|Fri|Sat|Sun)\s+[A-Za-z]{3}\s+\d{1,2},\s*\d{4}\s+(\d{1,2}:\d{2}),\s*(.+?)\s+\(([A-Z]{3})\)\s+view game details",
         re.IGNORECASE
     )
+    hits = [(i, m) for i, m in ((i, match_re.match(ln)) for i, ln in enumerate(lines)) if m]
 
     games: List[Dict[str, Any]] = []
 
-    def find_teams_around(idx: int) -> Optional[List[str]]:
-        # vi går litt opp og litt ned for å finne to "rene" teamnavn
-        cand = []
-        for j in range(max(0, idx - 10), min(len(lines), idx + 10)):
-            s = lines[j]
-            if s.lower().startswith(("wed ", "thu ", "fri ", "sat ", "sun ", "mon ", "tue ")):
-                continue
-            if "view game details" in s.lower():
-                continue
-            if "matches" == s.lower():
-                continue
-            if any(ch.isdigit() for ch in s):
-                continue
-            if len(s) < 3:
-                continue
-            # typiske landnavn: "Norway", "Denmark", "Czechia", etc
-            if s[0].isalpha() and s[0].isupper():
-                cand.append(s)
-            if len(cand) >= 2:
-                return cand[:2]
-        return None
+    def find_teams(k: int) -> Optional[List[str]]:
+        # lagene står foran dato-linjen i kortet: de to nærmeste over den, men aldri forbi forrige
+        # kort (et fast vindu på ±10 linjer plukket lagene fra kortet før); ellers de to første
+        # under, før neste kort
+        idx = hits[k][0]
+        lo = hits[k - 1][0] + 1 if k > 0 else 0
+        hi = hits[k + 1][0] if k + 1 < len(hits) else len(lines)
+        above = [x for x in lines[max(lo, idx - 10):idx] if _is_team(x)]
+        if len(above) >= 2:
+            return above[-2:]
+        below = [x for x in lines[idx + 1:min(hi, idx + 10)] if _is_team(x)]
+        return below[:2] if len(below) >= 2 else None
 
-    for i, ln in enumerate(lines):
-        m = match_re.match(ln)
-        if not m:
-            continue
+    for k, (i, m) in enumerate(hits):
+        ln = lines[i]
 
         # bygg datetime
         # vi trenger hele dato-delen igjen:
@@ -90,39 +235,52 @@ def main() -> None:
         day_str = day_part.group(1)
         hhmm = m.group(2)
 
-        dt = _to_dt(day_str, hhmm)
-        if not dt:
+        start_ts = _to_ts(day_str, hhmm)
+        if start_ts is None:
             continue
 
-        teams = find_teams_around(i)
+        teams = find_teams(k)
         if not teams:
             continue
 
-        home, away = teams[0], teams[1]
-        games.append({
-            "league": "Håndball (Damer) – EHF EURO Cup 2026",
-            "home": home,
-            "away": away,
-            "start": dt.isoformat(),
-            "channel": "TV 2 / TV 2 Play",
-            "kind": "handball",
-            "gender": "women"
-        })
-
-    # dedupe
-    seen = set()
-    out = []
-    for g in sorted(games, key=lambda x: x["start"]):
-        k = (g["start"], g["home"], g["away"])
-        if k in seen:
-            continue
-        seen.add(k)
-        out.append(g)
+        games.append(_game(start_ts, teams[0], teams[1], f"{m.group(3).strip()} ({m.group(4).upper()})"))
+
+    return games
+
+
+def extract_games(html: str) -> List[Dict[str, Any]]:
+    """Kampkort fra DOM-en; faller tilbake til tekst-heuristikken hvis ingen kort gir kamper."""
+    try:
+        games = _games_from_dom(html)
+    except Exception as e:
+        print(f"[ehf] WARN DOM extraction failed ({type(e).__name__}: {e}); using text heuristic")
+        games = []
+    if not games:
+        games = _games_from_text(html)
+    return games
+
+
+def main() -> None:
+    setup_from_argv("fetch_handball_damer_ehf_eurocup")
+    run = start_run("fetch_handball_damer_ehf_eurocup")
+    add_hook(run.on_http)
+    with metrics().source(SOURCE_ID):
+        # siden har alltid blitt hentet med nettleser-UA; overstyr klientens standard User-Agent her
+        html = get_text(URL, timeout=60, headers={"User-Agent": "Mozilla/5.0"})
+        with metrics().stage("parse"):
+            games = extract_games(html)
+
+        # dedupe + sorter på epoch; "start" (Oslo ISO) formateres samlet til slutt
+        with metrics().stage("normalize"):
+            out = dedup_items(sort_items(games), key=lambda g: (g["start_ts"], g["home"], g["away"]))
+            render_items(out)
+        metrics().items(before=len(games), after=len(out))
 
-    with open("data/handball_vm_2026_damer.json", "w", encoding="utf-8") as f:
-        json.dump({"games": out, "updatedAt": _now_iso()}, f, ensure_ascii=False, indent=2)
+    with run.write(OUT, len(out)):
+        atomic_write_json(OUT, {"games": out, "updatedAt": now_oslo_iso()}, indent=2)
 
-    print(f"WROTE data/handball_vm_2026_damer.json -> {len(out)} games")
+    print(f"WROTE {OUT} -> {len(out)} games")
+    run.publish()
 
 
 if __name__ == "__main__":
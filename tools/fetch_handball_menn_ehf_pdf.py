@@ -1,47 +1,47 @@
-import json
 import re
-from datetime import datetime
-from io import BytesIO
-from typing import List, Dict, Any, Optional
-
-import pytz
-import requests
+import sys
+from mmap import mmap
+from pathlib import Path
+from typing import BinaryIO, List, Dict, Any, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tools.lib.archive import setup_from_argv  # noqa: E402
+from tools.lib.http import add_hook, download  # noqa: E402
+from tools.lib.jsonio import atomic_write_json  # noqa: E402
+from tools.lib.metrics import metrics, start_run  # noqa: E402
+from tools.lib.normalize import dedup_items, render_items, sort_items  # noqa: E402
+from tools.lib.pdfextract import extract_text, report as extract_report  # noqa: E402
+from tools.lib.timeutil import now_oslo_iso, oslo_epoch  # noqa: E402
 
 try:
-    from PyPDF2 import PdfReader
+    import pypdf  # noqa: F401
 except Exception as e:
     raise SystemExit(
-        "PyPDF2 mangler. Legg til i tools/requirements-tools.txt: PyPDF2==3.0.1"
+        "pypdf mangler. Legg til i tools/requirements-tools.txt: pypdf==4.3.1"
     )
 
-OSLO = pytz.timezone("Europe/Oslo")
-
 PDF_URL = "https://tickets.eurohandball.com/fileadmin/fm_de/EHF2026M/250901_EHF2026-M_Match_Schedule_new.pdf"
-
-
-def _oslo_iso(dt: datetime) -> str:
-    if dt.tzinfo is None:
-        dt = OSLO.localize(dt)
-    return dt.isoformat()
+PDF_MAX_BYTES = 40 * 1024 * 1024
+# samme id som kilden i data/_meta/sources.json
+SOURCE_ID = "handball_ehf_euro_2026_men_pdf"
+OUT = "data/handball_vm_2026_menn.json"
 
 
 def _clean(s: str) -> str:
     return re.sub(r"\s+", " ", (s or "")).strip()
 
 
-def _download_pdf(url: str) -> bytes:
-    r = requests.get(url, timeout=60)
-    r.raise_for_status()
-    return r.content
+def _download_pdf(url: str) -> BinaryIO:
+    # streamet til temp-fil; conditional GET: uendret PDF gir 304 og cachet body
+    return download(url, timeout=60, max_bytes=PDF_MAX_BYTES, expect="pdf")
 
 
-def _extract_text_from_pdf(pdf_bytes: bytes) -> str:
-    reader = PdfReader(BytesIO(pdf_bytes))
-    parts = []
-    for p in reader.pages:
-        t = p.extract_text() or ""
-        parts.append(t)
-    return "\n".join(parts)
+def _extract_text_from_pdf(pdf_src: bytes | BinaryIO | mmap) -> str:
+    # rask tekst per side (pypdf), store PDFer fordelt over en prosess-pool
+    return extract_text(pdf_src)
 
 
 def _parse_matches(text: str) -> List[Dict[str, Any]]:
@@ -94,7 +94,10 @@ def _parse_matches(text: str) -> List[Dict[str, Any]]:
             day = int(mdt.group(3))
             year = int(mdt.group(4))
             hh, mm = mdt.group(5).split(":")
-            dt = OSLO.localize(datetime(year, mon, day, int(hh), int(mm)))
+            start_ts = oslo_epoch(year, mon, day, int(hh), int(mm))
+            if start_ts is None:
+                i += 1
+                continue
 
             # finn home/away i de neste ~10 linjene
             cand = []
@@ -111,7 +114,7 @@ def _parse_matches(text: str) -> List[Dict[str, Any]]:
                     "league": "Håndball EM 2026 (Menn)",
                     "home": home,
                     "away": away,
-                    "start": _oslo_iso(dt),
+                    "start_ts": start_ts,
                     "channel": "TV 2 / TV 2 Play",
                     "kind": "handball",
                     "gender": "men"
@@ -126,7 +129,10 @@ def _parse_matches(text: str) -> List[Dict[str, Any]]:
             day = int(mdate.group(3))
             year = int(mdate.group(4))
             hh, mm = lines[i + 1].split(":")
-            dt = OSLO.localize(datetime(year, mon, day, int(hh), int(mm)))
+            start_ts = oslo_epoch(year, mon, day, int(hh), int(mm))
+            if start_ts is None:
+                i += 2
+                continue
 
             cand = []
             for j in range(i + 2, min(i + 20, len(lines))):
@@ -142,7 +148,7 @@ def _parse_matches(text: str) -> List[Dict[str, Any]]:
                     "league": "Håndball EM 2026 (Menn)",
                     "home": home,
                     "away": away,
-                    "start": _oslo_iso(dt),
+                    "start_ts": start_ts,
                     "channel": "TV 2 / TV 2 Play",
                     "kind": "handball",
                     "gender": "men"
@@ -152,30 +158,29 @@ def _parse_matches(text: str) -> List[Dict[str, Any]]:
 
         i += 1
 
-    # dedupe
-    seen = set()
-    out = []
-    for m in matches:
-        k = (m["start"], m["home"], m["away"])
-        if k in seen:
-            continue
-        seen.add(k)
-        out.append(m)
-
-    out.sort(key=lambda x: x["start"])
-    return out
+    # dedupe + sorter på epoch; "start" (Oslo ISO) formateres samlet til slutt
+    out = dedup_items(matches, key=lambda m: (m["start_ts"], m["home"], m["away"]))
+    return render_items(sort_items(out))
 
 
 def main() -> None:
-    pdf_bytes = _download_pdf(PDF_URL)
-    text = _extract_text_from_pdf(pdf_bytes)
-    matches = _parse_matches(text)
-
-    payload = {"games": matches, "updatedAt": datetime.now(OSLO).isoformat()}
-    with open("data/handball_vm_2026_menn.json", "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
-
-    print(f"WROTE data/handball_vm_2026_menn.json -> {len(matches)} games")
+    setup_from_argv("fetch_handball_menn_ehf_pdf")
+    run = start_run("fetch_handball_menn_ehf_pdf")
+    add_hook(run.on_http)
+    with metrics().source(SOURCE_ID):
+        with _download_pdf(PDF_URL) as fh, metrics().stage("parse"):
+            text = _extract_text_from_pdf(fh)
+        with metrics().stage("normalize"):
+            matches = _parse_matches(text)
+        metrics().items(after=len(matches))
+
+    payload = {"games": matches, "updatedAt": now_oslo_iso()}
+    with run.write(OUT, len(matches)):
+        atomic_write_json(OUT, payload, indent=2)
+
+    print(f"WROTE {OUT} -> {len(matches)} games")
+    print(f"[pdf] {extract_report()}")
+    run.publish()
 
 
 if __name__ == "__main__":
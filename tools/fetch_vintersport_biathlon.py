@@ -1,27 +1,67 @@
+import hashlib
 import json
 import re
-from datetime import datetime
-from typing import Dict, Any, List, Tuple
+import sys
+from datetime import timezone
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tools.lib.archive import setup_from_argv  # noqa: E402
+from tools.lib.http import add_hook, get_bytes  # noqa: E402
+from tools.lib.jsonio import atomic_write_json  # noqa: E402
+from tools.lib.metrics import metrics, start_run  # noqa: E402
+from tools.lib.normalize import gender_items, merge_genders, render_items, sort_items, stable_id  # noqa: E402
+from tools.lib.pool import Task, run_tasks  # noqa: E402
+from tools.lib.sportapi import iter_competitions, iter_events  # noqa: E402
+from tools.lib.timeutil import now_oslo_iso, to_epoch  # noqa: E402
+
+# Competitions-kall per event: maks samtidige, og minste avstand mellom kall-starter (sek)
+COMP_WORKERS = 6
+COMP_PER_HOST = 4
+COMP_MIN_INTERVAL = 0.2
+# Competitions-svar yngre enn dette (sek) tas rett fra http-cachen uten nettverk; eldre revalideres
+# med If-None-Match / If-Modified-Since, og 304 gir cachet body
+COMP_MAX_AGE = 6 * 3600
+
+# kanonisk dokument (hvert renn én gang, med gender) + de gamle filene per kjønn i samme format
+# som før ({events, updatedAt} med hele items; "mixed" står i begge)
+OUT = "data/vintersport.json"
+OUT_GENDERS = {"men": "data/vintersport_menn.json", "women": "data/vintersport_kvinner.json"}
+
+# EventId -> {sha256, parser, comps}: uendret payload (og samme parser) siden forrige kjøring hopper over parsing
+COMP_STATE = ROOT / "data" / "_meta" / "biathlon_competitions.json"
+# kilde-id-er i metrics (Events-kallet og alle Competitions-kallene samlet)
+EVENTS_SOURCE = "biathlon_api:events"
+COMP_SOURCE = "biathlon_api:competitions"
+# økes når _parse_competitions/COMP_FIELDS endres, så lagrede comps ikke gjenbrukes med gammelt format
+COMP_PARSE_VERSION = 2
 
-import pytz
-import requests
 
-OSLO = pytz.timezone("Europe/Oslo")
+def _load_sources() -> Dict[str, Any]:
+    with open("data/winter_sources.json", "r", encoding="utf-8") as f:
+        return json.load(f)
 
 
-def _now_iso() -> str:
-    return datetime.now(OSLO).isoformat()
+def _get(url: str, max_age: float | None = None, source_id: str = COMP_SOURCE) -> bytes:
+    # metrics-kilden settes her, i tråden som gjør kallet (run_tasks-arbeidere arver ikke konteksten)
+    with metrics().source(source_id):
+        return get_bytes(url, timeout=60, max_age=max_age)
 
 
-def _load_sources() -> Dict[str, Any]:
-    with open("data/winter_sources.json", "r", encoding="utf-8") as f:
-        return json.load(f)
+def _load_comp_state() -> Dict[str, Any]:
+    try:
+        data = json.loads(COMP_STATE.read_text(encoding="utf-8"))
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
 
 
-def _get(url: str) -> str:
-    r = requests.get(url, timeout=60)
-    r.raise_for_status()
-    return r.text
+def _save_comp_state(state: Dict[str, Any]) -> None:
+    atomic_write_json(COMP_STATE, state, indent=1, sort_keys=True)
 
 
 def _infer_gender_and_title(competition_name: str) -> Tuple[str, str]:
@@ -43,73 +83,31 @@ def _infer_gender_and_title(competition_name: str) -> Tuple[str, str]:
     return gender, title
 
 
-def _xml_attr(xml: str, tag: str) -> List[str]:
-    # superenkel xml-plukk (APIet leverer ofte XML)
-    # Vi bruker regex for å slippe xml-parser edgecases i GH Actions
-    pattern = re.compile(rf"<{tag}>(.*?)</{tag}>", re.DOTALL)
-    return [m.group(1).strip() for m in pattern.finditer(xml)]
-
-
-def _parse_events_xml(xml: str) -> List[Dict[str, Any]]:
-    # Hver <Event> ... </Event>
-    events = []
-    for block in re.findall(r"<Event\b.*?>.*?</Event>", xml, flags=re.DOTALL):
-        def one(tag: str) -> str:
-            m = re.search(rf"<{tag}>(.*?)</{tag}>", block, flags=re.DOTALL)
-            return (m.group(1).strip() if m else "")
-
-        events.append({
-            "EventId": one("EventId"),
-            "Description": one("Description"),
-            "ShortDescription": one("ShortDescription"),
-            "Nat": one("Nat"),
-            "StartDate": one("StartDate"),
-            "EndDate": one("EndDate"),
-            "Level": one("Level"),
-        })
-    return events
-
-
-def _parse_competitions_xml(xml: str) -> List[Dict[str, Any]]:
-    comps = []
-    for block in re.findall(r"<Competition\b.*?>.*?</Competition>", xml, flags=re.DOTALL):
-        def one(tag: str) -> str:
-            m = re.search(rf"<{tag}>(.*?)</{tag}>", block, flags=re.DOTALL)
-            return (m.group(1).strip() if m else "")
-
-        comps.append({
-            "RaceId": one("RaceId"),
-            "CompetitionName": one("CompetitionName"),
-            "StartTime": one("StartTime"),
-            "Location": one("Location"),
-            "Nat": one("Nat"),
-            "Discipline": one("Discipline"),
-        })
-    return comps
-
-
-def _to_oslo_iso(utc_or_iso: str) -> str:
-    """
-    SportAPI StartTime er ofte ISO (UTC). Vi gjør om til Europe/Oslo.
-    """
-    s = (utc_or_iso or "").strip()
-    if not s:
-        return ""
+EVENT_FIELDS = ("EventId", "Description", "ShortDescription", "Nat", "StartDate", "EndDate", "Level")
+COMP_FIELDS = ("RaceId", "CompetitionName", "StartTime", "Location", "Nat", "Discipline")
+COMP_PARSER = f"{COMP_PARSE_VERSION}:{','.join(COMP_FIELDS)}"
+
 
-    # Prøv flere formater:
-    for fmt in ("%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%d %H:%M:%S"):
-        try:
-            dt = datetime.strptime(s.replace("Z", ""), fmt)
-            dt = pytz.utc.localize(dt)
-            return dt.astimezone(OSLO).isoformat()
-        except Exception:
-            pass
+def _parse_events(payload: bytes | str) -> Iterator[Dict[str, str]]:
+    # XML eller JSON, streamet post for post (tools/lib/sportapi.py)
+    return iter_events(payload, EVENT_FIELDS)
 
-    # fallback: la det stå (men det funker ofte i Date(...) i JS uansett)
-    return s
+
+def _parse_competitions(payload: bytes | str) -> Iterator[Dict[str, str]]:
+    return iter_competitions(payload, COMP_FIELDS)
+
+
+def _start_ts(utc_or_iso: str) -> int | None:
+    """
+    SportAPI StartTime er ofte ISO (UTC, også uten Z). -> epoch; Europe/Oslo-ISO lages ved skriving.
+    """
+    return to_epoch(utc_or_iso, timezone.utc)
 
 
 def main() -> None:
+    setup_from_argv("fetch_vintersport_biathlon")
+    run = start_run("fetch_vintersport_biathlon")
+    add_hook(run.on_http)
     cfg = _load_sources()["biathlon"]
     base = cfg["base_url"].rstrip("/")
     season_id = int(cfg["season_id"])
@@ -117,37 +115,61 @@ def main() -> None:
 
     # 1) hent alle events (World Cup/OWG/WCH osv)
     events_url = f"{base}/Events?SeasonId={season_id}&Level={level}"
-    events_xml = _get(events_url)
-    events = _parse_events_xml(events_xml)
+    payload = _get(events_url, source_id=EVENTS_SOURCE)
+    with metrics().stage("parse", EVENTS_SOURCE):
+        events = list(_parse_events(payload))
 
-    all_games_m: List[Dict[str, Any]] = []
-    all_games_w: List[Dict[str, Any]] = []
+    all_games: List[Dict[str, Any]] = []
 
-    # 2) for hvert event, hent competitions (renn)
+    # 2) hent competitions (renn) for alle events parallelt, med rate limit
+    events = [ev for ev in events if ev.get("EventId")]
+    tasks = []
     for ev in events:
-        event_id = ev.get("EventId")
-        if not event_id:
-            continue
-
-        comps_url = f"{base}/Competitions?EventId={event_id}"
-        try:
-            comps_xml = _get(comps_url)
-        except Exception:
+        comps_url = f"{base}/Competitions?EventId={ev['EventId']}"
+        tasks.append(Task(key=ev["EventId"], url=comps_url, fn=lambda u=comps_url: _get(u, COMP_MAX_AGE)))
+
+    outcomes = run_tasks(
+        tasks,
+        max_workers=COMP_WORKERS,
+        per_host=COMP_PER_HOST,
+        min_interval=COMP_MIN_INTERVAL,
+    )
+
+    state = _load_comp_state()
+    skipped = 0
+
+    # behandle i samme rekkefølge som events-listen
+    for ev, (comps_payload, err) in zip(events, outcomes):
+        event_id = ev["EventId"]
+        if err is not None:
             continue
 
-        comps = _parse_competitions_xml(comps_xml)
+        sha = hashlib.sha256(comps_payload).hexdigest()
+        prev = state.get(event_id)
+        if (isinstance(prev, dict) and prev.get("sha256") == sha and prev.get("parser") == COMP_PARSER
+                and isinstance(prev.get("comps"), list)):
+            comps = prev["comps"]
+            skipped += 1
+        else:
+            with metrics().stage("parse", COMP_SOURCE):
+                comps = list(_parse_competitions(comps_payload))
+            state[event_id] = {"sha256": sha, "parser": COMP_PARSER, "comps": comps}
 
         for c in comps:
-            start = _to_oslo_iso(c.get("StartTime", ""))
-            if not start:
+            raw_start = (c.get("StartTime") or "").strip()
+            start_ts = _start_ts(raw_start)
+            if start_ts is None and not raw_start:
                 continue
 
             g, title = _infer_gender_and_title(c.get("CompetitionName", ""))
 
             game = {
+                "id": stable_id("biathlon", str(start_ts if start_ts is not None else raw_start), title),
                 "league": "Skiskyting (IBU)",
                 "title": title,
-                "start": start,
+                # fallback: la rå verdi stå (funker ofte i Date(...) i JS uansett)
+                "start": raw_start,
+                "start_ts": start_ts,
                 "channel": "NRK / TV 2 (varierer)",
                 "where": [],
                 "kind": "wintersport",
@@ -159,38 +181,31 @@ def main() -> None:
                 }
             }
 
-            if game["gender"] == "men":
-                all_games_m.append(game)
-            elif game["gender"] == "women":
-                all_games_w.append(game)
-            else:
-                # mixed -> putt i begge (så du ser det uansett)
-                all_games_m.append(game)
-                all_games_w.append(game)
-
-    # sort + dedupe
-    def dedupe(arr: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        seen = set()
-        out = []
-        for x in sorted(arr, key=lambda z: z["start"]):
-            k = (x["start"], x.get("title"))
-            if k in seen:
-                continue
-            seen.add(k)
-            out.append(x)
-        return out
-
-    all_games_m = dedupe(all_games_m)
-    all_games_w = dedupe(all_games_w)
-
-    with open("data/vintersport_menn.json", "w", encoding="utf-8") as f:
-        json.dump({"events": all_games_m, "updatedAt": _now_iso()}, f, ensure_ascii=False, indent=2)
-
-    with open("data/vintersport_kvinner.json", "w", encoding="utf-8") as f:
-        json.dump({"events": all_games_w, "updatedAt": _now_iso()}, f, ensure_ascii=False, indent=2)
-
-    print(f"WROTE data/vintersport_menn.json -> {len(all_games_m)} events")
-    print(f"WROTE data/vintersport_kvinner.json -> {len(all_games_w)} events")
+            all_games.append(game)
+
+    # sort + dedupe: samme renn (start, tittel) = samme id; sett under ulike kjønn -> "mixed", én gang
+    # "start" (Oslo ISO) formateres fra start_ts samlet, rett før skriving
+    n_raw = len(all_games)
+    with metrics().stage("normalize", COMP_SOURCE):
+        all_games = render_items(merge_genders(sort_items(all_games)))
+    metrics().items(before=n_raw, after=len(all_games), source_id=COMP_SOURCE)
+
+    # behold kun events som finnes i sesongen nå
+    state = {ev["EventId"]: state[ev["EventId"]] for ev in events if ev["EventId"] in state}
+    _save_comp_state(state)
+    print(f"Competitions: {len(events)} events, {skipped} uendret siden forrige kjøring")
+
+    updated = now_oslo_iso()
+    with run.write(OUT, len(all_games)):
+        atomic_write_json(OUT, {"events": all_games, "updatedAt": updated}, indent=2)
+    print(f"WROTE {OUT} -> {len(all_games)} events")
+
+    for gender, path in OUT_GENDERS.items():
+        part = gender_items(all_games, gender)
+        with run.write(path, len(part)):
+            atomic_write_json(path, {"events": part, "updatedAt": updated}, indent=2)
+        print(f"WROTE {path} -> {len(part)} events")
+    run.publish()
 
 
 if __name__ == "__main__":
@@ -2,32 +2,44 @@
 # -*- coding: utf-8 -*-
 
 import sys
-import json
 from pathlib import Path
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
 TOOLS_DIR = Path(__file__).resolve().parent
-if str(TOOLS_DIR) not in sys.path:
-    sys.path.insert(0, str(TOOLS_DIR))
+ROOT = TOOLS_DIR.parent
+for p in (TOOLS_DIR, ROOT):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
 
 from providers.wintersport import fetch_wintersport_items  # noqa: E402
+from tools.lib.archive import setup_from_argv  # noqa: E402
+from tools.lib.http import add_hook  # noqa: E402
+from tools.lib.jsonio import atomic_write_json  # noqa: E402
+from tools.lib.memo import run_memo  # noqa: E402
+from tools.lib.metrics import start_run  # noqa: E402
+from tools.lib.normalize import gender_items, render_items  # noqa: E402
 
 OSLO = ZoneInfo("Europe/Oslo")
 
-OUT_MEN = Path("data") / "2026" / "wintersport_men.json"
-OUT_WOMEN = Path("data") / "2026" / "wintersport_women.json"
+# kanonisk dokument (hvert renn én gang, med gender) + de gamle filene per kjønn, fortsatt med hele
+# items (samme format som før, for andre lesere enn app.js; "mixed" står i begge)
+OUT = Path("data") / "2026" / "wintersport.json"
+OUT_GENDERS = {
+    "men": Path("data") / "2026" / "wintersport_men.json",
+    "women": Path("data") / "2026" / "wintersport_women.json",
+}
 
 
 def _write(path: Path, payload: dict) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    tmp = path.with_suffix(path.suffix + ".tmp")
-    tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-    tmp.replace(path)
+    atomic_write_json(path, payload, indent=2)
 
 
 def main() -> None:
-    men_items, women_items = fetch_wintersport_items(year=2026)
+    setup_from_argv("fetch_wintersport_2026")
+    run = start_run("fetch_wintersport_2026")
+    add_hook(run.on_http)
+    items = fetch_wintersport_items(year=2026)
 
     base = {
         "timezone": "Europe/Oslo",
@@ -35,11 +47,18 @@ def main() -> None:
         "generatedAt": datetime.now(OSLO).isoformat(timespec="seconds"),
     }
 
-    _write(OUT_MEN, {**base, "items": men_items})
-    _write(OUT_WOMEN, {**base, "items": women_items})
-
-    print(f"WROTE {OUT_MEN}: {len(men_items)} items")
-    print(f"WROTE {OUT_WOMEN}: {len(women_items)} items")
+    # "start" formateres fra start_ts først her (Europe/Oslo)
+    items = render_items(items)
+    with run.write(OUT.as_posix(), len(items)):
+        _write(OUT, {**base, "items": items})
+    print(f"WROTE {OUT}: {len(items)} items")
+    for gender, path in OUT_GENDERS.items():
+        part = gender_items(items, gender)
+        with run.write(path.as_posix(), len(part)):
+            _write(path, {**base, "items": part})
+        print(f"WROTE {path}: {len(part)} items")
+    print(f"[memo] {run_memo().report()}")
+    run.publish()
 
 
 if __name__ == "__main__":
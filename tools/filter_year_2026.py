@@ -3,11 +3,20 @@
 
 import json
 import re
+import sys
 from pathlib import Path
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tools.lib.jsonio import atomic_write_json  # noqa: E402
+from tools.lib.timeutil import year_window  # noqa: E402
+
 YEAR = 2026
+YEAR_LO, YEAR_HI = year_window(YEAR)
 DATA_DIR = Path("data")
 DATE_FIELDS = ["kickoff", "start", "datetime", "dateTime", "date", "utc", "time", "DateUtc"]
 
@@ -20,7 +29,7 @@ def _read_json(path: Path) -> Optional[Dict[str, Any]]:
 
 
 def _write_json(path: Path, obj: Dict[str, Any]) -> None:
-    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    atomic_write_json(path, obj, indent=2)
 
 
 def _parse_year(value: Any) -> Optional[int]:
@@ -83,6 +92,12 @@ def _filter_list(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     for it in items:
         if not isinstance(it, dict):
             continue
+        # normaliserte items har start_ts (epoch): ren heltallssammenligning, ingen parsing
+        ts = it.get("start_ts")
+        if isinstance(ts, int) and not isinstance(ts, bool):
+            if YEAR_LO <= ts < YEAR_HI:
+                out.append(it)
+            continue
         y = _get_item_year(it)
         if y == YEAR:
             out.append(it)
@@ -0,0 +1,187 @@
+# tools/lib/archive.py
+from __future__ import annotations
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+from typing import BinaryIO
+from tools.lib.jsonio import atomic_write_json
+
+ROOT = Path(__file__).resolve().parents[2]
+ARCHIVE_DIR = ROOT / "data" / "_meta" / "archive"
+KEEP_RUNS = 14
+CHUNK = 64 * 1024
+SPOOL_BYTES = 8 * 1024 * 1024
+
+
+class ArchiveMiss(LookupError):
+    pass
+
+
+class RawArchive:
+    """
+    Komprimert, content-addressed arkiv av rå HTTP-payloads:
+      blobs/<sha[:2]>/<sha256>.gz
+      runs/<prog>/<run_id>.json  -> {entries: {source_id: {url, sha256, size}}}
+    Én entry per kilde og kjøring. --reparse spiller av en kjøring uten nettverk.
+    """
+
+    def __init__(self, root: Path = ARCHIVE_DIR):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self.prog: str | None = None
+        self.run_id: str | None = None
+        self.mode: str | None = None  # "record" | "replay" | None
+        self.manifest: dict = {}
+
+    # -----------------------------
+    # paths
+    # -----------------------------
+    def blob_path(self, sha: str) -> Path:
+        return self.root / "blobs" / sha[:2] / f"{sha}.gz"
+
+    def runs_dir(self, prog: str) -> Path:
+        return self.root / "runs" / prog
+
+    def list_runs(self, prog: str) -> list[str]:
+        d = self.runs_dir(prog)
+        if not d.is_dir():
+            return []
+        return sorted(p.stem for p in d.glob("*.json"))
+
+    def _manifest_path(self) -> Path:
+        return self.runs_dir(self.prog or "default") / f"{self.run_id}.json"
+
+    def _save_manifest(self) -> None:
+        atomic_write_json(self._manifest_path(), self.manifest, indent=1, sort_keys=True)
+
+    # -----------------------------
+    # modes
+    # -----------------------------
+    def start_recording(self, prog: str) -> None:
+        self.prog = prog
+        self.run_id = datetime.now().strftime("%Y%m%dT%H%M%S")
+        self.mode = "record"
+        self.manifest = {"prog": prog, "run_id": self.run_id, "entries": {}}
+        self.prune(prog)
+
+    def start_replay(self, prog: str, run_id: str = "latest") -> None:
+        runs = self.list_runs(prog)
+        if run_id == "latest":
+            if not runs:
+                raise ArchiveMiss(f"No archived runs for '{prog}' in {self.runs_dir(prog)}")
+            run_id = runs[-1]
+        path = self.runs_dir(prog) / f"{run_id}.json"
+        if not path.exists():
+            raise ArchiveMiss(f"Archived run not found: {path}")
+        self.prog = prog
+        self.run_id = run_id
+        self.mode = "replay"
+        self.manifest = json.loads(path.read_text(encoding="utf-8"))
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    # -----------------------------
+    # record / replay
+    # -----------------------------
+    def record(self, source_id: str, url: str, body: bytes) -> None:
+        self.record_file(source_id, url, BytesIO(body))
+
+    def record_file(self, source_id: str, url: str, fh: BinaryIO) -> None:
+        """Arkiverer fra en filhandle i biter (leser fra nåværende posisjon)."""
+        if self.mode != "record":
+            return
+        blobs = self.root / "blobs"
+        blobs.mkdir(parents=True, exist_ok=True)
+        h = hashlib.sha256()
+        size = 0
+        tmp = blobs / f".{threading.get_ident()}.{time.monotonic_ns()}.tmp"
+        with gzip.open(tmp, "wb", compresslevel=6) as out:
+            for chunk in iter(lambda: fh.read(CHUNK), b""):
+                h.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        sha = h.hexdigest()
+        path = self.blob_path(sha)
+        with self._lock:
+            if path.exists():
+                tmp.unlink(missing_ok=True)
+            else:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp, path)
+            self.manifest["entries"][source_id] = {"url": url, "sha256": sha, "size": size}
+            self._save_manifest()
+
+    def _entry(self, source_id: str) -> dict:
+        entry = (self.manifest.get("entries") or {}).get(source_id)
+        if not entry:
+            raise ArchiveMiss(f"Not in archived run {self.prog}/{self.run_id}: {source_id}")
+        return entry
+
+    def replay(self, source_id: str) -> bytes:
+        with gzip.open(self.blob_path(self._entry(source_id)["sha256"]), "rb") as f:
+            return f.read()
+
+    def replay_file(self, source_id: str) -> BinaryIO:
+        """Pakker ut til en spooled temp-fil (seekbar), uten å holde store payloads i minnet."""
+        out = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+        with gzip.open(self.blob_path(self._entry(source_id)["sha256"]), "rb") as f:
+            shutil.copyfileobj(f, out, CHUNK)
+        out.seek(0)
+        return out
+
+    # -----------------------------
+    # retention
+    # -----------------------------
+    def prune(self, prog: str, keep: int = KEEP_RUNS) -> None:
+        runs = self.list_runs(prog)
+        for run_id in runs[:-keep] if keep > 0 else runs:
+            (self.runs_dir(prog) / f"{run_id}.json").unlink(missing_ok=True)
+
+        live: set[str] = set()
+        for mf in (self.root / "runs").glob("*/*.json"):
+            try:
+                for e in json.loads(mf.read_text(encoding="utf-8")).get("entries", {}).values():
+                    live.add(e["sha256"])
+            except Exception:
+                continue
+        for blob in (self.root / "blobs").glob("*/*.gz"):
+            if blob.name[:-3] not in live:
+                blob.unlink(missing_ok=True)
+
+
+_archive = RawArchive()
+
+
+def archive() -> RawArchive:
+    return _archive
+
+
+def setup_from_argv(prog: str, argv: list[str] | None = None) -> argparse.Namespace:
+    """
+    Felles CLI for update-skriptene:
+      --reparse [RUN_ID]   kjør normalize/write fra arkivet (siste kjøring om RUN_ID mangler), uten nettverk
+      --no-archive         ikke lagre rå payloads for denne kjøringen
+    """
+    parser = argparse.ArgumentParser(prog=prog)
+    parser.add_argument("--reparse", nargs="?", const="latest", default=None, metavar="RUN_ID")
+    parser.add_argument("--no-archive", action="store_true")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    if args.reparse:
+        _archive.start_replay(prog, args.reparse)
+        print(f"[archive] reparse from {prog}/{_archive.run_id} (no network)")
+    elif not args.no_archive:
+        _archive.start_recording(prog)
+    return args
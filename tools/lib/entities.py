@@ -0,0 +1,131 @@
+# tools/lib/entities.py
+from __future__ import annotations
+import json
+import re
+import sys
+import threading
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parents[2]
+ENTITIES_FILE = ROOT / "data" / "_meta" / "entities.json"
+KINDS = ("teams", "leagues", "pubs")
+
+_FOLD = str.maketrans({"ø": "o", "æ": "ae", "å": "a", "ß": "ss", "đ": "d", "ł": "l", "ı": "i"})
+_NON_ALNUM_RE = re.compile(r"[^0-9a-z]+")
+# NFF-lagnavn har troppen i navnet: "Brann Menn Senior A", "Sarpsborg 08 MEN 01", "Raufoss Menn A".
+# Herre-troppen er klubbens lag og strippes; dame-troppen beholder kjønnet som ett ord (WOMEN_TOKEN),
+# så "Brann Kvinner Senior A" ikke slås opp som herrelaget brann
+_SQUAD_RE = re.compile(
+    r"\s+(?:(menn|men|herrer)|kvinner|damer|women)(?:\s+senior)?(?:\s+(?:a|b|1|01))?\s*$", re.IGNORECASE
+)
+WOMEN_TOKEN = "kvinner"
+# klubbforkortelser som noen kilder tar med og andre dropper ("SK Brann" / "Brann")
+_NOISE = frozenset({
+    "fc", "afc", "cf", "sc", "sk", "fk", "bk", "il", "ik", "if", "ff", "tf", "ac", "as",
+    "cd", "ud", "rc", "ssc", "club", "de", "the",
+})
+
+
+def _demojibake(s: str) -> str:
+    # UTF-8 lest som latin-1 ("BodÃ¸") -> "Bodø"
+    if "Ã" in s or "Â" in s:
+        try:
+            return s.encode("latin-1").decode("utf-8")
+        except UnicodeError:
+            pass
+    return s
+
+
+@lru_cache(maxsize=16384)
+def name_key(name: str) -> str:
+    """Navn -> oppslagsnøkkel: casefold, uten diakritikk/tegnsetting/herre-tropp/klubbforkortelser."""
+    s = _SQUAD_RE.sub(lambda m: "" if m.group(1) else f" {WOMEN_TOKEN}", _demojibake((name or "").strip()))
+    s = unicodedata.normalize("NFKD", s.casefold().translate(_FOLD))
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    words = _NON_ALNUM_RE.sub(" ", s).split()
+    tokens = [w for w in words if w not in _NOISE]
+    return " ".join(tokens or words)
+
+
+class EntityTable:
+    """
+    Kanoniske lag/ligaer/puber fra data/_meta/entities.json:
+      {kind: {id: {name, aliases: [...]}}}
+    Oppslaget name_key(alias) -> (id, navn) bygges én gang per kjøring; id og navn er sys.intern-et,
+    så samme lag deler ett str-objekt i alle items (og sammenlignes på identitet i dict-oppslag).
+    """
+
+    def __init__(self, data: dict[str, Any] | None = None):
+        self._lookup: dict[str, dict[str, tuple[str, str]]] = {}
+        self._memo: dict[tuple[str, str], tuple[str | None, str]] = {}
+        for kind in KINDS:
+            table: dict[str, tuple[str, str]] = {}
+            for eid, ent in ((data or {}).get(kind) or {}).items():
+                if not isinstance(ent, dict):
+                    continue
+                hit = (sys.intern(eid), sys.intern(ent.get("name") or eid))
+                for alias in (hit[1], eid, *(ent.get("aliases") or [])):
+                    k = name_key(alias)
+                    have = table.setdefault(k, hit) if k else hit
+                    if have is not hit and have[0] != hit[0]:
+                        print(f"[entities] WARN {kind}: {alias!r} er alias for både {have[0]} og {hit[0]}")
+            self._lookup[kind] = table
+
+    @classmethod
+    def load(cls, path: Path = ENTITIES_FILE) -> "EntityTable":
+        try:
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            data = {}
+        return cls(data if isinstance(data, dict) else {})
+
+    def resolve(self, kind: str, name: str | None) -> tuple[str | None, str]:
+        """(id, kanonisk navn); ukjent navn -> (None, navnet strippet og interned)."""
+        s = (name or "").strip()
+        memo_key = (kind, s)
+        hit = self._memo.get(memo_key)
+        if hit is None:
+            found = self._lookup.get(kind, {}).get(name_key(s))
+            hit = self._memo[memo_key] = found if found else (None, sys.intern(_demojibake(s)))
+        return hit
+
+    def team(self, name: str | None) -> tuple[str | None, str]:
+        return self.resolve("teams", name)
+
+    def league(self, name: str | None) -> tuple[str | None, str]:
+        return self.resolve("leagues", name)
+
+    def pub(self, name: str | None) -> tuple[str | None, str]:
+        return self.resolve("pubs", name)
+
+    def key(self, kind: str, name: str | None) -> str:
+        """Sammenligningsnøkkel: entity-id når navnet er kjent, ellers name_key."""
+        eid, _name = self.resolve(kind, name)
+        return eid or name_key(name or "")
+
+    def team_fields(self, home: str | None, away: str | None) -> dict[str, str]:
+        """{home, away} med kanoniske navn, pluss home_id/away_id for lag som finnes i tabellen."""
+        hid, hname = self.team(home)
+        aid, aname = self.team(away)
+        out = {"home": hname, "away": aname}
+        if hid:
+            out["home_id"] = hid
+        if aid:
+            out["away_id"] = aid
+        return out
+
+
+_table: EntityTable | None = None
+_table_lock = threading.Lock()
+
+
+def entities() -> EntityTable:
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                _table = EntityTable.load()
+    return _table
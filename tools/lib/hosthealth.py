@@ -0,0 +1,167 @@
+# tools/lib/hosthealth.py
+from __future__ import annotations
+import json
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+from tools.lib.jsonio import atomic_write_json
+from tools.lib.pool import time_left
+
+ROOT = Path(__file__).resolve().parents[2]
+STATE_PATH = ROOT / "data" / "_meta" / "host_health.json"
+
+# så mange feilede kall på rad før kretsen åpnes
+FAILURE_THRESHOLD = 3
+# første åpning varer OPEN_SECONDS, dobles for hver ny åpning (maks MAX_OPEN_SECONDS)
+OPEN_SECONDS = 6 * 3600
+MAX_OPEN_SECONDS = 3 * 24 * 3600
+# en probe som aldri rapporterer (krasj utenfor http-laget) frigis etter så lang tid
+PROBE_TIMEOUT = 300
+# URL-spesifikke svar som ikke sier noe om hostens helse
+IGNORED_STATUSES = {404, 410}
+
+
+class HostUnavailable(RuntimeError):
+    pass
+
+
+def host_of(url: str) -> str:
+    return (urlsplit(url or "").hostname or "").lower()
+
+
+class HostHealth:
+    """
+    Circuit breaker per host, lagret mellom kjøringer i data/_meta/host_health.json:
+      {host: {failures, opens, open_until, last_status, last_error, skips, updated_at}}
+    Åpen krets -> kall avvises umiddelbart (HostUnavailable) til open_until.
+    Etter open_until slippes ett kall gjennom (half-open probe); de andre venter på probens utfall
+    (maks PROBE_TIMEOUT, og aldri forbi run_tasks-budsjettet) og går videre om den lykkes.
+    Suksess lukker kretsen; feil åpner den straks igjen med neste backoff-steg.
+    """
+
+    def __init__(self, path: Path = STATE_PATH):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._state: dict[str, dict] | None = None
+        self.run_skips: dict[str, int] = {}
+        # host -> tidspunkt proben ble sluppet gjennom (half-open); bare i minnet for denne kjøringen
+        self._probes: dict[str, float] = {}
+        # varsles når en probe rapporterer (suksess, feil eller release)
+        self._probe_done = threading.Condition(self._lock)
+
+    def _load(self) -> dict[str, dict]:
+        if self._state is None:
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                self._state = data if isinstance(data, dict) else {}
+            except Exception:
+                self._state = {}
+        return self._state
+
+    def _save(self) -> None:
+        atomic_write_json(self.path, self._load(), indent=1, sort_keys=True)
+
+    def _skip(self, host: str, st: dict, reason: str, url: str) -> HostUnavailable:
+        st["skips"] = int(st.get("skips") or 0) + 1
+        self.run_skips[host] = self.run_skips.get(host, 0) + 1
+        self._save()
+        return HostUnavailable(f"{reason} (last: {st.get('last_status') or st.get('last_error')}): {url}")
+
+    def check(self, url: str) -> None:
+        host = host_of(url)
+        with self._lock:
+            while True:
+                now = time.time()
+                st = self._load().get(host)
+                if not st:
+                    return
+                open_until = float(st.get("open_until") or 0)
+                if not open_until:
+                    return
+                if open_until > now:
+                    until = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(open_until))
+                    raise self._skip(host, st, f"circuit open for {host} until {until}", url)
+                # half-open: første kall blir proben; resten venter på utfallet og sjekker på nytt
+                claimed = self._probes.get(host)
+                if claimed is None or now - claimed >= PROBE_TIMEOUT:
+                    self._probes[host] = now
+                    return
+                left = time_left()
+                if left is not None and left <= 0:
+                    raise self._skip(host, st, f"circuit half-open for {host}, probe in flight", url)
+                wait = claimed + PROBE_TIMEOUT - now
+                self._probe_done.wait(wait if left is None else min(wait, left))
+
+    def _probe_reported(self, host: str) -> None:
+        if self._probes.pop(host, None) is not None:
+            self._probe_done.notify_all()
+
+    def release(self, url: str) -> None:
+        """Proben endte uten å si noe om hosten (f.eks. avvist innhold): neste kall blir ny probe."""
+        with self._lock:
+            self._probe_reported(host_of(url))
+
+    def record_success(self, url: str) -> None:
+        host = host_of(url)
+        with self._lock:
+            st = self._load().get(host)
+            if st and (st.get("failures") or st.get("open_until")):
+                st.update({"failures": 0, "opens": 0, "open_until": 0, "updated_at": time.time()})
+                self._save()
+            self._probe_reported(host)
+
+    def record_failure(self, url: str, *, status: int | None, error: str, retry_after: float | None = None) -> None:
+        host = host_of(url)
+        now = time.time()
+        with self._lock:
+            if status in IGNORED_STATUSES:
+                self._probe_reported(host)
+                return
+            st = self._load().setdefault(host, {"failures": 0, "opens": 0, "open_until": 0, "skips": 0})
+            st["failures"] = int(st.get("failures") or 0) + 1
+            st["last_status"] = status
+            st["last_error"] = error[:300]
+            st["updated_at"] = now
+
+            # feilet half-open probe (open_until satt og utløpt) -> åpne straks, uten ny terskel
+            half_open = 0 < float(st.get("open_until") or 0) <= now
+            open_for = 0.0
+            if half_open or st["failures"] >= FAILURE_THRESHOLD:
+                st["opens"] = int(st.get("opens") or 0) + 1
+                open_for = min(MAX_OPEN_SECONDS, OPEN_SECONDS * 2 ** (st["opens"] - 1))
+                st["failures"] = 0
+            if retry_after:
+                open_for = max(open_for, retry_after)
+            if open_for:
+                st["open_until"] = now + open_for
+            self._save()
+            self._probe_reported(host)
+
+    def snapshot(self) -> dict[str, dict]:
+        now = time.time()
+        with self._lock:
+            out = {}
+            for host, st in sorted(self._load().items()):
+                open_until = float(st.get("open_until") or 0)
+                out[host] = {
+                    "state": "open" if open_until > now else ("half_open" if open_until else "closed"),
+                    "open_until": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(open_until)) if open_until else None,
+                    "failures": st.get("failures") or 0,
+                    "opens": st.get("opens") or 0,
+                    "last_status": st.get("last_status"),
+                    "last_error": st.get("last_error"),
+                    "skips_total": st.get("skips") or 0,
+                    "skips_this_run": self.run_skips.get(host, 0),
+                }
+            return out
+
+
+_health: HostHealth | None = None
+
+
+def health() -> HostHealth:
+    global _health
+    if _health is None:
+        _health = HostHealth()
+    return _health
@@ -1,22 +1,387 @@
 # tools/lib/http.py
 from __future__ import annotations
+import io
+import json
+import random
+import tempfile
+import threading
 import time
+from email.utils import parsedate_to_datetime
+from typing import Any, BinaryIO, Callable
 import requests
+from requests.adapters import HTTPAdapter
+from tools.lib.archive import archive
+from tools.lib.hosthealth import health
+from tools.lib.httpcache import ResponseCache
+from tools.lib.pool import cap_timeout, time_left
 
 DEFAULT_TIMEOUT = 30
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 1.7
+# statuser som er verdt et nytt forsøk; andre 4xx (f.eks. 403) gir opp med én gang
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+# Retry-After lenger enn dette venter vi ikke på i samme kjøring (kretsen holdes åpen i stedet)
+MAX_RETRY_AFTER = 60.0
+USER_AGENT = "Grenland-Live/1.0 (+https://grenland-live.no)"
 
-def get_bytes(url: str, timeout: int = DEFAULT_TIMEOUT, retries: int = 3, backoff: float = 1.7) -> bytes:
-    last_err = None
-    for i in range(retries):
+# keep-alive pool per host (urllib3 PoolManager i HTTPAdapter)
+POOL_HOSTS = 16
+POOL_PER_HOST = 8
+
+# streaming-nedlasting: spool i minnet opp til SPOOL_BYTES, deretter temp-fil på disk
+CHUNK = 64 * 1024
+SPOOL_BYTES = 8 * 1024 * 1024
+DEFAULT_MAX_DOWNLOAD = 64 * 1024 * 1024
+
+# forventede magic bytes (sjekkes i de første SNIFF_BYTES) per innholdstype
+SNIFF_BYTES = 1024
+MAGIC = {
+    "pdf": b"%PDF-",
+    "ics": b"BEGIN:VCALENDAR",
+}
+# Content-Type som avvises før body leses (f.eks. HTML-feilside i stedet for PDF)
+REJECT_CTYPES = {
+    "pdf": ("text/html",),
+}
+
+
+class DownloadRejected(RuntimeError):
+    """Responsen ble avvist (feil Content-Type/magic bytes eller for stor). Prøves ikke på nytt."""
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+_cache: ResponseCache | None = None
+_hooks: list[Callable[[dict], None]] = []
+
+def session() -> requests.Session:
+    """Én delt Session for hele kjøringen, slik at gjentatte kall til samme host gjenbruker varme forbindelser."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_PER_HOST)
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                s.headers.update({"User-Agent": USER_AGENT, "Accept": "*/*"})
+                _session = s
+    return _session
+
+def cache() -> ResponseCache:
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache()
+    return _cache
+
+def cache_stats() -> dict[str, int]:
+    return dict(cache().stats)
+
+def add_hook(fn: Callable[[dict], None]) -> None:
+    """
+    Instrumentering: fn(event) kalles etter hvert GET med
+    {url, status, elapsed, headers_s, transfer_s, bytes, cache}
+      headers_s:  DNS + connect + TLS + ventetid til headers (requests' Response.elapsed)
+      transfer_s: resten, dvs. lesing av body
+      cache:      "hit" | "revalidated" | "miss" | None
+    """
+    _hooks.append(fn)
+
+def _emit(url: str, *, r: requests.Response | None, t0: float | None, nbytes: int, cache: str | None) -> None:
+    if not _hooks:
+        return
+    elapsed = (time.perf_counter() - t0) if t0 is not None else 0.0
+    headers_s = min(elapsed, r.elapsed.total_seconds()) if r is not None else 0.0
+    event = {
+        "url": url,
+        "status": r.status_code if r is not None else None,
+        "elapsed": elapsed,
+        "headers_s": headers_s,
+        "transfer_s": elapsed - headers_s,
+        "bytes": nbytes,
+        "cache": cache,
+    }
+    for fn in list(_hooks):
         try:
-            r = requests.get(url, timeout=timeout)
-            r.raise_for_status()
-            return r.content
+            fn(event)
+        except Exception:
+            pass
+
+def _retry_after(r: requests.Response | None) -> float | None:
+    v = (r.headers.get("Retry-After") or "").strip() if r is not None else ""
+    if not v:
+        return None
+    if v.isdigit():
+        return float(v)
+    try:
+        return max(0.0, parsedate_to_datetime(v).timestamp() - time.time())
+    except Exception:
+        return None
+
+def _retry_delay(attempt: int, backoff: float, retry_after: float | None) -> float | None:
+    """Ventetid før neste forsøk: Retry-After om satt (None = for lang), ellers backoff med jitter."""
+    if retry_after is not None:
+        return retry_after if retry_after <= MAX_RETRY_AFTER else None
+    return (backoff ** attempt) * random.uniform(0.5, 1.5)
+
+def _failed(url: str, attempts: int, status: int | None, err: BaseException | None, retry_after: float | None):
+    health().record_failure(url, status=status, error=str(err), retry_after=retry_after)
+    return RuntimeError(f"HTTP GET failed after {attempts} attempts: {url} -> {err}")
+
+def build_url(url: str, params: dict | None = None) -> str:
+    if not params:
+        return url
+    return requests.Request("GET", url, params=params).prepare().url
+
+def get_bytes(
+    url: str,
+    timeout: int = DEFAULT_TIMEOUT,
+    retries: int = DEFAULT_RETRIES,
+    backoff: float = DEFAULT_BACKOFF,
+    *,
+    params: dict | None = None,
+    headers: dict | None = None,
+    max_age: float | None = None,
+    use_cache: bool = True,
+    source_id: str | None = None,
+) -> bytes:
+    """
+    GET med persistent cache:
+      - max_age (sek): ferskt cache-treff returneres uten nettverk
+      - ellers sendes If-None-Match / If-Modified-Since, og 304 gir cachet body
+    Rå payload arkiveres under source_id (default: URL); i --reparse-modus leses den derfra.
+    """
+    url = build_url(url, params)
+    a = archive()
+    sid = source_id or url
+    if a.replaying:
+        return a.replay(sid)
+
+    body = _request(url, timeout, retries, backoff, headers, max_age, use_cache, _BytesSink())
+    a.record(sid, url, body)
+    return body
+
+def _check_head(url: str, head: bytes, expect: str | None) -> None:
+    magic = MAGIC.get(expect or "")
+    if magic and magic not in head[:SNIFF_BYTES]:
+        raise DownloadRejected(f"{url}: expected {expect}, got {head[:40]!r}")
+
+def _check_headers(url: str, r: requests.Response, expect: str | None, max_bytes: int) -> None:
+    ctype = (r.headers.get("Content-Type") or "").lower()
+    if ctype.startswith(REJECT_CTYPES.get(expect or "", ())):
+        raise DownloadRejected(f"{url}: expected {expect}, got Content-Type {ctype}")
+    length = r.headers.get("Content-Length")
+    if length and length.isdigit() and int(length) > max_bytes:
+        raise DownloadRejected(f"{url}: Content-Length {length} exceeds limit {max_bytes}")
+
+# -----------------------------
+# body-sinks for _request: hvordan body leses, caches og hentes fra cache
+# -----------------------------
+class _BytesSink:
+    """Hele body som bytes (get_bytes)."""
+
+    stream = False
+
+    def cached(self, c: ResponseCache, entry: dict) -> tuple[bytes, int] | None:
+        body = c.read(entry)
+        return None if body is None else (body, len(body))
+
+    def read(self, url: str, r: requests.Response) -> tuple[bytes, int]:
+        body = r.content
+        return body, len(body)
+
+    def store(self, c: ResponseCache, url: str, body: bytes, r: requests.Response) -> None:
+        c.store(url, body, etag=r.headers.get("ETag"), last_modified=r.headers.get("Last-Modified"))
+
+    def discard(self, body: bytes) -> None:
+        pass
+
+class _FileSink:
+    """
+    Body streamet til en SpooledTemporaryFile (download): avvises tidlig ved feil Content-Type,
+    feil magic bytes eller > max_bytes, og stopper når run_tasks-budsjettet er brukt opp.
+    """
+
+    stream = True
+
+    def __init__(self, max_bytes: int, expect: str | None):
+        self.max_bytes = max_bytes
+        self.expect = expect
+
+    def cached(self, c: ResponseCache, entry: dict) -> tuple[BinaryIO, int] | None:
+        fh = c.open(entry)
+        return None if fh is None else (fh, int(entry.get("size") or 0))
+
+    def read(self, url: str, r: requests.Response) -> tuple[BinaryIO, int]:
+        _check_headers(url, r, self.expect, self.max_bytes)
+        out = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+        try:
+            size = 0
+            head = b""
+            for chunk in r.iter_content(CHUNK):
+                if not chunk:
+                    continue
+                if len(head) < SNIFF_BYTES:
+                    head += chunk[:SNIFF_BYTES]
+                    if len(head) >= SNIFF_BYTES:
+                        _check_head(url, head, self.expect)
+                size += len(chunk)
+                left = time_left()
+                if left is not None and left <= 0:
+                    raise TimeoutError(f"deadline exceeded while downloading: {url}")
+                if size > self.max_bytes:
+                    raise DownloadRejected(f"{url}: body exceeds limit {self.max_bytes}")
+                out.write(chunk)
+            if len(head) < SNIFF_BYTES:
+                _check_head(url, head, self.expect)
+        except BaseException:
+            out.close()
+            raise
+        out.seek(0)
+        return out, size
+
+    def store(self, c: ResponseCache, url: str, body: BinaryIO, r: requests.Response) -> None:
+        c.store_file(url, body, etag=r.headers.get("ETag"), last_modified=r.headers.get("Last-Modified"))
+        body.seek(0)
+
+    def discard(self, body: BinaryIO) -> None:
+        body.close()
+
+def _request(
+    url: str,
+    timeout: int,
+    retries: int,
+    backoff: float,
+    headers: dict | None,
+    max_age: float | None,
+    use_cache: bool,
+    sink: _BytesSink | _FileSink,
+) -> Any:
+    """
+    Felles GET-kjerne for get_bytes og download: ferskt cache-treff, host-helse, retry med
+    backoff/Retry-After, conditional GET (304 -> cachet body), cache-lagring og hooks.
+    sink bestemmer hvordan body leses og caches (bytes eller filhandle).
+    """
+    c = cache() if use_cache else None
+    entry = c.lookup(url) if c else None
+    if c and entry and c.is_fresh(entry, max_age):
+        hit = sink.cached(c, entry)
+        if hit is not None:
+            c.hit(url, revalidated=False)
+            _emit(url, r=None, t0=None, nbytes=hit[1], cache="hit")
+            return hit[0]
+
+    # kjent død host: avvis uten å bruke tid på nettverk/backoff
+    health().check(url)
+
+    last_err: BaseException | None = None
+    last_status: int | None = None
+    retry_after: float | None = None
+    attempts = 0
+    # 304 uten cachet body er en lokal cache-miss: hent straks på nytt uten conditional headers,
+    # uten å bruke et forsøk og uten å telle det som feil på hosten
+    refetch = False
+    while attempts < retries or refetch:
+        if attempts and not refetch:
+            delay = _retry_delay(attempts - 1, backoff, retry_after)
+            left = time_left()
+            if delay is None or (left is not None and delay >= left):
+                break
+            time.sleep(delay)
+        if not refetch:
+            attempts += 1
+        refetch = False
+        retry_after = None
+        body = None
+        try:
+            h = dict(headers or {})
+            if c:
+                h.update(c.conditional_headers(entry))
+            t0 = time.perf_counter()
+            with session().get(url, timeout=cap_timeout(timeout, url), headers=h, stream=sink.stream) as r:
+                if r.status_code == 304 and c and entry:
+                    hit = sink.cached(c, entry)
+                    if hit is not None:
+                        c.hit(url, revalidated=True)
+                        _emit(url, r=r, t0=t0, nbytes=hit[1], cache="revalidated")
+                        health().record_success(url)
+                        return hit[0]
+                    # body forsvant fra disk -> hent på nytt uten conditional headers
+                    c.forget(url)
+                    entry = None
+                    refetch = True
+                    continue
+                r.raise_for_status()
+                body, size = sink.read(url, r)
+
+            _emit(url, r=r, t0=t0, nbytes=size, cache="miss" if c else None)
+            if c:
+                sink.store(c, url, body, r)
+            health().record_success(url)
+            return body
+        except DownloadRejected:
+            health().release(url)
+            raise
+        except requests.HTTPError as e:
+            last_err, last_status = e, (e.response.status_code if e.response is not None else None)
+            retry_after = _retry_after(e.response)
+            if last_status not in RETRYABLE_STATUSES:
+                break
         except Exception as e:
-            last_err = e
-            time.sleep(backoff ** i)
-    raise RuntimeError(f"HTTP GET failed after {retries} retries: {url} -> {last_err}")
+            if body is not None:
+                sink.discard(body)
+            last_err, last_status = e, None
+    raise _failed(url, attempts, last_status, last_err, retry_after)
+
+def download(
+    url: str,
+    timeout: int = DEFAULT_TIMEOUT,
+    retries: int = DEFAULT_RETRIES,
+    backoff: float = DEFAULT_BACKOFF,
+    *,
+    params: dict | None = None,
+    headers: dict | None = None,
+    max_age: float | None = None,
+    use_cache: bool = True,
+    source_id: str | None = None,
+    max_bytes: int = DEFAULT_MAX_DOWNLOAD,
+    expect: str | None = None,
+) -> BinaryIO:
+    """
+    Streaming GET til en seekbar filhandle (spooled temp-fil, eller cachet body på disk),
+    slik at store PDF-er/kalendere aldri må ligge i minnet som én bytes-blokk.
+    Avbryter tidlig ved feil Content-Type, feil magic bytes (expect="pdf"/"ics") eller > max_bytes.
+    Kalleren eier handelen og bør lukke den (with download(...) as fh: ...).
+    """
+    url = build_url(url, params)
+    a = archive()
+    sid = source_id or url
+    if a.replaying:
+        return a.replay_file(sid)
+
+    fh = _request(url, timeout, retries, backoff, headers, max_age, use_cache, _FileSink(max_bytes, expect))
+    a.record_file(sid, url, fh)
+    fh.seek(0)
+    return fh
 
-def get_text(url: str, timeout: int = DEFAULT_TIMEOUT, retries: int = 3, backoff: float = 1.7) -> str:
-    b = get_bytes(url, timeout=timeout, retries=retries, backoff=backoff)
+def text_lines(fh: BinaryIO, encoding: str = "utf-8") -> io.TextIOWrapper:
+    """Linje-for-linje tekst over en (binær) filhandle fra download(), uten å dekode alt på én gang."""
+    return io.TextIOWrapper(fh, encoding=encoding, errors="replace", newline="")
+
+def get_text(
+    url: str,
+    timeout: int = DEFAULT_TIMEOUT,
+    retries: int = DEFAULT_RETRIES,
+    backoff: float = DEFAULT_BACKOFF,
+    **kwargs: Any,
+) -> str:
+    b = get_bytes(url, timeout=timeout, retries=retries, backoff=backoff, **kwargs)
     return b.decode("utf-8", errors="replace")
+
+def get_json(
+    url: str,
+    timeout: int = DEFAULT_TIMEOUT,
+    retries: int = DEFAULT_RETRIES,
+    backoff: float = DEFAULT_BACKOFF,
+    **kwargs: Any,
+) -> Any:
+    return json.loads(get_bytes(url, timeout=timeout, retries=retries, backoff=backoff, **kwargs))
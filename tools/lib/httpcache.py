@@ -0,0 +1,179 @@
+# tools/lib/httpcache.py
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO
+from tools.lib.jsonio import atomic_write_bytes, atomic_write_json
+
+ROOT = Path(__file__).resolve().parents[2]
+CACHE_DIR = ROOT / "data" / "_meta" / "http_cache"
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+CHUNK = 64 * 1024
+
+
+class ResponseCache:
+    """
+    Persistent HTTP-cache på disk:
+      index.json  -> url: {etag, last_modified, sha256, size, fetched_at, used_at}
+      bodies/<sha256>  (content-addressed, samme body deles mellom URLer)
+    Eviction: minst nylig brukte URLer fjernes til total størrelse <= max_bytes.
+    """
+
+    def __init__(self, root: Path = CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+        self.index_path = self.root / "index.json"
+        self.bodies = self.root / "bodies"
+        self._lock = threading.RLock()
+        self._index: dict[str, dict] | None = None
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0}
+
+    # -----------------------------
+    # index
+    # -----------------------------
+    def _load(self) -> dict[str, dict]:
+        if self._index is None:
+            try:
+                data = json.loads(self.index_path.read_text(encoding="utf-8"))
+                self._index = data if isinstance(data, dict) else {}
+            except Exception:
+                self._index = {}
+        return self._index
+
+    def _save(self) -> None:
+        atomic_write_json(self.index_path, self._load(), indent=1, sort_keys=True)
+
+    def body_path(self, sha: str) -> Path:
+        return self.bodies / sha
+
+    # -----------------------------
+    # lookup
+    # -----------------------------
+    def lookup(self, url: str) -> dict | None:
+        with self._lock:
+            entry = self._load().get(url)
+            if entry and self.body_path(entry.get("sha256", "")).is_file():
+                return dict(entry)
+            return None
+
+    @staticmethod
+    def is_fresh(entry: dict, max_age: float | None) -> bool:
+        if max_age is None or max_age <= 0:
+            return False
+        return (time.time() - float(entry.get("fetched_at") or 0)) < max_age
+
+    @staticmethod
+    def conditional_headers(entry: dict | None) -> dict[str, str]:
+        h: dict[str, str] = {}
+        if not entry:
+            return h
+        if entry.get("etag"):
+            h["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            h["If-Modified-Since"] = entry["last_modified"]
+        return h
+
+    def read(self, entry: dict) -> bytes | None:
+        try:
+            return self.body_path(entry["sha256"]).read_bytes()
+        except Exception:
+            return None
+
+    def open(self, entry: dict) -> BinaryIO | None:
+        try:
+            return open(self.body_path(entry["sha256"]), "rb")
+        except Exception:
+            return None
+
+    # -----------------------------
+    # update
+    # -----------------------------
+    def hit(self, url: str, *, revalidated: bool) -> None:
+        with self._lock:
+            self.stats["revalidated" if revalidated else "hits"] += 1
+            entry = self._load().get(url)
+            if entry:
+                entry["used_at"] = time.time()
+                if revalidated:
+                    entry["fetched_at"] = entry["used_at"]
+                self._save()
+
+    def store(self, url: str, body: bytes, *, etag: str | None, last_modified: str | None) -> dict:
+        sha = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            path = self.body_path(sha)
+            if not path.is_file():
+                atomic_write_bytes(path, body)
+            return self._put(url, sha, len(body), etag, last_modified)
+
+    def store_file(self, url: str, fh: BinaryIO, *, etag: str | None, last_modified: str | None) -> dict:
+        """Som store(), men kopierer body i biter fra en filhandle (leser fra nåværende posisjon)."""
+        self.bodies.mkdir(parents=True, exist_ok=True)
+        h = hashlib.sha256()
+        size = 0
+        tmp = self.bodies / f".{threading.get_ident()}.{time.monotonic_ns()}.tmp"
+        with open(tmp, "wb") as out:
+            for chunk in iter(lambda: fh.read(CHUNK), b""):
+                h.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        sha = h.hexdigest()
+        with self._lock:
+            path = self.body_path(sha)
+            if path.is_file():
+                tmp.unlink(missing_ok=True)
+            else:
+                os.replace(tmp, path)
+            return self._put(url, sha, size, etag, last_modified)
+
+    def _put(self, url: str, sha: str, size: int, etag: str | None, last_modified: str | None) -> dict:
+        with self._lock:
+            self.stats["misses"] += 1
+            now = time.time()
+            entry = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "sha256": sha,
+                "size": size,
+                "fetched_at": now,
+                "used_at": now,
+            }
+            self._load()[url] = entry
+            self._evict()
+            self._save()
+            return dict(entry)
+
+    def forget(self, url: str) -> None:
+        with self._lock:
+            if self._load().pop(url, None) is not None:
+                self._save()
+
+    def _evict(self) -> None:
+        index = self._load()
+        sizes: dict[str, int] = {}
+        for e in index.values():
+            sizes[e["sha256"]] = int(e.get("size") or 0)
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+
+        for url, e in sorted(index.items(), key=lambda kv: kv[1].get("used_at") or 0):
+            if total <= self.max_bytes:
+                break
+            del index[url]
+            sha = e["sha256"]
+            if any(x["sha256"] == sha for x in index.values()):
+                continue
+            total -= sizes.get(sha, 0)
+            try:
+                self.body_path(sha).unlink()
+            except FileNotFoundError:
+                pass
+
+    def report(self) -> str:
+        s = self.stats
+        return f"hits={s['hits']} revalidated={s['revalidated']} misses={s['misses']}"
@@ -0,0 +1,162 @@
+# tools/lib/ics.py
+from __future__ import annotations
+import re
+from datetime import datetime, timezone, tzinfo
+from functools import lru_cache
+from typing import Iterable, Iterator
+from zoneinfo import ZoneInfo
+
+# property-linje inne i en VEVENT-blokk: \nNAME;PARAM=x;PARAM="y:z":verdi
+_PARAMS = r'(;(?:"[^"]*"|[^":\r\n])*)?'
+_PARAM_RE = re.compile(r';([^=;:]+)=("[^"]*"|[^;:]*)')
+# nøstede komponenter (VALARM o.l.) kuttes ut av blokken før properties leses
+_NESTED_RE = re.compile(r"\nBEGIN:([^\r\n]+).*?\nEND:\1[^\n]*", re.S)
+
+
+@lru_cache(maxsize=32)
+def _prop_re(keys: tuple[str, ...] | None) -> re.Pattern:
+    names = "|".join(map(re.escape, keys)) if keys is not None else r"[A-Za-z0-9-]+"
+    return re.compile(rf"\n((?i:{names})){_PARAMS}:([^\r\n]*)")
+
+
+class VEvent:
+    """
+    Lett VEVENT-post: props[NAME] = verdi (strippet). Parametre (;TZID=... osv.) lagres rått
+    og tolkes først når noen spør (tzid()/param()). Siste forekomst av en property vinner.
+    """
+
+    __slots__ = ("props", "_params")
+
+    def __init__(self) -> None:
+        self.props: dict[str, str] = {}
+        self._params: dict[str, str] | None = None
+
+    def get(self, name: str, default: str | None = None) -> str | None:
+        return self.props.get(name, default)
+
+    def __getitem__(self, name: str) -> str:
+        return self.props[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.props
+
+    def params(self, name: str) -> dict[str, str]:
+        raw = self._params.get(name) if self._params else None
+        if not raw:
+            return {}
+        return {k.strip().upper(): v.strip('"') for k, v in _PARAM_RE.findall(raw)}
+
+    def param(self, name: str, key: str) -> str | None:
+        return self.params(name).get(key.upper())
+
+    def tzid(self, name: str = "DTSTART") -> str | None:
+        return self.param(name, "TZID")
+
+    def __repr__(self) -> str:
+        return f"VEvent({self.props!r})"
+
+
+def unfold(text: str) -> str:
+    """RFC 5545 3.1: linjeskift + ett mellomrom/tab betyr fortsettelse."""
+    if "\n " not in text and "\n\t" not in text:
+        return text
+    if "\r\n" in text:
+        return text.replace("\r\n ", "").replace("\r\n\t", "")
+    return text.replace("\n ", "").replace("\n\t", "")
+
+
+def _event(block: str, findall) -> VEvent:
+    if "\nBEGIN:" in block:
+        block = _NESTED_RE.sub("", block)
+    ev = VEvent()
+    props = ev.props
+    for name, params, value in findall(block):
+        name = name.upper()
+        props[name] = value.strip()
+        if params:
+            if ev._params is None:
+                ev._params = {}
+            ev._params[name] = params
+    return ev
+
+
+def _blocks_from_text(text: str) -> Iterator[str]:
+    # BEGIN:VEVENT ... END:VEVENT, funnet med str.find (ingen linjeliste over hele kalenderen)
+    text = unfold(text)
+    find = text.find
+    pos = 0
+    while True:
+        a = find("BEGIN:VEVENT", pos)
+        if a < 0:
+            return
+        b = find("\nEND:VEVENT", a)
+        if b < 0:
+            return
+        yield text[a + 12:b + 1]
+        pos = b + 11
+
+
+def _blocks_from_lines(lines: Iterable[str]) -> Iterator[str]:
+    # linje-strøm (f.eks. text_lines(fh)): samler én VEVENT om gangen
+    buf: list[str] | None = None
+    for ln in lines:
+        if buf is None:
+            if ln.startswith("BEGIN:VEVENT"):
+                buf = ["\n"]
+            continue
+        if ln.startswith("END:VEVENT"):
+            yield unfold("".join(buf))
+            buf = None
+            continue
+        buf.append(ln if ln.endswith("\n") else ln + "\n")
+
+
+def iter_events(src: str | Iterable[str], keys: Iterable[str] | None = None) -> Iterator[VEvent]:
+    """
+    Én passering over kalenderen; gir VEVENT-poster etter hvert som de blir komplette.
+    src er hele teksten eller en linje-strøm. keys begrenser til disse property-navnene
+    (regexen hopper da over alle andre linjer uten Python-arbeid per linje).
+    """
+    findall = _prop_re(tuple(sorted({k.upper() for k in keys})) if keys is not None else None).findall
+    blocks = _blocks_from_text(src) if isinstance(src, str) else _blocks_from_lines(src)
+    for block in blocks:
+        yield _event(block, findall)
+
+
+@lru_cache(maxsize=64)
+def _zone(tzid: str | None) -> tzinfo | None:
+    if not tzid:
+        return None
+    try:
+        return ZoneInfo(tzid.strip().strip('"'))
+    except Exception:
+        # f.eks. Windows-navn ("W. Europe Standard Time") -> faller tilbake til default_tz
+        return None
+
+
+def to_datetime(value: str | None, tzid: str | None = None, default_tz: tzinfo | None = None) -> datetime | None:
+    """
+    DATE / DATE-TIME -> datetime:
+      20260118T180000Z           -> UTC
+      20260118T180000 + TZID     -> i TZID-sonen
+      20260118T180000 / 20260118 -> default_tz (naiv hvis None)
+    Ugyldig verdi -> None.
+    """
+    v = (value or "").strip()
+    utc = v.endswith("Z")
+    if utc:
+        v = v[:-1]
+    d, _, t = v.partition("T")
+    try:
+        if len(d) != 8 or len(t) not in (0, 4, 6):
+            return None
+        dt = datetime(
+            int(d[:4]), int(d[4:6]), int(d[6:8]),
+            int(t[:2] or 0), int(t[2:4] or 0), int(t[4:6] or 0),
+        )
+    except ValueError:
+        return None
+    if utc:
+        return dt.replace(tzinfo=timezone.utc)
+    tz = _zone(tzid) or default_tz
+    return dt.replace(tzinfo=tz) if tz is not None else dt
@@ -0,0 +1,34 @@
+# tools/lib/jsonio.py
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+
+def atomic_write_bytes(path: str | Path, data: bytes) -> None:
+    """
+    Skriver til en unik temp-fil i samme mappe og bytter den inn med os.replace, så lesere
+    (og en kjøring som blir drept midt i) aldri ser en halvskrevet fil.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.parent / f".{path.name}.{os.getpid()}.{threading.get_ident()}.{time.monotonic_ns()}.tmp"
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def atomic_write_text(path: str | Path, text: str, encoding: str = "utf-8") -> None:
+    atomic_write_bytes(path, text.encode(encoding))
+
+
+def atomic_write_json(path: str | Path, obj: Any, **dumps_kw: Any) -> None:
+    """json.dumps(obj, **dumps_kw) skrevet atomisk; ensure_ascii=False med mindre annet er gitt."""
+    dumps_kw.setdefault("ensure_ascii", False)
+    atomic_write_text(path, json.dumps(obj, **dumps_kw))
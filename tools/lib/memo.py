@@ -0,0 +1,96 @@
+# tools/lib/memo.py
+from __future__ import annotations
+import threading
+from typing import Any, Callable, Hashable
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def request_key(url: str, params: dict | None = None, *extra: Hashable) -> tuple:
+    """
+    Normalisert nøkkel for en forespørsel: scheme/host med små bokstaver, default-port droppet,
+    query-parametre (fra URL + params) sortert, fragment fjernet. extra skiller f.eks. ulike parsere
+    av samme URL.
+    """
+    parts = urlsplit((url or "").strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    netloc = host if port is None or port == _DEFAULT_PORTS.get(scheme) else f"{host}:{port}"
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query += [(str(k), str(v)) for k, v in params.items() if v is not None]
+    return (urlunsplit((scheme, netloc, parts.path or "/", urlencode(sorted(query)), "")), *extra)
+
+
+class _Call:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    Memo for én kjøring: første kall for en nøkkel kjører fn; samtidige kall med samme nøkkel
+    venter på det samme kallet, og senere kall får det ferdige resultatet uten ny henting/parsing.
+    Feil deles med de som ventet, men caches ikke (neste kall prøver på nytt).
+    Resultatet er samme objekt for alle kallerne – kopier før det endres.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self.stats = {"calls": 0, "shared": 0, "failed": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            owner = call is None
+            if owner:
+                call = self._calls[key] = _Call()
+                self.stats["calls"] += 1
+            else:
+                self.stats["shared"] += 1
+
+        if not owner:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self._calls.pop(key, None)
+                self.stats["failed"] += 1
+            raise
+        finally:
+            call.done.set()
+        return call.value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._calls.clear()
+
+    def report(self) -> str:
+        s = self.stats
+        return f"calls={s['calls']} shared={s['shared']} failed={s['failed']}"
+
+
+_memo: SingleFlight | None = None
+_memo_lock = threading.Lock()
+
+
+def run_memo() -> SingleFlight:
+    global _memo
+    if _memo is None:
+        with _memo_lock:
+            if _memo is None:
+                _memo = SingleFlight()
+    return _memo
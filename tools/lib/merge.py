@@ -0,0 +1,147 @@
+# tools/lib/merge.py
+from __future__ import annotations
+import re
+from functools import lru_cache
+from typing import Any, Iterable
+
+from tools.lib.entities import WOMEN_TOKEN, entities, name_key
+
+# blokker: (sport, kickoff-time) -> klynger; bare naboblokker innenfor toleransen sammenlignes
+BUCKET_SECONDS = 3600
+# samme kamp fra ulike kilder kan avvike i kickoff (fast +01:00 om sommeren, avrunding)
+DEFAULT_TOLERANCE = 3600
+
+_TITLE_SPLIT_RE = re.compile(r"\s+[-–—]\s+|\s+vs\.?\s+", re.IGNORECASE)
+
+
+@lru_cache(maxsize=8192)
+def canon_team(name: str) -> tuple[str, str]:
+    """
+    Lagnavn -> sammenligningsform: (entity-id fra data/_meta/entities.json eller "", name_key av det
+    kanoniske navnet). Id-en avgjør bare når begge sider er kjente (same_team).
+    """
+    eid, canon = entities().team(name)
+    return (eid or "", name_key(canon))
+
+
+def _tokens_match(a: str, b: str) -> bool:
+    # "man city" ~ "manchester city": like mange ord, hvert ord prefiks av det andre (min. 3 tegn)
+    ta, tb = a.split(), b.split()
+    if len(ta) != len(tb):
+        # "bodo glimt" ~ "glimt": ordene i det korteste navnet finnes alle i det lengste
+        # (men ikke dame- mot herrelag: "brann kvinner" !~ "brann")
+        sa, sb = set(ta), set(tb)
+        return bool(sa and sb) and (sa <= sb or sb <= sa) and WOMEN_TOKEN not in sa ^ sb
+    for x, y in zip(ta, tb):
+        if x == y:
+            continue
+        short, long_ = (x, y) if len(x) <= len(y) else (y, x)
+        if len(short) < 3 or not long_.startswith(short):
+            return False
+    return True
+
+
+@lru_cache(maxsize=16384)
+def same_team(a: tuple[str, str], b: tuple[str, str]) -> bool:
+    """
+    a og b fra canon_team. To kjente lag er like bare med samme id ("sandnes" !~ "sandnes_ulf");
+    ellers sammenlignes navnenøklene ("Club Brugge" ~ "Club Brugge KV", "Real Sociedad" ~ "Sociedad").
+    """
+    if a[0] and b[0]:
+        return a[0] == b[0]
+    return a[1] == b[1] or _tokens_match(a[1], b[1])
+
+
+def sides(item: dict) -> tuple[tuple[str, str], ...]:
+    """
+    Kanoniske "sider" for matching: (hjemme, borte) når begge finnes, ellers fra tittelen
+    ("A – B" / "A - B" / "A vs B"), ellers (tittel,) for items uten lag (renn, arrangementer).
+    """
+    home, away = item.get("home"), item.get("away")
+    if home and away and home != "Ukjent" and away != "Ukjent":
+        return (canon_team(str(home)), canon_team(str(away)))
+    title = str(item.get("title") or "")
+    parts = _TITLE_SPLIT_RE.split(title, maxsplit=1)
+    if len(parts) == 2:
+        return (canon_team(parts[0]), canon_team(parts[1]))
+    return (canon_team(title),)
+
+
+def _empty(v: Any) -> bool:
+    return v is None or v == "" or v == "Ukjent" or (isinstance(v, (list, tuple, dict)) and not v)
+
+
+class _Cluster:
+    __slots__ = ("ts", "sides", "members")
+
+    def __init__(self, ts: int, sides_: tuple[tuple[str, str], ...]):
+        self.ts = ts
+        self.sides = sides_
+        self.members: list[tuple[str, dict]] = []
+
+    def matches(self, ts: int, sides_: tuple[tuple[str, str], ...], tolerance: int) -> bool:
+        if abs(ts - self.ts) > tolerance or len(sides_) != len(self.sides):
+            return False
+        return all(same_team(a, b) for a, b in zip(sides_, self.sides))
+
+
+def _combine(members: list[tuple[str, dict]], *, sources: bool = True) -> dict:
+    # feltene fra kilden med høyest prioritet; tomme felt ("", None, "Ukjent", []) fylles fra de neste.
+    # copy() (ikke dict(...)) så normalize.Item forblir Item til render_items()
+    # sources=False: samme kilde sett flere ganger (normalize.merge_genders), "sources" røres ikke
+    out = members[0][1].copy()
+    srcs: list[str] = []
+    for name, item in members:
+        if sources:
+            for s in item.get("sources") or [name]:
+                if s not in srcs:
+                    srcs.append(s)
+        for k, v in item.items():
+            if _empty(out.get(k)) and not _empty(v):
+                out[k] = v
+    if sources:
+        out["sources"] = srcs
+    return out
+
+
+def merge_sources(
+    sources: Iterable[tuple[str, Iterable[dict]]],
+    *,
+    sport: str | None = None,
+    tolerance: int = DEFAULT_TOLERANCE,
+) -> list[dict]:
+    """
+    (kildenavn, items) i prioritert rekkefølge (høyest først) -> ett item per faktisk kamp/renn.
+    Items blokkeres på (sport, kickoff-time); innenfor naboblokkene (± tolerance) matches
+    kanoniske lagnavn, så kostnaden er nær lineær i antall items. Feltverdier velges etter
+    kildeprioritet; "sources" lister kildene som bidro. Items uten start_ts slås ikke sammen.
+    Rekkefølgen er første forekomst; sorter etterpå ved behov.
+    """
+    span = max(0, int(tolerance)) // BUCKET_SECONDS + 1
+    blocks: dict[tuple[Any, int], list[_Cluster]] = {}
+    order: list[_Cluster | dict] = []
+
+    for name, items in sources:
+        for item in items:
+            ts = item.get("start_ts")
+            if ts is None:
+                order.append(item)
+                continue
+            sp = item.get("sport") or sport
+            sd = sides(item)
+            hour = ts // BUCKET_SECONDS
+            hit = None
+            for h in range(hour - span, hour + span + 1):
+                for cl in blocks.get((sp, h), ()):
+                    if cl.matches(ts, sd, tolerance):
+                        hit = cl
+                        break
+                if hit is not None:
+                    break
+            if hit is None:
+                hit = _Cluster(ts, sd)
+                blocks.setdefault((sp, hour), []).append(hit)
+                order.append(hit)
+            hit.members.append((name, item))
+
+    return [_combine(x.members) if isinstance(x, _Cluster) else x for x in order]
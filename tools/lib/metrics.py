@@ -0,0 +1,190 @@
+# tools/lib/metrics.py
+from __future__ import annotations
+import contextvars
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+from tools.lib.jsonio import atomic_write_text
+from tools.lib.status import update_pipeline_status
+from tools.lib.timeutil import now_oslo_iso
+
+try:
+    import resource
+except ImportError:  # ikke på Windows
+    resource = None
+
+ROOT = Path(__file__).resolve().parents[2]
+HISTORY_PATH = ROOT / "data" / "_meta" / "metrics_history.jsonl"
+HISTORY_MAX_LINES = 1000
+
+_current_source: contextvars.ContextVar[str | None] = contextvars.ContextVar("metrics_source", default=None)
+
+
+def peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    # ru_maxrss er KiB på Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+class RunMetrics:
+    """
+    Tidsbruk og volum per kilde og per output-target for én kjøring.
+      sources[id]: requests, bytes, headers_s (DNS+connect+TLS+ventetid til headers), transfer_s,
+                   parse_s, normalize_s, items_before, items_after, rss_peak_growth_mb
+      targets[path]: items, write_s
+    HTTP-tall samles via tools.lib.http.add_hook og knyttes til kilden som er aktiv i tråden.
+    ru_maxrss er prosessens topp og synker aldri: per kilde lagres bare hvor mye toppen steg mens
+    kilden kjørte (0 = under tidligere topp; kilder i parallell kan dele en økning). Selve toppen
+    rapporteres én gang for hele kjøringen (record()["peak_rss_mb"]).
+    """
+
+    def __init__(self, run: str):
+        self.run = run
+        self.started = time.perf_counter()
+        self.sources: dict[str, dict[str, Any]] = {}
+        self.targets: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _src(self, source_id: str) -> dict[str, Any]:
+        s = self.sources.get(source_id)
+        if s is None:
+            s = self.sources[source_id] = {
+                "requests": 0, "bytes": 0, "headers_s": 0.0, "transfer_s": 0.0,
+                "parse_s": 0.0, "normalize_s": 0.0,
+                "items_before": None, "items_after": None, "rss_peak_growth_mb": None,
+            }
+        return s
+
+    def on_http(self, event: dict) -> None:
+        sid = _current_source.get()
+        if sid is None:
+            return
+        with self._lock:
+            s = self._src(sid)
+            s["requests"] += 1
+            s["bytes"] += int(event.get("bytes") or 0)
+            s["headers_s"] += float(event.get("headers_s") or 0.0)
+            s["transfer_s"] += float(event.get("transfer_s") or 0.0)
+
+    @contextmanager
+    def source(self, source_id: str) -> Iterator[None]:
+        token = _current_source.set(source_id)
+        base = peak_rss_mb()
+        try:
+            yield
+        finally:
+            _current_source.reset(token)
+            peak = peak_rss_mb()
+            if base is not None and peak is not None:
+                with self._lock:
+                    s = self._src(source_id)
+                    s["rss_peak_growth_mb"] = round((s["rss_peak_growth_mb"] or 0.0) + peak - base, 1)
+
+    @contextmanager
+    def stage(self, name: str, source_id: str | None = None) -> Iterator[None]:
+        sid = source_id or _current_source.get()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            if sid is not None:
+                with self._lock:
+                    s = self._src(sid)
+                    s[f"{name}_s"] = s.get(f"{name}_s", 0.0) + (time.perf_counter() - t0)
+
+    def items(self, *, before: int | None = None, after: int | None = None, source_id: str | None = None) -> None:
+        sid = source_id or _current_source.get()
+        if sid is None:
+            return
+        with self._lock:
+            s = self._src(sid)
+            if before is not None:
+                s["items_before"] = (s["items_before"] or 0) + before
+            if after is not None:
+                s["items_after"] = (s["items_after"] or 0) + after
+
+    @contextmanager
+    def write(self, target: str, items: int) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.targets[target] = {"items": items, "write_s": round(time.perf_counter() - t0, 4)}
+
+    # -----------------------------
+    # output
+    # -----------------------------
+    def record(self) -> dict[str, Any]:
+        def rnd(d: dict[str, Any]) -> dict[str, Any]:
+            return {k: (round(v, 4) if isinstance(v, float) else v) for k, v in d.items()}
+
+        return {
+            "run": self.run,
+            "at": now_oslo_iso(),
+            "wall_s": round(time.perf_counter() - self.started, 3),
+            "peak_rss_mb": peak_rss_mb(),
+            "sources": {k: rnd(v) for k, v in sorted(self.sources.items())},
+            "targets": dict(sorted(self.targets.items())),
+        }
+
+    def summary(self, rec: dict[str, Any] | None = None) -> dict[str, Any]:
+        """Kort versjon til pipeline_status.json: totaler + tregeste kilde."""
+        rec = rec or self.record()
+        srcs = rec["sources"]
+
+        def total(s: dict[str, Any]) -> float:
+            return s["headers_s"] + s["transfer_s"] + s["parse_s"] + s["normalize_s"]
+
+        slowest = max(srcs, key=lambda k: total(srcs[k])) if srcs else None
+        return {
+            "wall_s": rec["wall_s"],
+            "peak_rss_mb": rec["peak_rss_mb"],
+            "requests": sum(s["requests"] for s in srcs.values()),
+            "bytes": sum(s["bytes"] for s in srcs.values()),
+            "slowest_source": slowest,
+            "slowest_source_s": round(total(srcs[slowest]), 3) if slowest else None,
+            "history": HISTORY_PATH.relative_to(ROOT).as_posix(),
+        }
+
+    def append_history(self, rec: dict[str, Any] | None = None, path: Path = HISTORY_PATH) -> None:
+        rec = rec or self.record()
+        lines: list[str] = []
+        if path.exists():
+            lines = path.read_text(encoding="utf-8").splitlines()
+        lines.append(json.dumps(rec, ensure_ascii=False, sort_keys=True))
+        lines = lines[-HISTORY_MAX_LINES:]
+        atomic_write_text(path, "\n".join(lines) + "\n")
+
+    def publish(self, **sections: Any) -> dict[str, Any]:
+        """
+        Slutten av en kjøring: full post til JSONL-historikken, sammendraget til pipeline_status.json
+        under metrics[run] (sammen med evt. andre seksjoner, f.eks. hosts=...). Returnerer sammendraget.
+        """
+        rec = self.record()
+        self.append_history(rec)
+        summary = self.summary(rec)
+        print(f"[METRICS] {self.run}: wall={summary['wall_s']}s peak_rss={summary['peak_rss_mb']}MB "
+              f"slowest={summary['slowest_source']} ({summary['slowest_source_s']}s)")
+        update_pipeline_status(merge={"metrics": {self.run: summary}}, **sections)
+        return summary
+
+
+_metrics: RunMetrics | None = None
+
+
+def start_run(run: str) -> RunMetrics:
+    global _metrics
+    _metrics = RunMetrics(run)
+    return _metrics
+
+
+def metrics() -> RunMetrics:
+    global _metrics
+    if _metrics is None:
+        _metrics = RunMetrics("default")
+    return _metrics
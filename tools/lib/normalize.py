@@ -1,28 +1,115 @@
 # tools/lib/normalize.py
 from __future__ import annotations
 import hashlib
-from typing import Any
-from tools.lib.timeutil import now_oslo_iso
+from dataclasses import dataclass, fields
+from datetime import datetime
+from operator import attrgetter
+from typing import Any, Callable, Hashable, Iterator, Union
+from tools.lib.entities import entities
+from tools.lib.merge import _combine
+from tools.lib.timeutil import OSLO, iso_from_epoch, iso_many, now_oslo_iso, to_epoch
 
 DEFAULT_WHERE = ["Vikinghjørnet", "Gimle Pub"]
 
+# -----------------------------
+# Item: kompakt record gjennom pipelinen; blir dict først i render_items()
+# -----------------------------
+@dataclass(slots=True)
+class Item:
+    """
+    Ett item med faste felt (__slots__: ingen dict per item, ingen nøkler å allokere på nytt).
+    Feltrekkefølgen er rekkefølgen i output-JSON; alle felt skrives, None som null, så hvert item
+    har de samme nøklene. where er som default den delte tomme tuplen (skrives som [] i JSON),
+    ikke en ny liste per item.
+    Har et lite dict-grensesnitt (it["x"], it.get("x"), "x" in it, it["x"] = v, items()), så
+    stegene (sort_items, merge_sources, merge_genders ...) tar både Item og dict.
+    """
+    id: str | None = None
+    sport: str = ""
+    category: str | None = None
+    league: str | None = None
+    season: str | None = None
+    start: str = ""
+    start_ts: int | None = None
+    home: str | None = None
+    away: str | None = None
+    title: str | None = None
+    home_id: str | None = None
+    away_id: str | None = None
+    tv: str | None = None
+    channel: str | None = None
+    where: list[str] | tuple[str, ...] = ()
+    venue: str | None = None
+    country: str | None = None
+    status: str | None = None
+    source: Any = None
+    gender: str | None = None
+    sources: list[str] | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return dict(zip(ITEM_FIELDS, _item_values(self)))
+
+    @classmethod
+    def from_dict(cls, d: dict[str, Any]) -> "Item":
+        """Fra lagret JSON (f.eks. pdf-sidecachen); ukjente nøkler ignoreres."""
+        return cls(**{k: v for k, v in d.items() if k in _ITEM_FIELD_SET})
+
+    def copy(self) -> "Item":
+        # grunn kopi; positional i feltrekkefølge (dataclasses.replace er vesentlig tregere)
+        return Item(*_item_values(self))
+
+    # dict-grensesnitt: en nøkkel "finnes" når feltet ikke er None
+    def __getitem__(self, key: str) -> Any:
+        v = getattr(self, key, None) if key in _ITEM_FIELD_SET else None
+        if v is None:
+            raise KeyError(key)
+        return v
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in _ITEM_FIELD_SET:
+            raise KeyError(f"Item has no field {key!r}")
+        setattr(self, key, value)
+
+    def __contains__(self, key: object) -> bool:
+        return key in _ITEM_FIELD_SET and getattr(self, key) is not None  # type: ignore[arg-type]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        v = getattr(self, key, None) if key in _ITEM_FIELD_SET else None
+        return default if v is None else v
+
+    def items(self) -> Iterator[tuple[str, Any]]:
+        # som "in": bare felt med verdi
+        return ((k, v) for k, v in zip(ITEM_FIELDS, _item_values(self)) if v is not None)
+
+ITEM_FIELDS: tuple[str, ...] = tuple(f.name for f in fields(Item))
+_ITEM_FIELD_SET = frozenset(ITEM_FIELDS)
+_item_values = attrgetter(*ITEM_FIELDS)
+
+# stegene tar begge; providerne lager Item, eldre skript og migrate lager dict
+AnyItem = Union[Item, dict]
+
 def stable_id(*parts: str) -> str:
     raw = "|".join([p or "" for p in parts])
     return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:14]
 
+def _pubs(names: list[str]) -> list[str]:
+    # kanoniske pubnavn fra entities.json (interned), uten varianter av samme pub ("Gimle" / "Gimle Pub")
+    pub = entities().pub
+    return list(dict.fromkeys(pub(n)[1] for n in names))
+
 def ensure_where(v: Any) -> list[str]:
     if v is None:
         return DEFAULT_WHERE.copy()
     if isinstance(v, list):
         out = [str(x).strip() for x in v if str(x).strip()]
-        return out if out else DEFAULT_WHERE.copy()
+        return _pubs(out) if out else DEFAULT_WHERE.copy()
     s = str(v).strip()
     if not s:
         return DEFAULT_WHERE.copy()
     if "," in s:
         out = [p.strip() for p in s.split(",") if p.strip()]
-        return out if out else DEFAULT_WHERE.copy()
-    return [s]
+        return _pubs(out) if out else DEFAULT_WHERE.copy()
+    return _pubs([s])
 
 def make_doc(*, sport: str, name: str, season: str, source_ids: list[str], items: list[dict]) -> dict:
     return {
@@ -41,7 +128,7 @@ def normalize_item(
     sport: str,
     season: str,
     league: str,
-    start: str,
+    start: str | datetime | int,
     home: str | None,
     away: str | None,
     title: str | None,
@@ -53,25 +140,134 @@ def normalize_item(
     source_id: str,
     source_type: str,
     source_url: str | None
-) -> dict:
-    item_id = f"{sport}_{stable_id(sport, league, season, start, home or title or '', away or '', source_id)}"
-    return {
-        "id": item_id,
-        "sport": sport,
-        "league": league,
-        "season": season,
-        "start": start,
-        "home": home,
-        "away": away,
-        "title": title if (not home and not away) else None,
-        "venue": venue,
-        "country": country,
-        "channel": channel,
-        "where": ensure_where(where),
-        "status": status or "scheduled",
-        "source": {
+) -> Item:
+    # lag/liga -> kanoniske navn + entity-id (data/_meta/entities.json)
+    ent = entities()
+    league = ent.league(league)[1]
+    home_id, home = ent.team(home) if home else (None, home)
+    away_id, away = ent.team(away) if away else (None, away)
+    # tiden parses én gang her; sortering/filtrering bruker start_ts, "start" skrives av render_items()
+    start_ts = to_epoch(start, OSLO)
+    start_s = start if isinstance(start, str) else (iso_from_epoch(start_ts) if start_ts is not None else "")
+    item_id = f"{sport}_{stable_id(sport, league, season, start_s, home or title or '', away or '', source_id)}"
+    return Item(
+        id=item_id,
+        sport=sport,
+        league=league,
+        season=season,
+        start=start_s,
+        start_ts=start_ts,
+        home=home,
+        away=away,
+        home_id=home_id,
+        away_id=away_id,
+        title=title if (not home and not away) else None,
+        venue=venue,
+        country=country,
+        channel=channel,
+        where=ensure_where(where),
+        status=status or "scheduled",
+        source={
             "id": source_id,
             "provider": source_type,
             "url": source_url
-        }
-    }
+        },
+    )
+
+# -----------------------------
+# start_ts: int epoch (UTC) som felles sorterings-/filternøkkel
+# -----------------------------
+def item_ts(item: AnyItem) -> int | None:
+    """start_ts; for items uten feltet regnes det ut én gang fra "start" (naiv = Oslo) og lagres."""
+    if type(item) is Item:
+        if item.start_ts is None:
+            item.start_ts = to_epoch(item.start, OSLO)
+        return item.start_ts
+    if "start_ts" not in item:
+        item["start_ts"] = to_epoch(item.get("start"), OSLO)
+    return item["start_ts"]
+
+def _sort_key(item: AnyItem) -> tuple[bool, int]:
+    ts = item_ts(item)
+    return (ts is None, ts or 0)
+
+def sort_items(items: list[AnyItem]) -> list[AnyItem]:
+    """Tidsrekkefølge (ikke strengrekkefølge); items uten gyldig tid havner sist."""
+    items.sort(key=_sort_key)
+    return items
+
+def in_window(items: list[AnyItem], start_ts: int, end_ts: int) -> list[AnyItem]:
+    """Items med start_ts i [start_ts, end_ts), f.eks. timeutil.year_window(2026)."""
+    out = []
+    for it in items:
+        ts = item_ts(it)
+        if ts is not None and start_ts <= ts < end_ts:
+            out.append(it)
+    return out
+
+def dedup_items(items: list[AnyItem], key: Callable[[AnyItem], Hashable] | None = None) -> list[AnyItem]:
+    """Beholder første forekomst; standardnøkkel er (start_ts, title)."""
+    key = key or (lambda it: (item_ts(it), it.get("title")))
+    seen: set = set()
+    out = []
+    for it in items:
+        k = key(it)
+        if k in seen:
+            continue
+        seen.add(k)
+        out.append(it)
+    return out
+
+def render_items(items: list[AnyItem]) -> list[dict]:
+    """
+    Kalles rett før skriving: "start" formateres fra start_ts som Europe/Oslo ISO, og Item
+    gjøres om til dict (output-grensen). Listen endres på stedet og returneres.
+    """
+    dated = [it for it in items if item_ts(it) is not None]
+    # batch via offset-tabellen i timeutil (én bisect per DST-segment for sorterte items)
+    for it, iso in zip(dated, iso_many(item_ts(it) for it in dated)):
+        if type(it) is Item:
+            it.start = iso
+        else:
+            it["start"] = iso
+    for i, it in enumerate(items):
+        if type(it) is Item:
+            items[i] = it.to_dict()
+    return items
+
+# -----------------------------
+# kjønn: ett kanonisk dokument med gender per item; men/women-filene er utdrag av det
+# -----------------------------
+GENDERS = ("men", "women")
+MIXED = "mixed"
+
+def merge_genders(items: list[AnyItem]) -> list[AnyItem]:
+    """
+    Ett item per id, i rekkefølgen id-en først ble sett. Flere forekomster av samme id slås sammen
+    med merge._combine (første forekomst vinner, tomme felt fylles fra de neste). gender utenfor
+    men/women, eller samme id sett med ulike gender -> "mixed" (vises i begge utdragene).
+    """
+    groups: dict[str, list[AnyItem]] = {}
+    genders: dict[str, str] = {}
+    for it in items:
+        g = it.get("gender")
+        g = g if g in GENDERS else MIXED
+        eid = it["id"]
+        have = genders.get(eid)
+        if have is None:
+            groups[eid] = [it]
+            genders[eid] = g
+        else:
+            groups[eid].append(it)
+            if have != g:
+                genders[eid] = MIXED
+    out: list[AnyItem] = []
+    for eid, its in groups.items():
+        it = its[0] if len(its) == 1 else _combine([("", x) for x in its], sources=False)
+        it["gender"] = genders[eid]
+        out.append(it)
+    return out
+
+def gender_items(items: list[AnyItem], gender: str) -> list[AnyItem]:
+    """Items som hører til gender (inkl. "mixed"), i items-rekkefølge; de samme objektene, ingen kopi."""
+    return [it for it in items if it.get("gender") in (gender, MIXED)]
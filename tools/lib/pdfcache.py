@@ -0,0 +1,211 @@
+# tools/lib/pdfcache.py
+from __future__ import annotations
+import gzip
+import hashlib
+import json
+import threading
+import time
+from mmap import mmap
+from pathlib import Path
+from typing import Any, BinaryIO, Callable
+from tools.lib.jsonio import atomic_write_bytes, atomic_write_json
+
+ROOT = Path(__file__).resolve().parents[2]
+CACHE_DIR = ROOT / "data" / "_meta" / "pdf_cache"
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+CHUNK = 64 * 1024
+
+PdfSource = bytes | bytearray | BinaryIO | mmap
+Pages = list[list[str]]
+
+
+def pdf_sha256(src: PdfSource) -> str:
+    """SHA-256 av PDF-bytes; filhandles leses i biter og spoles tilbake til start."""
+    if isinstance(src, (bytes, bytearray, mmap)):
+        return hashlib.sha256(src).hexdigest()
+    h = hashlib.sha256()
+    src.seek(0)
+    for chunk in iter(lambda: src.read(CHUNK), b""):
+        h.update(chunk)
+    src.seek(0)
+    return h.hexdigest()
+
+
+def settings_key(settings: dict[str, Any]) -> str:
+    raw = json.dumps(settings, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class PdfTextCache:
+    """
+    Cache for tekst/tabell-ekstraksjon fra PDF, nøkkel = sha256(PDF) + hash av extractor-innstillinger:
+      index.json            -> key: {sha256, settings, pages, size, created_at, used_at}
+      entries/<key>.json.gz -> {"pages": [[linje, ...], ...]}  (linjer per side)
+    Uendret PDF med samme innstillinger -> sidene leses fra disk, pdfminer kjøres ikke.
+    Eviction: minst nylig brukte nøkler fjernes til total størrelse <= max_bytes.
+    """
+
+    def __init__(self, root: Path = CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+        self.index_path = self.root / "index.json"
+        self.entries = self.root / "entries"
+        self._lock = threading.RLock()
+        self._index: dict[str, dict] | None = None
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0}
+
+    # -----------------------------
+    # index
+    # -----------------------------
+    def _load(self) -> dict[str, dict]:
+        if self._index is None:
+            try:
+                data = json.loads(self.index_path.read_text(encoding="utf-8"))
+                self._index = data if isinstance(data, dict) else {}
+            except Exception:
+                self._index = {}
+        return self._index
+
+    def _save(self) -> None:
+        atomic_write_json(self.index_path, self._load(), indent=1, sort_keys=True)
+
+    def entry_path(self, key: str) -> Path:
+        return self.entries / f"{key}.json.gz"
+
+    @staticmethod
+    def key(sha: str, settings: dict[str, Any]) -> str:
+        return f"{sha}-{settings_key(settings)}"
+
+    # -----------------------------
+    # get / put
+    # -----------------------------
+    def get(self, key: str) -> Pages | None:
+        with self._lock:
+            entry = self._load().get(key)
+            if not entry:
+                return None
+            try:
+                with gzip.open(self.entry_path(key), "rt", encoding="utf-8") as fh:
+                    pages = json.load(fh)["pages"]
+            except Exception:
+                # borte/korrupt på disk -> behandles som miss
+                self._load().pop(key, None)
+                self._save()
+                return None
+            entry["used_at"] = time.time()
+            self._save()
+            return pages
+
+    def put(self, key: str, pages: Pages, *, sha: str, settings: dict[str, Any]) -> None:
+        data = gzip.compress(json.dumps({"pages": pages}, ensure_ascii=False).encode("utf-8"), compresslevel=6)
+        with self._lock:
+            atomic_write_bytes(self.entry_path(key), data)
+            now = time.time()
+            self._load()[key] = {
+                "sha256": sha,
+                "settings": settings,
+                "pages": len(pages),
+                "size": len(data),
+                "created_at": now,
+                "used_at": now,
+            }
+            self._evict(keep=key)
+            self._save()
+
+    def extract(self, src: PdfSource, settings: dict[str, Any], extractor: Callable[[PdfSource], Pages]) -> Pages:
+        """Linjer per side fra cache, ellers extractor(src) og lagre resultatet."""
+        sha = pdf_sha256(src)
+        key = self.key(sha, settings)
+        pages = self.get(key)
+        if pages is not None:
+            with self._lock:
+                self.stats["hits"] += 1
+            return pages
+        with self._lock:
+            self.stats["misses"] += 1
+        pages = extractor(src)
+        self.put(key, pages, sha=sha, settings=settings)
+        return pages
+
+    def _evict(self, keep: str | None = None) -> None:
+        index = self._load()
+        total = sum(int(e.get("size") or 0) for e in index.values())
+        if total <= self.max_bytes:
+            return
+        for key, e in sorted(index.items(), key=lambda kv: kv[1].get("used_at") or 0):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            del index[key]
+            total -= int(e.get("size") or 0)
+            self.stats["evicted"] += 1
+            try:
+                self.entry_path(key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def report(self) -> str:
+        s = self.stats
+        return f"hits={s['hits']} misses={s['misses']} evicted={s['evicted']}"
+
+
+class PageStore:
+    """
+    Items per side fra forrige kjøring, per kilde (URL):
+      pages/<sha1(kilde)>.json -> {source, sha256, settings, pages: {sidenøkkel: [item, ...]}, order, updated_at}
+    order = fingerprint per side (content stream + XObjects); sidenøkkelen velger kalleren
+    (handball: egen + neste sides fingerprint). En side med samme nøkkel og samme
+    parse-innstillinger gjenbrukes uten ny ekstraksjon/parsing.
+    """
+
+    def __init__(self, root: Path = CACHE_DIR / "pages"):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+
+    def path(self, source: str) -> Path:
+        return self.root / f"{hashlib.sha1(source.encode('utf-8')).hexdigest()[:16]}.json"
+
+    def load(self, source: str, settings: dict[str, Any]) -> dict[str, Any]:
+        """Lagret tilstand, eller {} hvis den mangler/er laget med andre innstillinger."""
+        try:
+            data = json.loads(self.path(source).read_text(encoding="utf-8"))
+        except Exception:
+            return {}
+        if not isinstance(data, dict) or data.get("settings") != settings_key(settings):
+            return {}
+        return data
+
+    def save(
+        self, source: str, settings: dict[str, Any], *, sha: str, order: list[str], pages: dict[str, list],
+        keys: list[str] | None = None,
+    ) -> None:
+        """keys: sidenøkkel per side (default order); bare disse lagres, så gamle sider ryddes bort."""
+        data = {
+            "source": source,
+            "sha256": sha,
+            "settings": settings_key(settings),
+            "order": order,
+            "pages": {k: pages[k] for k in dict.fromkeys(order if keys is None else keys)},
+            "updated_at": time.time(),
+        }
+        with self._lock:
+            atomic_write_json(self.path(source), data, separators=(",", ":"))
+
+
+_cache: PdfTextCache | None = None
+_pages: PageStore | None = None
+
+
+def pdf_cache() -> PdfTextCache:
+    global _cache
+    if _cache is None:
+        _cache = PdfTextCache()
+    return _cache
+
+
+def page_store() -> PageStore:
+    global _pages
+    if _pages is None:
+        _pages = PageStore()
+    return _pages
@@ -0,0 +1,202 @@
+# tools/lib/pdfextract.py
+from __future__ import annotations
+import hashlib
+import threading
+from functools import partial
+from io import BytesIO
+from typing import Callable
+
+from tools.lib.pdfpages import PdfSource, map_pages
+
+# pdfplumber-tabellinnstillinger for sider som trenger tabell-passet
+TABLE_SETTINGS = {
+    "vertical_strategy": "lines",
+    "horizontal_strategy": "lines",
+    "intersection_tolerance": 5,
+    "snap_tolerance": 3,
+    "join_tolerance": 3,
+    "edge_min_length": 3,
+    "min_words_vertical": 1,
+    "min_words_horizontal": 1,
+}
+
+# tekstmotorer for første trinn; "pypdf" er rask, "pdfplumber" gir layout-basert linjeinndeling
+TEXT_ENGINES = ("pypdf", "pdfplumber")
+
+_lock = threading.Lock()
+stats = {"documents": 0, "pages": 0, "slow_pages": 0}
+
+
+class TieredDoc:
+    """
+    PDF åpnet for to-trinns ekstraksjon: tekst på alle sider (text="pypdf" eller "pdfplumber"),
+    pdfplumber-tabeller først når en side faktisk trenger det. pdfplumber åpnes ved første bruk.
+    Begge leser fra filen ved behov (egen handle hver, siden de flytter filposisjonen).
+    """
+
+    def __init__(self, path: str, text: str = "pypdf"):
+        from pypdf import PdfReader
+
+        if text not in TEXT_ENGINES:
+            raise ValueError(f"unknown text engine {text!r}")
+        self.path = path
+        self.text_engine = text
+        self._fh = open(path, "rb")
+        self.reader = PdfReader(self._fh)
+        self._plumber = None
+        self.pages = [TieredPage(self, i) for i in range(len(self.reader.pages))]
+
+    def plumber_page(self, index: int):
+        if self._plumber is None:
+            import pdfplumber
+
+            self._plumber = pdfplumber.open(self.path)
+        return self._plumber.pages[index]
+
+    def close(self) -> None:
+        if self._plumber is not None:
+            self._plumber.close()
+            self._plumber = None
+        self._fh.close()
+
+
+class TieredPage:
+    __slots__ = ("doc", "index")
+
+    def __init__(self, doc: TieredDoc, index: int):
+        self.doc = doc
+        self.index = index
+
+    def text(self) -> str:
+        if self.doc.text_engine == "pdfplumber":
+            return self.doc.plumber_page(self.index).extract_text() or ""
+        return self.doc.reader.pages[self.index].extract_text() or ""
+
+    def tables(self, settings: dict) -> list:
+        try:
+            return self.doc.plumber_page(self.index).extract_tables(table_settings=settings) or []
+        except Exception:
+            return []
+
+
+def open_tiered(path: str, text: str = "pypdf") -> TieredDoc:
+    return TieredDoc(path, text)
+
+
+def _clean(ln: str) -> str:
+    # normaliser bindestreker
+    return ln.strip().replace("\u2013", "-").replace("\u2014", "-")
+
+
+def text_lines(text: str) -> list[str]:
+    return [c for c in (_clean(ln) for ln in text.splitlines()) if c]
+
+
+def table_lines(tables: list) -> list[str]:
+    out: list[str] = []
+    for tbl in tables:
+        for row in (tbl or []):
+            cells = [c for c in ((x or "").strip() for x in (row or [])) if c]
+            if cells:
+                out.append(_clean(" | ".join(cells)))
+    return out
+
+
+def tiered_page(
+    page: TieredPage,
+    needs_tables: Callable[[list[str]], bool] | None = None,
+    table_settings: dict = TABLE_SETTINGS,
+) -> tuple[list[str], bool]:
+    """
+    1) rask tekst (pypdf)
+    2) bare hvis needs_tables(linjer) sier ja: tabell-radene fra pdfplumber legges til
+    Returnerer (linjer, brukte_tabeller).
+    """
+    lines = text_lines(page.text())
+    if needs_tables is None or not needs_tables(lines):
+        return lines, False
+    return lines + table_lines(page.tables(table_settings)), True
+
+
+def extract_pages(
+    src: PdfSource,
+    *,
+    needs_tables: Callable[[list[str]], bool] | None = None,
+    table_settings: dict = TABLE_SETTINGS,
+    indices: list[int] | None = None,
+    workers: int | None = None,
+    text: str = "pypdf",
+) -> list[list[str]]:
+    """
+    Linjer per side (alle, eller bare sidene i indices). needs_tables må være en
+    toppnivå-funksjon (sendes til prosess-poolen); None = bare tekst-passet.
+    text velger tekstmotoren for første trinn (TEXT_ENGINES).
+    """
+    fn = partial(tiered_page, needs_tables=needs_tables, table_settings=table_settings)
+    opener = open_tiered if text == "pypdf" else partial(open_tiered, text=text)
+    res = map_pages(src, fn, opener=opener, indices=indices, workers=workers)
+    with _lock:
+        stats["documents"] += 1
+        stats["pages"] += len(res)
+        stats["slow_pages"] += sum(1 for _, slow in res if slow)
+    return [lines for lines, _ in res]
+
+
+def _hash_xobjects(h, resources, seen: set) -> None:
+    # tekst kan ligge i Form XObjects (og deres egne /Resources): endres en av dem, er siden endret
+    try:
+        xobjs = (resources.get_object() if resources is not None else {}).get("/XObject")
+        xobjs = xobjs.get_object() if xobjs is not None else {}
+    except Exception:
+        return
+    for name in sorted(xobjs):
+        ref = xobjs.raw_get(name)
+        key = (ref.idnum, ref.generation) if hasattr(ref, "idnum") else id(ref)
+        h.update(name.encode("latin-1", "replace"))
+        if key in seen:
+            continue
+        seen.add(key)
+        obj = ref.get_object()
+        h.update(getattr(obj, "_data", b"") or b"")  # rå (komprimert) stream: ingen dekoding
+        if obj.get("/Subtype") == "/Form":
+            _hash_xobjects(h, obj.get("/Resources"), seen)
+
+
+def page_fingerprints(src: PdfSource) -> list[str]:
+    """
+    sha1 av hver sides (dekomprimerte) content stream + XObject-streamene den tegner
+    (/Resources, rekursivt for Form XObjects), i sideorden. Billig: ingen layout-analyse.
+    """
+    from pypdf import PdfReader
+
+    # handle leses direkte (pypdf slår opp objekter ved behov); bytes pakkes uten kopi
+    stream = BytesIO(src) if isinstance(src, (bytes, bytearray)) else src
+    stream.seek(0)
+    reader = PdfReader(stream)
+    out: list[str] = []
+    for page in reader.pages:
+        h = hashlib.sha1()
+        try:
+            contents = page.get_contents()
+            if contents is not None:
+                h.update(contents.get_data())
+            _hash_xobjects(h, page.get("/Resources"), set())
+        except Exception:
+            # uleselig stream -> unik hash, siden behandles som endret
+            h.update(repr((page.indirect_reference, id(page))).encode())
+        out.append(h.hexdigest())
+    stream.seek(0)
+    return out
+
+
+def extract_lines(src: PdfSource, **kw) -> list[str]:
+    return [ln for page in extract_pages(src, **kw) for ln in page]
+
+
+def extract_text(src: PdfSource, **kw) -> str:
+    return "\n".join(extract_lines(src, **kw))
+
+
+def report() -> str:
+    s = stats
+    return f"documents={s['documents']} pages={s['pages']} slow_pages={s['slow_pages']}"
@@ -0,0 +1,149 @@
+# tools/lib/pdfpages.py
+from __future__ import annotations
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import repeat
+from mmap import mmap
+from typing import Any, BinaryIO, Callable, Iterator
+
+# under så mange sider lønner det seg ikke å starte prosesser og parse PDF-en på nytt i hver av dem
+PARALLEL_MIN_PAGES = 24
+# sideområder per worker (litt finere enn én bit per worker gir jevnere last)
+CHUNKS_PER_WORKER = 4
+DEFAULT_WORKERS = os.cpu_count() or 1
+CHUNK = 1024 * 1024
+
+PdfSource = bytes | bytearray | BinaryIO | mmap
+
+
+# -----------------------------
+# openers: filsti -> dokument med .pages (må være toppnivå-funksjoner, de sendes til workers)
+# -----------------------------
+def open_pdfplumber(path: str):
+    import pdfplumber
+    return pdfplumber.open(path)
+
+
+@contextmanager
+def pdf_path(src: PdfSource) -> Iterator[str]:
+    """
+    Filsti til PDF-en, så hver prosess kan åpne og lese den selv (ingen bytes-kopi i minnet,
+    ingenting picklet til workers). En handle til en fil på disk (f.eks. http-cachen) brukes
+    direkte; ellers (spooled temp-fil, bytes, mmap) skrives innholdet én gang i biter til en temp-fil.
+    """
+    name = getattr(src, "name", None)
+    if isinstance(name, str) and os.path.isfile(name):
+        yield name
+        return
+    fd, path = tempfile.mkstemp(prefix="pdfpages-", suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            if isinstance(src, (bytes, bytearray, mmap)):
+                out.write(src)
+            else:
+                src.seek(0)
+                shutil.copyfileobj(src, out, CHUNK)
+                src.seek(0)
+        yield path
+    finally:
+        os.unlink(path)
+
+
+# -----------------------------
+# worker
+# -----------------------------
+_doc: Any = None
+
+
+def _init_worker(path: str, opener: Callable[[str], Any]) -> None:
+    # én åpning per prosess (fra disk); sideområdene under gjenbruker dokumentet
+    global _doc
+    _doc = opener(path)
+
+
+def _run_pages(page_fn: Callable[[Any], Any], indices: list[int]) -> list[Any]:
+    pages = _doc.pages
+    return [page_fn(pages[i]) for i in indices]
+
+
+def _chunks(indices: list[int], parts: int) -> list[list[int]]:
+    # sammenhengende biter i input-rekkefølge
+    size, rest = divmod(len(indices), parts)
+    out = []
+    lo = 0
+    for i in range(parts):
+        hi = lo + size + (1 if i < rest else 0)
+        if hi > lo:
+            out.append(indices[lo:hi])
+        lo = hi
+    return out
+
+
+def _serial(path: str, page_fn: Callable[[Any], Any], opener: Callable[[str], Any], indices: list[int] | None) -> list[Any]:
+    doc = opener(path)
+    try:
+        pages = doc.pages
+        return [page_fn(p) for p in pages] if indices is None else [page_fn(pages[i]) for i in indices]
+    finally:
+        close = getattr(doc, "close", None)
+        if close is not None:
+            close()
+
+
+def map_pages(
+    src: PdfSource,
+    page_fn: Callable[[Any], Any],
+    *,
+    opener: Callable[[str], Any] = open_pdfplumber,
+    indices: list[int] | None = None,
+    workers: int | None = None,
+    min_pages: int = PARALLEL_MIN_PAGES,
+) -> list[Any]:
+    """
+    page_fn(side) for hver side (eller bare sidene i indices, 0-basert), i input-rekkefølge.
+    Store jobber fordeles som sammenhengende biter over en prosess-pool; resultatene
+    settes sammen i bitenes rekkefølge, så output er identisk med en seriell løkke.
+    Få sider, én CPU eller en pool som feiler -> seriell ekstraksjon i denne prosessen.
+    page_fn og opener må kunne pickles (toppnivå-funksjoner); workers får bare filstien (pdf_path).
+    """
+    with pdf_path(src) as path:
+        return _map_path(path, page_fn, opener, indices, workers, min_pages)
+
+
+def _map_path(
+    path: str,
+    page_fn: Callable[[Any], Any],
+    opener: Callable[[str], Any],
+    indices: list[int] | None,
+    workers: int | None,
+    min_pages: int,
+) -> list[Any]:
+    workers = DEFAULT_WORKERS if workers is None else max(1, int(workers))
+    n = len(indices) if indices is not None else None
+
+    if n is not None and (workers <= 1 or n < max(2, min_pages)):
+        return _serial(path, page_fn, opener, indices)
+    if n is None:
+        doc = opener(path)
+        try:
+            n = len(doc.pages)
+            if workers <= 1 or n < max(2, min_pages):
+                return [page_fn(p) for p in doc.pages]
+        finally:
+            close = getattr(doc, "close", None)
+            if close is not None:
+                close()
+        indices = list(range(n))
+
+    workers = min(workers, n)
+    chunks = _chunks(indices, workers * CHUNKS_PER_WORKER)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(path, opener)) as ex:
+            parts = list(ex.map(_run_pages, repeat(page_fn), chunks))
+    except Exception as e:
+        print(f"[pdfpages] WARN process pool failed ({type(e).__name__}: {e}); extracting {n} pages serially")
+        return _serial(path, page_fn, opener, indices)
+    return [r for part in parts for r in part]
@@ -0,0 +1,150 @@
+# tools/lib/pool.py
+from __future__ import annotations
+import threading
+import time
+from concurrent.futures import Future, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable
+from urllib.parse import urlsplit
+
+DEFAULT_WORKERS = 8
+DEFAULT_PER_HOST = 2
+
+# deadline (monotonic) for tasken som kjører i denne tråden; leses av http via time_left()
+_local = threading.local()
+
+
+@dataclass
+class Task:
+    key: Hashable
+    url: str
+    fn: Callable[[], Any]
+
+
+def host_of(url: str) -> str:
+    return (urlsplit(url or "").hostname or "").lower()
+
+
+def time_left() -> float | None:
+    """Sekunder igjen av run_tasks-budsjettet for tasken i denne tråden (None = ingen deadline)."""
+    deadline_at = getattr(_local, "deadline_at", None)
+    return None if deadline_at is None else deadline_at - time.monotonic()
+
+
+def cap_timeout(timeout: float, url: str = "") -> float:
+    """timeout kappet til resten av budsjettet; TimeoutError når det er brukt opp."""
+    left = time_left()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise TimeoutError(f"deadline exceeded: {url}")
+    return min(timeout, left)
+
+
+class HostLimiter:
+    """
+    Max N samtidige kall per host, og (valgfritt) minst min_interval sek mellom
+    hver start mot samme host. Venter aldri forbi deadline (monotonic).
+    """
+
+    def __init__(
+        self,
+        per_host: int = DEFAULT_PER_HOST,
+        deadline_at: float | None = None,
+        min_interval: float = 0.0,
+    ):
+        self.per_host = max(1, int(per_host))
+        self.deadline_at = deadline_at
+        self.min_interval = max(0.0, float(min_interval))
+        self._lock = threading.Lock()
+        self._sems: dict[str, threading.BoundedSemaphore] = {}
+        self._next_start: dict[str, float] = {}
+
+    def _sem(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            sem = self._sems.get(host)
+            if sem is None:
+                sem = self._sems[host] = threading.BoundedSemaphore(self.per_host)
+            return sem
+
+    def _wait_turn(self, host: str, url: str) -> None:
+        if self.min_interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, now))
+            self._next_start[host] = start + self.min_interval
+        if self.deadline_at is not None and start > self.deadline_at:
+            raise TimeoutError(f"deadline exceeded while rate limited: {url}")
+        if start > now:
+            time.sleep(start - now)
+
+    def call(self, url: str, fn: Callable[[], Any]) -> Any:
+        host = host_of(url)
+        sem = self._sem(host)
+        timeout = None
+        if self.deadline_at is not None:
+            timeout = max(0.0, self.deadline_at - time.monotonic())
+        if not sem.acquire(timeout=timeout):
+            raise TimeoutError(f"deadline exceeded while waiting for host slot: {url}")
+        try:
+            self._wait_turn(host, url)
+            return fn()
+        finally:
+            sem.release()
+
+
+def run_tasks(
+    tasks: list[Task],
+    *,
+    max_workers: int = DEFAULT_WORKERS,
+    per_host: int = DEFAULT_PER_HOST,
+    deadline: float | None = None,
+    min_interval: float = 0.0,
+) -> list[tuple[Any, BaseException | None]]:
+    """
+    Kjører alle tasks samtidig og returnerer (resultat, feil) i SAMME rekkefølge som input,
+    slik at kallere kan behandle resultatene akkurat som i en sekvensiell løkke.
+    deadline: totalt tidsbudsjett i sekunder; tasks som ikke er ferdige får TimeoutError.
+      Arbeiderne er daemon-tråder, så et kall som henger etter deadline ikke holder prosessen
+      i live, og HTTP-kall i tasken får timeout kappet til resten av budsjettet (cap_timeout).
+    min_interval: rate limit, minste avstand (sek) mellom kall-starter mot samme host.
+    """
+    if not tasks:
+        return []
+
+    deadline_at = None if deadline is None else time.monotonic() + max(0.0, deadline)
+    limiter = HostLimiter(per_host, deadline_at, min_interval)
+    futs: list[Future] = [Future() for _ in tasks]
+    queue = iter(list(zip(tasks, futs)))
+    queue_lock = threading.Lock()
+
+    def worker() -> None:
+        _local.deadline_at = deadline_at
+        while True:
+            with queue_lock:
+                nxt = next(queue, None)
+            if nxt is None:
+                return
+            t, f = nxt
+            if not f.set_running_or_notify_cancel():
+                continue
+            try:
+                f.set_result(limiter.call(t.url, t.fn))
+            except BaseException as e:
+                f.set_exception(e)
+
+    for n in range(max(1, min(max_workers, len(tasks)))):
+        threading.Thread(target=worker, name=f"run_tasks-{n}", daemon=True).start()
+    done, pending = wait(futs, timeout=deadline)
+    for f in pending:
+        f.cancel()  # ikke startet ennå; kjørende tasks avbrytes av sine kappede timeouts
+
+    out: list[tuple[Any, BaseException | None]] = []
+    for f in futs:
+        if f in done:
+            err = f.exception()
+            out.append((None, err) if err is not None else (f.result(), None))
+        else:
+            out.append((None, TimeoutError(f"deadline of {deadline}s exceeded")))
+    return out
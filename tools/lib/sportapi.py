@@ -0,0 +1,87 @@
+# tools/lib/sportapi.py
+from __future__ import annotations
+import json
+from io import BytesIO
+from typing import Any, Iterator
+
+from lxml import etree
+
+# JSON-svar kommer enten som liste, eller pakket i en av disse nøklene
+_WRAPPERS = {
+    "Event": ("Events", "events", "Items", "items"),
+    "Competition": ("Competitions", "competitions", "Items", "items"),
+}
+
+
+def _is_xml(payload: bytes | str) -> bool:
+    head = payload[:64].lstrip()
+    if isinstance(head, bytes):
+        head = head.lstrip(b"\xef\xbb\xbf")
+        return head.startswith(b"<")
+    return head.lstrip("\ufeff").startswith("<")
+
+
+def _local(tag: Any) -> str:
+    # {namespace}Navn -> Navn (SportAPI-XML har ofte et datacontract-namespace)
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+
+def _text(v: Any) -> str:
+    return "" if v is None else str(v).strip()
+
+
+def _iter_xml(payload: bytes | str, tag: str, fields: tuple[str, ...] | None) -> Iterator[dict[str, str]]:
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    wanted = frozenset(fields) if fields else None
+    names: dict[Any, str] = {}
+    ctx = etree.iterparse(BytesIO(payload), events=("end",), tag=f"{{*}}{tag}", recover=True, huge_tree=True)
+    for _event, el in ctx:
+        rec = dict.fromkeys(fields, "") if fields else {}
+        for child in el:
+            t = child.tag
+            name = names.get(t)
+            if name is None:
+                name = names[t] = _local(t)
+            if name and (wanted is None or name in wanted):
+                tx = child.text
+                rec[name] = tx.strip() if tx else ""
+        yield rec
+        # hold treet flatt: ferdige poster fjernes fra forelderen med en gang
+        parent = el.getparent()
+        el.clear()
+        if parent is not None:
+            parent.remove(el)
+
+
+def _iter_json(payload: bytes | str, tag: str, fields: tuple[str, ...] | None) -> Iterator[dict[str, Any]]:
+    data = json.loads(payload)
+    if isinstance(data, dict):
+        for k in _WRAPPERS.get(tag, ("Items", "items")):
+            if isinstance(data.get(k), list):
+                data = data[k]
+                break
+    if not isinstance(data, list):
+        raise ValueError(f"expected list response for {tag}")
+    for rec in data:
+        if isinstance(rec, dict):
+            yield {f: _text(rec.get(f)) for f in fields} if fields else rec
+
+
+def iter_records(payload: bytes | str, tag: str, fields: tuple[str, ...] | None = None) -> Iterator[dict[str, Any]]:
+    """
+    BiathlonResults SportAPI-svar -> én dict per <tag>-post, som generator.
+    XML leses med iterparse element for element og gir {felt: tekst}; JSON gir postene som de er.
+    fields: bare disse feltene, som strippede strenger ("" når de mangler) i begge formatene.
+    """
+    if _is_xml(payload):
+        return _iter_xml(payload, tag, fields)
+    return _iter_json(payload, tag, fields)
+
+
+def iter_events(payload: bytes | str, fields: tuple[str, ...] | None = None) -> Iterator[dict[str, Any]]:
+    return iter_records(payload, "Event", fields)
+
+
+def iter_competitions(payload: bytes | str, fields: tuple[str, ...] | None = None) -> Iterator[dict[str, Any]]:
+    return iter_records(payload, "Competition", fields)
@@ -0,0 +1,29 @@
+# tools/lib/status.py
+from __future__ import annotations
+import json
+from pathlib import Path
+from typing import Any
+from tools.lib.jsonio import atomic_write_json
+from tools.lib.timeutil import now_oslo_iso
+
+ROOT = Path(__file__).resolve().parents[2]
+STATUS_PATH = ROOT / "data" / "_meta" / "pipeline_status.json"
+
+def update_pipeline_status(*, merge: dict[str, dict[str, Any]] | None = None, **sections: Any) -> None:
+    """
+    Leser pipeline_status.json, erstatter gitte seksjoner (f.eks. hosts=...) og skriver atomisk.
+    merge={seksjon: {nøkkel: verdi}} erstatter bare de nøklene i seksjonen, så flere skript kan
+    dele den (f.eks. metrics per kjøring).
+    """
+    try:
+        status = json.loads(STATUS_PATH.read_text(encoding="utf-8"))
+        if not isinstance(status, dict):
+            status = {}
+    except Exception:
+        status = {}
+    status["last_run"] = now_oslo_iso()
+    status.update(sections)
+    for name, entries in (merge or {}).items():
+        cur = status.get(name)
+        status[name] = {**(cur if isinstance(cur, dict) else {}), **entries}
+    atomic_write_json(STATUS_PATH, status, indent=2)
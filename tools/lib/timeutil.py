@@ -1,24 +1,220 @@
 # tools/lib/timeutil.py
 from __future__ import annotations
-from datetime import datetime, timezone
+import calendar
+import time
+from bisect import bisect_right
+from datetime import date, datetime, tzinfo
+from functools import lru_cache
+from typing import Any, Iterable
 from zoneinfo import ZoneInfo
 
 OSLO = ZoneInfo("Europe/Oslo")
 
+# år som offset-tabellen dekker (sesongene vi henter); utenfor faller vi tilbake til ZoneInfo per verdi
+SEASON_FIRST_YEAR = 2024
+SEASON_LAST_YEAR = 2028
+
 def now_oslo_iso() -> str:
     return datetime.now(tz=OSLO).isoformat(timespec="seconds")
 
-def parse_iso_any(s: str) -> datetime:
+# Naive tider (uten offset) er Europe/Oslo-veggklokke overalt; kilder som leverer naiv UTC
+# (f.eks. SportAPI StartTime, fixturedownload DateUtc) sender naive_tz=timezone.utc eksplisitt.
+
+def parse_iso_any(s: str, naive_tz: tzinfo = OSLO) -> datetime:
     s = s.strip()
     # handle trailing Z
     if s.endswith("Z"):
         s = s[:-1] + "+00:00"
-    # if missing timezone, treat as UTC
     dt = datetime.fromisoformat(s)
     if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=timezone.utc)
+        dt = dt.replace(tzinfo=naive_tz)
     return dt
 
-def to_oslo_iso_from_iso(s: str) -> str:
-    dt = parse_iso_any(s)
-    return dt.astimezone(OSLO).isoformat(timespec="seconds")
+def to_oslo_iso_from_iso(s: str, naive_tz: tzinfo = OSLO) -> str:
+    ts = to_epoch(s, naive_tz)
+    if ts is None:
+        raise ValueError(f"Invalid isoformat string: {s!r}")
+    return iso_from_epoch(ts)
+
+# -----------------------------
+# offset-tabell: DST-overganger forhåndsberegnet, konvertering = bisect + gmtime
+# -----------------------------
+def _fmt_offset(off: int) -> str:
+    sign = "+" if off >= 0 else "-"
+    h, m = divmod(abs(off) // 60, 60)
+    return f"{sign}{h:02d}:{m:02d}"
+
+
+# "HH:MM" per minutt i døgnet og ":SS" per sekund; ISO = dato + HHMM + SS + offset
+_HHMM = [f"{h:02d}:{m:02d}" for h in range(24) for m in range(60)]
+_SS = [f":{x:02d}" for x in range(60)]
+
+
+class OffsetTable:
+    """
+    UTC-offset-overganger for én sone i [first_year, last_year]:
+      starts[i]       epoch (UTC) der offsets[i] begynner å gjelde
+      local_starts[i] veggklokke-tid (sekunder) der samme segment begynner, for lokal -> UTC
+    Verdier utenfor spennet konverteres via tz-objektet som før.
+    """
+
+    def __init__(self, tz: tzinfo = OSLO, first_year: int = SEASON_FIRST_YEAR, last_year: int = SEASON_LAST_YEAR):
+        self.tz = tz
+        self.lo = calendar.timegm((first_year, 1, 1, 0, 0, 0))
+        self.hi = calendar.timegm((last_year + 1, 1, 1, 0, 0, 0))
+
+        def off(ts: int) -> int:
+            return int(datetime.fromtimestamp(ts, tz).utcoffset().total_seconds())
+
+        starts = [self.lo]
+        offsets = [off(self.lo)]
+        # dagsteg; når offset endrer seg innen et døgn, finn overgangen på sekundet med binærsøk
+        prev = self.lo
+        for t in range(self.lo + 86400, self.hi + 86400, 86400):
+            t = min(t, self.hi)
+            o = off(t)
+            if o != offsets[-1]:
+                a, b = prev, t
+                while b - a > 1:
+                    mid = (a + b) // 2
+                    if off(mid) == offsets[-1]:
+                        a = mid
+                    else:
+                        b = mid
+                starts.append(b)
+                offsets.append(o)
+            prev = t
+
+        self.starts = starts
+        self.offsets = offsets
+        self.suffixes = [_fmt_offset(o) for o in offsets]
+        self._days: dict[int, str] = {}
+        # overgang i veggklokke: før terskelen gjelder forrige offset (som ZoneInfo med fold=0,
+        # både for "hullet" om våren og den doble timen om høsten)
+        self.local_starts = [starts[0] + offsets[0]] + [
+            starts[i] + max(offsets[i - 1], offsets[i]) for i in range(1, len(starts))
+        ]
+
+    def offset(self, ts: int) -> int:
+        if self.lo <= ts < self.hi:
+            return self.offsets[bisect_right(self.starts, ts) - 1]
+        return int(datetime.fromtimestamp(ts, self.tz).utcoffset().total_seconds())
+
+    def _day(self, day: int) -> str:
+        # lokal dato ("YYYY-MM-DDT") per dag siden epoch, bygget én gang per dag
+        d = self._days.get(day)
+        if d is None:
+            t = time.gmtime(day * 86400)
+            d = self._days[day] = f"{t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:02d}T"
+        return d
+
+    def iso(self, ts: int) -> str:
+        ts = int(ts)
+        if not self.lo <= ts < self.hi:
+            return datetime.fromtimestamp(ts, self.tz).isoformat(timespec="seconds")
+        i = bisect_right(self.starts, ts) - 1
+        day, sec = divmod(ts + self.offsets[i], 86400)
+        d = self._days.get(day) or self._day(day)
+        return d + _HHMM[sec // 60] + _SS[sec % 60] + self.suffixes[i]
+
+    def iso_many(self, stamps: Iterable[int]) -> list[str]:
+        """Batch: gjenbruker forrige segment så lenge verdiene ligger i det (sortert input = nesten ingen bisect)."""
+        starts, offsets, suffixes = self.starts, self.offsets, self.suffixes
+        lo, hi = self.lo, self.hi
+        days_get, mk_day = self._days.get, self._day
+        hhmm, ss = _HHMM, _SS
+        n = len(starts)
+        i = 0
+        seg_lo, seg_hi = starts[0], starts[1] if n > 1 else hi
+        off, suf = offsets[0], suffixes[0]
+        out: list[str] = []
+        append = out.append
+        for ts in stamps:
+            ts = int(ts)
+            if not lo <= ts < hi:
+                append(datetime.fromtimestamp(ts, self.tz).isoformat(timespec="seconds"))
+                continue
+            if not seg_lo <= ts < seg_hi:
+                i = bisect_right(starts, ts) - 1
+                seg_lo, seg_hi = starts[i], starts[i + 1] if i + 1 < n else hi
+                off, suf = offsets[i], suffixes[i]
+            day, sec = divmod(ts + off, 86400)
+            append((days_get(day) or mk_day(day)) + hhmm[sec // 60] + ss[sec % 60] + suf)
+        return out
+
+    def local_to_epoch(self, year: int, month: int, day: int, hour: int = 0, minute: int = 0, second: int = 0) -> int:
+        """Veggklokke i sonen -> epoch (UTC)."""
+        wall = calendar.timegm((year, month, day, hour, minute, second))
+        if not self.local_starts[0] <= wall < self.hi:
+            return int(datetime(year, month, day, hour, minute, second, tzinfo=self.tz).timestamp())
+        return wall - self.offsets[bisect_right(self.local_starts, wall) - 1]
+
+
+@lru_cache(maxsize=None)
+def oslo_table() -> OffsetTable:
+    return OffsetTable(OSLO)
+
+# -----------------------------
+# epoch (int, UTC-sekunder): kanonisk tid i items; ISO lages først når output skrives
+# -----------------------------
+def to_epoch(value: Any, naive_tz: tzinfo = OSLO) -> int | None:
+    """
+    ISO-streng (Z, +01:00, naiv, bare dato, '2026-01-17 13:30:00Z'), datetime eller tall -> int epoch.
+    Naive verdier tolkes i naive_tz. Ugyldig/tom verdi -> None.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        s = str(value).strip()
+        if not s:
+            return None
+        if s.endswith("Z"):
+            s = s[:-1] + "+00:00"
+        try:
+            dt = datetime.fromisoformat(s)
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        if naive_tz is OSLO:
+            return oslo_table().local_to_epoch(dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second)
+        dt = dt.replace(tzinfo=naive_tz)
+    return int(dt.timestamp())
+
+
+def oslo_epoch(year: int, month: int, day: int, hour: int = 0, minute: int = 0, second: int = 0) -> int | None:
+    """
+    Oslo-veggklokke -> epoch, via offset-tabellen (erstatter pytz localize).
+    Ugyldig dato eller klokkeslett ("32.12.", "31.02.", 24:00) -> None; timegm ville rullet dem over.
+    """
+    try:
+        date(year, month, day)
+    except ValueError:
+        return None
+    if not (0 <= hour < 24 and 0 <= minute < 60 and 0 <= second < 60):
+        return None
+    return oslo_table().local_to_epoch(year, month, day, hour, minute, second)
+
+
+def iso_from_epoch(ts: int, tz: tzinfo = OSLO) -> str:
+    if tz is OSLO:
+        return oslo_table().iso(ts)
+    return datetime.fromtimestamp(ts, tz).isoformat(timespec="seconds")
+
+
+def iso_many(stamps: Iterable[int]) -> list[str]:
+    """Batch epoch -> Europe/Oslo ISO."""
+    return oslo_table().iso_many(stamps)
+
+
+def year_window(year: int, tz: tzinfo = OSLO) -> tuple[int, int]:
+    """[start, end) i epoch for kalenderåret i tz."""
+    if tz is OSLO:
+        return oslo_epoch(year, 1, 1), oslo_epoch(year + 1, 1, 1)
+    return (
+        int(datetime(year, 1, 1, tzinfo=tz).timestamp()),
+        int(datetime(year + 1, 1, 1, tzinfo=tz).timestamp()),
+    )
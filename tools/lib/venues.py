@@ -0,0 +1,275 @@
+# tools/lib/venues.py
+from __future__ import annotations
+import hashlib
+import json
+import re
+import threading
+import time
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import urljoin
+
+from lxml import etree
+from lxml import html as lxml_html
+
+from tools.lib.jsonio import atomic_write_json
+from tools.lib.timeutil import OSLO, oslo_epoch, to_epoch
+
+ROOT = Path(__file__).resolve().parents[2]
+STATE_FILE = ROOT / "data" / "_meta" / "venue_pages.json"
+
+# dato uten år: ligger den mer enn dette (dager) bak oss, gjelder den neste år
+PAST_GRACE_DAYS = 60
+
+Record = dict[str, Any]  # {title, start_ts, url}
+Extractor = Callable[[Any, str, dict], list[Record]]
+
+EXTRACTORS: dict[str, Extractor] = {}
+
+
+def register(name: str) -> Callable[[Extractor], Extractor]:
+    """Registrer en extractor (root, base_url, config) -> records under navnet som brukes i scrape.extractor."""
+    def deco(fn: Extractor) -> Extractor:
+        EXTRACTORS[name] = fn
+        return fn
+    return deco
+
+
+def config_key(config: dict[str, Any]) -> str:
+    raw = json.dumps(config, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+# -----------------------------
+# dato/tid fra programsider ("fre 13. mars 2026 kl. 19.30", "13.03.26", "13.03 kl 19.30", "2026-03-13T19:30")
+# -----------------------------
+_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "mai": 5, "may": 5, "jun": 6, "jul": 7,
+    "aug": 8, "sep": 9, "okt": 10, "oct": 10, "nov": 11, "des": 12, "dec": 12,
+}
+_ISO_RE = re.compile(r"\b\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?")
+_TEXT_DATE_RE = re.compile(
+    r"\b(\d{1,2})\.?\s*(jan|feb|mar|apr|mai|may|jun|jul|aug|sep|okt|oct|nov|des|dec)[a-zæøå]*\.?(?:\s+(\d{4}))?",
+    re.IGNORECASE,
+)
+# "13.03.2026", "13.03.26", "13.03." og "13.03 kl 19.30"; uten punktum etter måneden er "kl 19.30" et klokkeslett
+_NUM_DATE_RE = re.compile(
+    r"(?<!kl\s)(?<!kl\.)(?<!kl\.\s)\b(0?[1-9]|[12]\d|3[01])\.(0?[1-9]|1[0-2])(?:\.(\d{4}|\d{2})?)?(?!\d)",
+    re.IGNORECASE,
+)
+_TIME_RE = re.compile(r"\b([01]?\d|2[0-3])[:.]([0-5]\d)\b")
+_WS_RE = re.compile(r"\s+")
+
+
+def _year_for(month: int, day: int, today: date) -> int:
+    year = today.year
+    try:
+        if (today - date(year, month, day)).days > PAST_GRACE_DAYS:
+            year += 1
+    except ValueError:
+        pass
+    return year
+
+
+def parse_when(text: str, *, today: date | None = None) -> int | None:
+    """Dato (+ evt. klokkeslett) i fritekst -> epoch (Europe/Oslo). Uten klokkeslett -> 00:00."""
+    s = (text or "").strip()
+    if not s:
+        return None
+    m = _ISO_RE.search(s)
+    if m and len(m.group(0)) > 10:
+        return to_epoch(m.group(0), OSLO)
+
+    if m:
+        # bare dato ("2026-03-13 kl 19.30"): klokkeslettet letes etter som for de andre formatene
+        try:
+            d = date.fromisoformat(m.group(0))
+        except ValueError:
+            return None
+        day, month, year = d.day, d.month, str(d.year)
+    elif m := _TEXT_DATE_RE.search(s):
+        day, month, year = int(m.group(1)), _MONTHS[m.group(2)[:3].lower()], m.group(3)
+    else:
+        m = _NUM_DATE_RE.search(s)
+        if not m:
+            return None
+        day, month, year = int(m.group(1)), int(m.group(2)), m.group(3)
+    if year and len(year) == 2:
+        year = f"20{year}"
+    today = today or date.today()
+    y = int(year) if year else _year_for(month, day, today)
+
+    # klokkeslett etter datoen ("19.30" ellers forvekslet med dag.måned)
+    t = _TIME_RE.search(s, m.end())
+    hh, mm = (int(t.group(1)), int(t.group(2))) if t else (0, 0)
+    # ugyldig dato ("32.12.", "31.02.") -> None
+    return oslo_epoch(y, month, day, hh, mm)
+
+
+# -----------------------------
+# extractors
+# -----------------------------
+@lru_cache(maxsize=256)
+def _xpath(expr: str) -> etree.XPath:
+    return etree.XPath(expr)
+
+
+def _values(node: Any, sel: str | list[str] | None) -> list[str]:
+    """Tekst for treffene til første selector (XPath) i listen som gir noe."""
+    for expr in [sel] if isinstance(sel, str) else (sel or []):
+        out = []
+        for r in _xpath(expr)(node):
+            s = r.text_content() if hasattr(r, "text_content") else str(r)
+            s = _WS_RE.sub(" ", s).strip()
+            if s:
+                out.append(s)
+        if out:
+            return out
+    return []
+
+
+def _first(node: Any, sel: str | list[str] | None) -> str:
+    v = _values(node, sel)
+    return v[0] if v else ""
+
+
+def _nodes(root: Any, sel: str | list[str] | None) -> list[Any]:
+    for expr in [sel] if isinstance(sel, str) else (sel or []):
+        nodes = [n for n in _xpath(expr)(root) if isinstance(getattr(n, "tag", None), str)]
+        if nodes:
+            return nodes
+    return []
+
+
+@register("selectors")
+def _selectors(root: Any, base_url: str, config: dict) -> list[Record]:
+    """
+    config: item (XPath fra roten) + title/date/time/link (XPath relativt til hvert item).
+    Hver selector kan være en liste med alternativer; første som gir tekst brukes.
+    """
+    today = date.today()
+    out: list[Record] = []
+    for item in _nodes(root, config.get("item")):
+        title = _first(item, config.get("title"))
+        when = " ".join(x for x in (_first(item, config.get("date")), _first(item, config.get("time"))) if x)
+        ts = parse_when(when, today=today)
+        if not title or ts is None:
+            continue
+        link = _first(item, config.get("link"))
+        out.append({"title": title, "start_ts": ts, "url": urljoin(base_url, link) if link else ""})
+    return out
+
+
+def _ld_objects(data: Any):
+    if isinstance(data, list):
+        for x in data:
+            yield from _ld_objects(x)
+    elif isinstance(data, dict):
+        yield data
+        for k in ("@graph", "itemListElement", "item", "subEvent"):
+            if k in data:
+                yield from _ld_objects(data[k])
+
+
+def _is_event(obj: dict) -> bool:
+    t = obj.get("@type")
+    types = t if isinstance(t, list) else [t]
+    return any(isinstance(x, str) and x.endswith("Event") for x in types)
+
+
+@register("jsonld")
+def _jsonld(root: Any, base_url: str, config: dict) -> list[Record]:
+    """schema.org Event i <script type="application/ld+json"> (name, startDate, url)."""
+    out: list[Record] = []
+    for script in _xpath('//script[@type="application/ld+json"]')(root):
+        try:
+            data = json.loads(script.text or "")
+        except ValueError:
+            continue
+        for obj in _ld_objects(data):
+            if not _is_event(obj):
+                continue
+            title = _WS_RE.sub(" ", str(obj.get("name") or "")).strip()
+            ts = to_epoch(obj.get("startDate"), OSLO)
+            if not title or ts is None:
+                continue
+            url = obj.get("url") or ""
+            out.append({"title": title, "start_ts": ts, "url": urljoin(base_url, url) if isinstance(url, str) and url else ""})
+    return out
+
+
+def extract_events(page: bytes | str, base_url: str, config: dict[str, Any]) -> list[Record]:
+    """
+    Programside -> [{title, start_ts, url}], med extractoren config["extractor"]
+    (default "selectors" når config har item, ellers "jsonld"). Gir selectors ingenting,
+    prøves JSON-LD på samme dokument før vi gir opp.
+    """
+    if not page:
+        return []
+    root = lxml_html.fromstring(page)
+    name = config.get("extractor") or ("selectors" if config.get("item") else "jsonld")
+    fn = EXTRACTORS.get(name)
+    if fn is None:
+        raise ValueError(f"unknown venue extractor {name!r}")
+    records = fn(root, base_url, config)
+    if not records and name != "jsonld":
+        records = _jsonld(root, base_url, config)
+    return records
+
+
+# -----------------------------
+# side-cache: parse bare sider som er endret
+# -----------------------------
+class PageCache:
+    """
+    Records per programside fra forrige kjøring:
+      venue_pages.json -> url: {sha256, config, records, checked_at}
+    Samme body (sha256) og samme scrape-config -> records gjenbrukes uten parsing.
+    """
+
+    def __init__(self, path: Path = STATE_FILE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._data: dict[str, dict] | None = None
+        self.stats = {"parsed": 0, "unchanged": 0}
+
+    def _load(self) -> dict[str, dict]:
+        if self._data is None:
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                self._data = data if isinstance(data, dict) else {}
+            except Exception:
+                self._data = {}
+        return self._data
+
+    def records(self, url: str) -> list[Record]:
+        with self._lock:
+            return list((self._load().get(url) or {}).get("records") or [])
+
+    def scrape(self, url: str, page: bytes, config: dict[str, Any]) -> list[Record]:
+        sha = hashlib.sha256(page).hexdigest()
+        ckey = config_key(config)
+        with self._lock:
+            entry = self._load().get(url)
+            if entry and entry.get("sha256") == sha and entry.get("config") == ckey:
+                entry["checked_at"] = int(time.time())
+                self.stats["unchanged"] += 1
+                return list(entry.get("records") or [])
+        records = extract_events(page, url, config)
+        with self._lock:
+            self._load()[url] = {"sha256": sha, "config": ckey, "records": records, "checked_at": int(time.time())}
+            self.stats["parsed"] += 1
+        return records
+
+    def save(self, keep: set[str] | None = None) -> None:
+        with self._lock:
+            data = self._load()
+            if keep is not None:
+                data = {u: e for u, e in data.items() if u in keep}
+                self._data = data
+            atomic_write_json(self.path, data, indent=1, sort_keys=True)
+
+    def report(self) -> str:
+        return f"parsed={self.stats['parsed']} unchanged={self.stats['unchanged']}"
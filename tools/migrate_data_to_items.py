@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 
 import json
+import sys
 from pathlib import Path
 from datetime import datetime
 from zoneinfo import ZoneInfo
@@ -11,6 +12,16 @@ OSLO = ZoneInfo("Europe/Oslo")
 ROOT = Path(__file__).resolve().parents[1]
 DATA_2026 = ROOT / "data" / "2026"
 
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tools.lib.jsonio import atomic_write_json  # noqa: E402
+from tools.lib.normalize import render_items, sort_items  # noqa: E402
+from tools.lib.timeutil import to_epoch, year_window  # noqa: E402
+
+# [start, slutt) for 2026 i Oslo-tid, som epoch
+YEAR_LO, YEAR_HI = year_window(2026, OSLO)
+
 FILES = {
     "football": DATA_2026 / "football.json",
     "handball_men": DATA_2026 / "handball_men.json",
@@ -31,27 +42,15 @@ def _read_json(path: Path) -> dict:
 
 
 def _write_json(path: Path, obj: dict) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    tmp = path.with_suffix(path.suffix + ".tmp")
-    tmp.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
-    tmp.replace(path)
+    atomic_write_json(path, obj, indent=2)
 
 
-def _parse_iso(s: str) -> datetime | None:
-    if not s:
-        return None
-    try:
-        return datetime.fromisoformat(s)
-    except Exception:
+def _start_ts(s) -> int | None:
+    # naive tider tolkes som Oslo-tid; None hvis utenfor 2026
+    ts = to_epoch(s, OSLO) if isinstance(s, str) else None
+    if ts is None or not YEAR_LO <= ts < YEAR_HI:
         return None
-
-
-def _in_year_2026(dt: datetime) -> bool:
-    # dt kan være naive eller aware
-    if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=OSLO)
-    dt_oslo = dt.astimezone(OSLO)
-    return dt_oslo.year == 2026
+    return ts
 
 
 def _mk_wrapper(items: list[dict], generated_at: str | None = None) -> dict:
@@ -59,7 +58,8 @@ def _mk_wrapper(items: list[dict], generated_at: str | None = None) -> dict:
         "timezone": "Europe/Oslo",
         "seasonYear": 2026,
         "generatedAt": generated_at or _now_oslo_iso(),
-        "items": items,
+        # "start" (Oslo ISO) lages fra start_ts først her
+        "items": render_items(items),
     }
 
 
@@ -71,9 +71,8 @@ def _football_matches_to_items(src: dict) -> list[dict]:
         if not isinstance(m, dict):
             continue
 
-        start = m.get("iso") or m.get("start")
-        dt = _parse_iso(start)
-        if not dt or not _in_year_2026(dt):
+        ts = _start_ts(m.get("iso") or m.get("start"))
+        if ts is None:
             continue
 
         where_val = m.get("watchAt")
@@ -86,7 +85,7 @@ def _football_matches_to_items(src: dict) -> list[dict]:
         item = {
             "sport": "football",
             "category": (m.get("competition") or "").strip() or "Football",
-            "start": dt.astimezone(OSLO).isoformat(timespec="seconds"),
+            "start_ts": ts,
             "title": (m.get("match") or m.get("title") or "").strip(),
             "where": where,
             "tv": (m.get("tv") or "").strip(),
@@ -100,8 +99,7 @@ def _football_matches_to_items(src: dict) -> list[dict]:
         if item["title"]:
             out.append(item)
 
-    out.sort(key=lambda x: x.get("start") or "")
-    return out
+    return sort_items(out)
 
 
 def _generic_to_items(src: dict, sport: str, default_category: str) -> list[dict]:
@@ -123,9 +121,8 @@ def _generic_to_items(src: dict, sport: str, default_category: str) -> list[dict
         if not isinstance(e, dict):
             continue
 
-        start = e.get("start") or e.get("iso") or e.get("kickoff") or e.get("date")
-        dt = _parse_iso(start) if isinstance(start, str) else None
-        if not dt or not _in_year_2026(dt):
+        ts = _start_ts(e.get("start") or e.get("iso") or e.get("kickoff") or e.get("date"))
+        if ts is None:
             continue
 
         title = (e.get("title") or e.get("match") or "").strip()
@@ -144,7 +141,7 @@ def _generic_to_items(src: dict, sport: str, default_category: str) -> list[dict
         item = {
             "sport": sport,
             "category": category or default_category,
-            "start": dt.astimezone(OSLO).isoformat(timespec="seconds"),
+            "start_ts": ts,
             "title": title,
             "where": where,
             "tv": tv.strip(),
@@ -157,8 +154,7 @@ def _generic_to_items(src: dict, sport: str, default_category: str) -> list[dict
         if item["title"]:
             out.append(item)
 
-    out.sort(key=lambda x: x.get("start") or "")
-    return out
+    return sort_items(out)
 
 
 def main() -> None:
@@ -170,18 +166,16 @@ def main() -> None:
     # Handball + Wintersport: normaliser til samme wrapper
     hb_m_src = _read_json(FILES["handball_men"])
     hb_w_src = _read_json(FILES["handball_women"])
-    ws_m_src = _read_json(FILES["wintersport_men"])
-    ws_w_src = _read_json(FILES["wintersport_women"])
 
     hb_m_items = _generic_to_items(hb_m_src, "handball", "Handball")
     hb_w_items = _generic_to_items(hb_w_src, "handball", "Handball")
-    ws_m_items = _generic_to_items(ws_m_src, "wintersport", "Wintersport")
-    ws_w_items = _generic_to_items(ws_w_src, "wintersport", "Wintersport")
 
     _write_json(FILES["handball_men"], _mk_wrapper(hb_m_items))
     _write_json(FILES["handball_women"], _mk_wrapper(hb_w_items))
-    _write_json(FILES["wintersport_men"], _mk_wrapper(ws_m_items))
-    _write_json(FILES["wintersport_women"], _mk_wrapper(ws_w_items))
+
+    for key in ("wintersport_men", "wintersport_women"):
+        ws_src = _read_json(FILES[key])
+        _write_json(FILES[key], _mk_wrapper(_generic_to_items(ws_src, "wintersport", "Wintersport")))
 
     print("DONE: normalized data/2026/*.json to {items: [...]}, year=2026")
 
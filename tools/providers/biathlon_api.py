@@ -1,7 +1,8 @@
 # tools/providers/biathlon_api.py
 from __future__ import annotations
-import json
-from tools.lib.http import get_text
+from datetime import timezone
+from tools.lib.http import get_bytes
+from tools.lib.sportapi import iter_events
 from tools.lib.timeutil import to_oslo_iso_from_iso
 
 def _gender_matches(ev: dict, gender: str) -> bool:
@@ -21,25 +22,14 @@ def _gender_matches(ev: dict, gender: str) -> bool:
 def fetch(*, base_url: str, season_id: int, level: int, gender: str) -> list[dict]:
     base_url = base_url.rstrip("/")
     url = f"{base_url}/Events?Level={int(level)}&SeasonId={int(season_id)}"
-    text = get_text(url)
-    data = json.loads(text)
-
-    # the API often returns a list
-    if isinstance(data, dict):
-        # sometimes wrapped
-        for k in ("Events", "events", "Items", "items"):
-            if k in data and isinstance(data[k], list):
-                data = data[k]
-                break
-
-    if not isinstance(data, list):
-        raise RuntimeError("Biathlon API: expected list response for Events")
+    # JSON (liste eller pakket i Events/Items) eller XML -> samme poster (tools/lib/sportapi.py)
+    try:
+        data = list(iter_events(get_bytes(url)))
+    except ValueError as e:
+        raise RuntimeError(f"Biathlon API: {e}") from e
 
     out: list[dict] = []
     for ev in data:
-        if not isinstance(ev, dict):
-            continue
-
         # common fields we try:
         # StartTime, Date, StartDate, EndDate ...
         dt = ev.get("StartTime") or ev.get("startTime") or ev.get("StartDate") or ev.get("Date") or ev.get("date")
@@ -49,7 +39,7 @@ def fetch(*, base_url: str, season_id: int, level: int, gender: str) -> list[dic
         if not _gender_matches(ev, gender):
             continue
 
-        start_oslo = to_oslo_iso_from_iso(str(dt))
+        start_oslo = to_oslo_iso_from_iso(str(dt), timezone.utc)
 
         # title composition
         venue = ev.get("Location") or ev.get("Venue") or ev.get("Organizer") or None
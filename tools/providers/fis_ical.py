@@ -1,71 +1,30 @@
 # tools/providers/fis_ical.py
 from __future__ import annotations
 
-import re
 from datetime import datetime
 from zoneinfo import ZoneInfo
-from typing import Iterable
-import requests
+
+from tools.lib.http import download, text_lines
+from tools.lib.ics import iter_events, to_datetime
+from tools.lib.memo import request_key, run_memo
+from tools.lib.normalize import Item, sort_items
+from tools.lib.timeutil import iso_from_epoch
 
 OSLO = ZoneInfo("Europe/Oslo")
 
 FIS_ICAL_BASE = "https://data.fis-ski.com/services/public/icalendar-feed-fis-events.html"
+ICAL_MAX_BYTES = 20 * 1024 * 1024
 
 
-def _fold_ics_lines(raw: str) -> list[str]:
-    """
-    iCalendar kan ha 'folded lines' (linjer som fortsetter med mellomrom).
-    Vi folder ut til hele linjer.
-    """
-    lines = raw.splitlines()
-    out: list[str] = []
-    for ln in lines:
-        if not ln:
-            out.append("")
-            continue
-        if ln.startswith(" ") or ln.startswith("\t"):
-            if out:
-                out[-1] += ln[1:]
-            else:
-                out.append(ln.lstrip())
-        else:
-            out.append(ln)
-    return out
-
-
-def _parse_dt(value: str) -> str | None:
+def _parse_dt(value: str, tzid: str | None = None) -> datetime | None:
     """
     Støtter:
       - 20260117T134500Z
-      - 20260117T134500
+      - 20260117T134500 (Europe/Oslo, eller TZID-sonen når den er satt)
       - 20260117
-    Returnerer ISO med Europe/Oslo tz hvis mulig.
+    Returnerer tz-aware datetime (naive verdier tolkes som Europe/Oslo).
     """
-    v = (value or "").strip()
-    if not v:
-        return None
-
-    # DATE-TIME
-    m = re.match(r"^(\d{8})T(\d{6})(Z)?$", v)
-    if m:
-        ymd = m.group(1)
-        hms = m.group(2)
-        z = m.group(3)
-
-        dt = datetime.strptime(ymd + hms, "%Y%m%d%H%M%S")
-        if z == "Z":
-            dt = dt.replace(tzinfo=ZoneInfo("UTC")).astimezone(OSLO)
-        else:
-            dt = dt.replace(tzinfo=OSLO)
-        return dt.isoformat(timespec="seconds")
-
-    # DATE only
-    m = re.match(r"^(\d{8})$", v)
-    if m:
-        dt = datetime.strptime(m.group(1), "%Y%m%d").replace(tzinfo=OSLO)
-        return dt.isoformat(timespec="seconds")
-
-    return None
+    return to_datetime(value, tzid, OSLO)
 
 
 def _guess_gender(summary: str) -> str | None:
@@ -83,10 +42,12 @@ def fetch_fis_ical_events(
     sectorcode: str,
     categorycode: str = "WC",
     extra_params: dict | None = None,
-) -> list[dict]:
+) -> list[Item]:
     """
     Henter FIS iCalendar feed og returnerer events som items:
       { sport:"wintersport", start, title, where, tv, source }
+    Samme feed (URL + params) hentes og parses bare én gang per kjøring; listen er delt
+    mellom kallerne og må kopieres før den endres.
     """
     params = {
         "seasoncode": str(seasoncode),
@@ -96,56 +57,34 @@ def fetch_fis_ical_events(
     if extra_params:
         params.update({k: str(v) for k, v in extra_params.items()})
 
-    r = requests.get(FIS_ICAL_BASE, params=params, timeout=60)
-    r.raise_for_status()
-
-    raw = r.text
-    lines = _fold_ics_lines(raw)
-
-    items: list[dict] = []
-    cur: dict[str, str] | None = None
-
-    def flush(e: dict[str, str] | None):
-        if not e:
-            return
-        dt = e.get("DTSTART") or ""
-        start = _parse_dt(dt)
-        if not start:
-            return
-        title = (e.get("SUMMARY") or "").strip()
-        loc = (e.get("LOCATION") or "").strip()
-        if not title:
-            return
-        items.append(
-            {
-                "sport": "wintersport",
-                "start": start,
-                "title": title,
-                "where": [],
-                "venue": loc,
-                "source": "fis_ical",
-                # gender setter vi senere (heuristikk)
-                "gender": _guess_gender(title),
-            }
-        )
-
-    for ln in lines:
-        if ln == "BEGIN:VEVENT":
-            cur = {}
-            continue
-        if ln == "END:VEVENT":
-            flush(cur)
-            cur = None
-            continue
-        if cur is None:
-            continue
-        if ":" not in ln:
-            continue
-        k, v = ln.split(":", 1)
-        k = k.split(";", 1)[0].strip().upper()
-        v = v.strip()
-        if k in ("DTSTART", "SUMMARY", "LOCATION"):
-            cur[k] = v
-
-    items.sort(key=lambda x: x.get("start") or "")
-    return items
+    return run_memo().do(request_key(FIS_ICAL_BASE, params, "fis_ical"), lambda: _fetch_feed(params))
+
+
+def _fetch_feed(params: dict) -> list[Item]:
+    items: list[Item] = []
+
+    # delt Session: samme FIS-host gjenbruker forbindelsen for hver sector.
+    # Kalenderen parses linje for linje mens den leses fra den spoolede nedlastingen.
+    with download(FIS_ICAL_BASE, params=params, timeout=60, max_bytes=ICAL_MAX_BYTES) as fh:
+        for ev in iter_events(text_lines(fh), keys=("DTSTART", "SUMMARY", "LOCATION")):
+            dt = _parse_dt(ev.get("DTSTART") or "", ev.tzid())
+            if not dt:
+                continue
+            ts = int(dt.timestamp())
+            title = ev.get("SUMMARY") or ""
+            if not title:
+                continue
+            items.append(
+                Item(
+                    sport="wintersport",
+                    start=iso_from_epoch(ts),
+                    start_ts=ts,
+                    title=title,
+                    venue=ev.get("LOCATION") or "",
+                    source="fis_ical",
+                    # gender setter vi senere (heuristikk)
+                    gender=_guess_gender(title),
+                )
+            )
+
+    return sort_items(items)
@@ -1,6 +1,7 @@
 # tools/providers/fixturedownload_json.py
 from __future__ import annotations
 import json
+from datetime import timezone
 from tools.lib.http import get_text
 from tools.lib.timeutil import to_oslo_iso_from_iso
 
@@ -17,7 +18,7 @@ def fetch(url: str) -> list[dict]:
         dt = m.get("DateUtc") or m.get("dateUtc") or m.get("date")
         if not dt:
             continue
-        start_oslo = to_oslo_iso_from_iso(dt)
+        start_oslo = to_oslo_iso_from_iso(dt, timezone.utc)
         out.append({
             "start": start_oslo,
             "home": m.get("HomeTeam") or m.get("homeTeam"),
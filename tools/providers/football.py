@@ -3,11 +3,11 @@ from __future__ import annotations
 
 import hashlib
 from datetime import datetime, timezone
-from zoneinfo import ZoneInfo
 
-import requests
-
-OSLO = ZoneInfo("Europe/Oslo")
+from tools.lib.entities import entities
+from tools.lib.http import get_json
+from tools.lib.normalize import Item, sort_items
+from tools.lib.timeutil import iso_from_epoch, year_window
 
 
 # FixtureDownload har season-spesifikke feed-URLs. Bytt kun URLene her ved behov.
@@ -48,33 +48,22 @@ def _to_dt_utc(date_utc_str: str) -> datetime | None:
         return None
 
 
-def _iso_oslo(dt: datetime) -> str:
-    if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=timezone.utc)
-    return dt.astimezone(OSLO).isoformat(timespec="seconds")
-
-
-def _in_year(dt: datetime, year: int) -> bool:
-    if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=timezone.utc)
-    return dt.astimezone(OSLO).year == year
-
-
 def _stable_id(*parts: str) -> str:
     raw = "||".join(p.strip() for p in parts if p is not None)
     return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
 
 
-def fetch_fixture_download_items(year: int = 2026) -> list[dict]:
+def fetch_fixture_download_items(year: int = 2026) -> list[Item]:
     """
     Henter fotballkamper fra FixtureDownload og returnerer i felles 'items'-format.
 
-    Item-schema:
+    Item-schema (normalize.Item, som dict i output):
       {
         "id": "...",
         "sport": "football",
         "category": "Premier League",
         "start": "2026-01-17T13:30:00+01:00",
+        "start_ts": 1768653000,
         "title": "Manchester United – Manchester City",
         "tv": "Viaplay / V Sport",
         "where": [],
@@ -83,6 +72,8 @@ def fetch_fixture_download_items(year: int = 2026) -> list[dict]:
     """
     items: list[dict] = []
     seen: set[str] = set()
+    lo, hi = year_window(year)
+    team = entities().team
 
     for feed in FEEDS:
         category = feed["category"]
@@ -90,10 +81,7 @@ def fetch_fixture_download_items(year: int = 2026) -> list[dict]:
         default_tv = feed.get("default_tv", "")
 
         print(f"FixtureDownload: {category} -> {url}")
-        r = requests.get(url, timeout=30)
-        r.raise_for_status()
-
-        rows = r.json()
+        rows = get_json(url, timeout=30)
         if not isinstance(rows, list):
             continue
 
@@ -108,30 +96,33 @@ def fetch_fixture_download_items(year: int = 2026) -> list[dict]:
             if not dt_utc or not home or not away:
                 continue
 
-            if not _in_year(dt_utc, year):
+            start_ts = int(dt_utc.timestamp())
+            if not lo <= start_ts < hi:
                 continue
 
-            start = _iso_oslo(dt_utc)
-            title = f"{str(home).strip()} – {str(away).strip()}"
+            start = iso_from_epoch(start_ts)
+            # kanoniske lagnavn (data/_meta/entities.json): "Girona FC" og "Girona" blir samme kamp
+            _hid, home = team(str(home))
+            _aid, away = team(str(away))
+            title = f"{home} – {away}"
 
             # Stabil id: category + start + home + away
-            eid = _stable_id("football", category, start, str(home), str(away))
+            eid = _stable_id("football", category, start, home, away)
             if eid in seen:
                 continue
             seen.add(eid)
 
             items.append(
-                {
-                    "id": eid,
-                    "sport": "football",
-                    "category": category,
-                    "start": start,
-                    "title": title,
-                    "tv": default_tv,
-                    "where": [],
-                    "source": "fixturedownload",
-                }
+                Item(
+                    id=eid,
+                    sport="football",
+                    category=category,
+                    start=start,
+                    start_ts=start_ts,
+                    title=title,
+                    tv=default_tv,
+                    source="fixturedownload",
+                )
             )
 
-    items.sort(key=lambda x: x.get("start") or "")
-    return items
+    return sort_items(items)
@@ -5,15 +5,24 @@ import hashlib
 import json
 import re
 from datetime import datetime
-from io import BytesIO
+from mmap import mmap
 from pathlib import Path
+from typing import BinaryIO
 from zoneinfo import ZoneInfo
 
-import pdfplumber
-import requests
+from tools.lib.entities import entities
+from tools.lib.http import download
+from tools.lib.metrics import metrics
+from tools.lib.normalize import Item, sort_items
+from tools.lib.pdfcache import page_store, pdf_cache, pdf_sha256
+from tools.lib.pdfextract import TABLE_SETTINGS, extract_pages, page_fingerprints, report as extract_report
+from tools.lib.timeutil import iso_from_epoch, oslo_epoch
 
 OSLO = ZoneInfo("Europe/Oslo")
 
+# EHF-PDFene er noen MB; alt over dette er nesten sikkert feil
+PDF_MAX_BYTES = 40 * 1024 * 1024
+
 
 def _stable_id(*parts: str) -> str:
     raw = "||".join((p or "").strip() for p in parts)
@@ -25,108 +34,90 @@ def _read_sources() -> dict:
     return json.loads(path.read_text(encoding="utf-8"))
 
 
-def _extract_pdf_lines(pdf_bytes: bytes) -> list[str]:
-    """
-    Robust ekstraksjon:
-    - både ren tekst (extract_text)
-    - og "table-ish" rader (extract_tables)
-    Returnerer en flat liste med linjer vi kan regexe på.
-    """
-    out: list[str] = []
-
-    with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
-        for page in pdf.pages:
-            # 1) vanlig tekst
-            t = page.extract_text() or ""
-            for ln in t.splitlines():
-                ln = (ln or "").strip()
-                if ln:
-                    out.append(ln)
-
-            # 2) tabeller (mange sports-PDFer er tabell-basert)
-            try:
-                tables = page.extract_tables(
-                    table_settings={
-                        "vertical_strategy": "lines",
-                        "horizontal_strategy": "lines",
-                        "intersection_tolerance": 5,
-                        "snap_tolerance": 3,
-                        "join_tolerance": 3,
-                        "edge_min_length": 3,
-                        "min_words_vertical": 1,
-                        "min_words_horizontal": 1,
-                    }
-                ) or []
-            except Exception:
-                tables = []
-
-            for tbl in tables:
-                for row in (tbl or []):
-                    cells = []
-                    for c in (row or []):
-                        c = (c or "").strip()
-                        if c:
-                            cells.append(c)
-                    if cells:
-                        out.append(" | ".join(cells))
-
-    # normaliser bindestreker
-    out = [ln.replace("\u2013", "-").replace("\u2014", "-") for ln in out]
-    return out
-
-
-# støtt flere datoformater
-_DT_PATTERNS = [
-    # 16.01.2026 18:00
-    (re.compile(r"(\d{2}\.\d{2}\.\d{4})\s+(\d{2}:\d{2})"), "%d.%m.%Y %H:%M"),
-    # 16.01. 18:00  (år mangler)
-    (re.compile(r"(\d{2}\.\d{2}\.)\s+(\d{2}:\d{2})"), "%d.%m.%Y %H:%M"),
-    # 2026-01-16 18:00
-    (re.compile(r"(\d{4}-\d{2}-\d{2})\s+(\d{2}:\d{2})"), "%Y-%m-%d %H:%M"),
-]
+# bump "v" når linje-utledningen endres, så gamle cache-oppføringer ikke gjenbrukes.
+# Teksten kommer fra pdfplumber (som før) til tools/bench/bench_pdf_text.py har vist at pypdf
+# gir de samme kampene på den faktiske EHF-PDF-en; bytt da til "pypdf" for den raske veien.
+EXTRACT_SETTINGS = {"extractor": "tiered", "text": "pdfplumber", "tables": TABLE_SETTINGS, "v": 3}
+# bump når _parse_matches endres, så lagrede side-items ikke gjenbrukes
+PARSE_VERSION = 3
+# linjer fra starten av neste side som matchup-kandidater for dato-linjer nederst på en side
+LOOKAHEAD_LINES = 2
 
 
-def _parse_dt(year: int, text: str) -> datetime | None:
-    s = (text or "").strip()
-
-    for rx, fmt in _DT_PATTERNS:
-        m = rx.search(s)
-        if not m:
+def _extract_pages(pdf_src: bytes | BinaryIO | mmap) -> list[list[str]]:
+    """
+    To-trinns ekstraksjon (tools/lib/pdfextract.py):
+    - tekst (EXTRACT_SETTINGS["text"]) på alle sider
+    - "table-ish" rader (pdfplumber extract_tables) bare på sider med dato/tid men uten matchup
+    """
+    return extract_pages(pdf_src, needs_tables=_page_needs_tables, text=EXTRACT_SETTINGS["text"])
+
+
+# -----------------------------
+# tokenizer: én master-regex klassifiserer hver linje én gang
+# -----------------------------
+# dato+tid i alle tre formatene (rekkefølgen i _DT_KINDS avgjør hvilket som vinner i en linje):
+#   16.01.2026 18:00 | 16.01. 18:00 (år mangler) | 2026-01-16 18:00
+_DT_RE = re.compile(
+    r"(?P<dmy>(\d{2})\.(\d{2})\.(\d{4})\s+(\d{2}):(\d{2}))"
+    r"|(?P<dm>(\d{2})\.(\d{2})\.\s+(\d{2}):(\d{2}))"
+    r"|(?P<iso>(\d{4})-(\d{2})-(\d{2})\s+(\d{2}):(\d{2}))"
+)
+_DT_KINDS = ("dmy", "dm", "iso")
+# matchup-varianter, i prioritert rekkefølge: A - B, A vs B, A v B
+_MATCHUP_RES = (
+    re.compile(r"(.+?)\s-\s(.+)", re.IGNORECASE),
+    re.compile(r"(.+?)\svs\.?\s(.+)", re.IGNORECASE),
+    re.compile(r"(.+?)\sv\s(.+)", re.IGNORECASE),
+)
+# grov forsjekk: uten en av separatorene kan ingen av matchup-variantene treffe
+_SEP_RE = re.compile(r"\s(?:-|vs\.?|v)\s", re.IGNORECASE)
+
+Fields = tuple[int, int, int, int, int]
+
+
+def _dt_fields(year: int, matches: list[re.Match]) -> Fields | None:
+    """(år, mnd, dag, time, min) fra dato-tokenene i en linje; første gyldige format vinner."""
+    if len(matches) == 1:
+        pairs = ((matches[0].lastgroup, matches[0]),)
+    else:
+        pairs = ((k, next((m for m in matches if m.lastgroup == k), None)) for k in _DT_KINDS)
+    for kind, m in pairs:
+        if m is None:
             continue
-
-        dpart, tpart = m.group(1), m.group(2)
-
-        # hvis formatet er "dd.mm." uten år: legg på år
-        if dpart.endswith(".") and len(dpart) == 6:  # "16.01."
-            dpart = f"{dpart}{year}"
-
+        if kind == "dmy":
+            d, mo, y, hh, mi = m.group(2, 3, 4, 5, 6)
+        elif kind == "dm":
+            d, mo, hh, mi = m.group(8, 9, 10, 11)
+            y = year
+        else:
+            y, mo, d, hh, mi = m.group(13, 14, 15, 16, 17)
         try:
-            dt = datetime.strptime(f"{dpart} {tpart}", fmt).replace(tzinfo=OSLO)
-        except Exception:
+            dt = datetime(int(y), int(mo), int(d), int(hh), int(mi))
+        except ValueError:
             continue
-
         if dt.year != year:
             return None
-        return dt
-
+        return dt.year, dt.month, dt.day, dt.hour, dt.minute
     return None
 
 
+def _parse_dt(year: int, text: str) -> datetime | None:
+    f = _dt_fields(year, list(_DT_RE.finditer(text or "")))
+    return datetime(*f, tzinfo=OSLO) if f else None
+
+
 def _parse_matchup(text: str) -> tuple[str, str] | None:
     """
     Finn "Team - Team" hvor det er en tydelig separator.
     PDF kan ha mye støy, så vi prøver flere varianter.
     """
     s = (text or "").strip()
+    if not _SEP_RE.search(s):
+        return None
 
-    # vanlige varianter
-    candidates = [
-        r"(.+?)\s-\s(.+)",          # A - B
-        r"(.+?)\svs\.?\s(.+)",      # A vs B
-        r"(.+?)\sv\s(.+)",          # A v B
-    ]
-    for pat in candidates:
-        m = re.search(pat, s, flags=re.IGNORECASE)
+    for rx in _MATCHUP_RES:
+        m = rx.search(s)
         if m:
             a = m.group(1).strip(" |:-")
             b = m.group(2).strip(" |:-")
@@ -136,47 +127,63 @@ def _parse_matchup(text: str) -> tuple[str, str] | None:
     return None
 
 
-def _parse_matches(lines: list[str], year: int, category: str, tv: str) -> list[dict]:
+def _page_needs_tables(lines: list[str]) -> bool:
+    """Tabell-passet trengs når tekst-passet ser dato/tid, men ingen matchup."""
+    has_dt = any(_DT_RE.search(ln) for ln in lines)
+    return has_dt and not any(_parse_matchup(ln) for ln in lines)
+
+
+def _parse_matches(
+    lines: list[str], year: int, category: str, tv: str, lookahead: list[str] | tuple[str, ...] = ()
+) -> list[Item]:
     """
     Heuristikk:
     - finn dato/tid i en linje
-    - matchup kan ligge i samme linje, eller i neste 1–2 linjer
+    - matchup kan ligge i samme linje (etter at dato/tid er fjernet), eller i neste 1–2 linjer
     - støtter både tekst og tabell-linjer
+    lookahead (starten av neste side) brukes bare som matchup-kandidater, ikke som egne dato-linjer.
+    Hver linje tokeniseres én gang (_DT_RE); matchup per linje regnes ut høyst én gang,
+    selv om linjen er kandidat for flere dato-linjer over seg.
     """
-    items: list[dict] = []
+    items: list[Item] = []
     seen: set[str] = set()
-
-    for i, ln in enumerate(lines):
-        dt = _parse_dt(year, ln)
-        if not dt:
+    own = lines
+    lines = [*lines, *lookahead] if lookahead else lines
+    n = len(lines)
+    matchups: dict[int, tuple[str, str] | None] = {}
+
+    def matchup_at(j: int) -> tuple[str, str] | None:
+        if j not in matchups:
+            matchups[j] = _parse_matchup(lines[j])
+        return matchups[j]
+
+    finditer = _DT_RE.finditer
+    team_fields = entities().team_fields
+    for i, ln in enumerate(own):
+        toks = list(finditer(ln))
+        if not toks:
+            continue  # støy / ren matchup-linje
+        f = _dt_fields(year, toks)
+        if not f:
             continue
 
-        # prøv matchup i samme linje etter dato
-        tail = ln
-        # fjern dato/tid fra tail for bedre "A - B" treff
-        tail = re.sub(r"\d{2}\.\d{2}\.\d{4}\s+\d{2}:\d{2}", "", tail)
-        tail = re.sub(r"\d{2}\.\d{2}\.\s+\d{2}:\d{2}", "", tail)
-        tail = re.sub(r"\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}", "", tail)
-        tail = tail.strip(" |:-")
-
-        candidates = [tail] if tail else []
-        if i + 1 < len(lines):
-            candidates.append(lines[i + 1])
-        if i + 2 < len(lines):
-            candidates.append(lines[i + 2])
-
+        # matchup i samme linje når dato/tid er fjernet, ellers de neste 1–2 linjene
         home_away = None
-        for cand in candidates:
-            home_away = _parse_matchup(cand)
-            if home_away:
-                break
-
+        tail = _DT_RE.sub("", ln).strip(" |:-")
+        if tail:
+            home_away = _parse_matchup(tail)
+        if not home_away and i + 1 < n:
+            home_away = matchup_at(i + 1)
+        if not home_away and i + 2 < n:
+            home_away = matchup_at(i + 2)
         if not home_away:
             continue
 
-        home, away = home_away
-        title = f"{home} – {away}"
-        start = dt.isoformat(timespec="seconds")
+        # kanoniske lagnavn (data/_meta/entities.json) + home_id/away_id når laget er kjent
+        teams = team_fields(*home_away)
+        title = f"{teams['home']} – {teams['away']}"
+        start_ts = oslo_epoch(*f)
+        start = iso_from_epoch(start_ts)
 
         eid = _stable_id("handball", category, start, title)
         if eid in seen:
@@ -184,29 +191,92 @@ def _parse_matches(lines: list[str], year: int, category: str, tv: str) -> list[
         seen.add(eid)
 
         items.append(
-            {
-                "id": eid,
-                "sport": "handball",
-                "category": category,
-                "start": start,
-                "title": title,
-                "tv": tv or "Ukjent",
-                "where": [],
-                "source": "ehf_pdf",
-            }
+            Item(
+                id=eid,
+                sport="handball",
+                category=category,
+                start=start,
+                start_ts=start_ts,
+                title=title,
+                home_id=teams.get("home_id"),
+                away_id=teams.get("away_id"),
+                tv=tv or "Ukjent",
+                source="ehf_pdf",
+            )
         )
 
-    items.sort(key=lambda x: x.get("start") or "")
-    return items
+    return sort_items(items)
+
 
+def _parse_pdf_incremental(
+    pdf_src: bytes | BinaryIO | mmap, *, source: str, year: int, category: str, tv: str
+) -> tuple[list[Item], list[str], dict]:
+    """
+    Side-inkrementell parsing mot forrige kjøring (data/_meta/pdf_cache/pages):
+    - uendret PDF (samme sha256) -> lagrede side-items, ingen ekstraksjon
+    - ellers fingerprint (content stream + XObjects) per side; items for en side avhenger av
+      siden selv og de første LOOKAHEAD_LINES linjene på neste side (dato nederst, matchup øverst
+      på neste side), så nøkkelen er "fp+neste fp". Bare sider med ny nøkkel parses på nytt
+      (neste side ekstraheres da også), resten hentes fra forrige kjørings items
+    - alt nytt (første kjøring) -> hele dokumentet via pdf_cache
+    Returnerer (items, linjer fra sidene som ble ekstrahert, {"pages", "changed"}).
+    """
+    settings = {**EXTRACT_SETTINGS, "parse": PARSE_VERSION, "year": year, "category": category, "tv": tv}
+    store = page_store()
+    prev = store.load(source, settings)
+    # sidecachen er JSON: items lagres som dict og leses tilbake som Item
+    prev_pages = {fp: [Item.from_dict(d) for d in its] for fp, its in (prev.get("pages") or {}).items()}
+
+    # alt leses fra handelen (spooled/cachet fil): hash og fingerprints i biter, workers åpner filen selv
+    sha = pdf_sha256(pdf_src)
+    page_lines: dict[int, list[str]] = {}
+    if prev.get("sha256") == sha and prev.get("order"):
+        order: list[str] = prev["order"]
+    else:
+        order = page_fingerprints(pdf_src)
+    keys = _page_keys(order)
+    changed = [i for i, k in enumerate(keys) if k not in prev_pages]
+    # en endret side trenger også starten av neste side (matchup-kandidater)
+    needed = sorted({j for i in changed for j in (i, i + 1) if j < len(order)})
+    if needed and len(needed) == len(order):
+        page_lines = dict(enumerate(pdf_cache().extract(pdf_src, EXTRACT_SETTINGS, _extract_pages)))
+    elif needed:
+        page_lines = dict(zip(needed, extract_pages(
+            pdf_src, needs_tables=_page_needs_tables, indices=needed, text=EXTRACT_SETTINGS["text"]
+        )))
+
+    pages = {k: prev_pages[k] for k in keys if k in prev_pages}
+    for i in changed:
+        lookahead = page_lines.get(i + 1, [])[:LOOKAHEAD_LINES]
+        pages[keys[i]] = _parse_matches(page_lines[i], year=year, category=category, tv=tv, lookahead=lookahead)
+
+    items: list[Item] = []
+    seen: set[str] = set()
+    for k in keys:
+        for it in pages.get(k) or []:
+            if it["id"] not in seen:
+                seen.add(it["id"])
+                items.append(it)
+
+    if prev.get("sha256") != sha:
+        store.save(source, settings, sha=sha, order=order, keys=keys,
+                   pages={k: [it.to_dict() for it in its] for k, its in pages.items()})
+    lines = [ln for i in sorted(page_lines) for ln in page_lines[i]]
+    return sort_items(items), lines, {"pages": len(order), "changed": len(changed)}
 
-def fetch_handball_items(year: int = 2026) -> tuple[list[dict], list[dict]]:
+
+def _page_keys(order: list[str]) -> list[str]:
+    # sidens items avhenger av egen fingerprint og neste sides (lookahead); siste side har ingen neste
+    return [f"{fp}+{order[i + 1] if i + 1 < len(order) else ''}" for i, fp in enumerate(order)]
+
+
+def fetch_handball_items(year: int = 2026) -> tuple[list[Item], list[Item]]:
     src = _read_sources()
     hb = (src.get("sports") or {}).get("handball") or {}
     men_feeds = hb.get("men") or []
     women_feeds = hb.get("women") or []
 
-    def handle(feed: dict, gender: str) -> list[dict]:
+    def handle(feed: dict, gender: str) -> list[Item]:
         pdf_url = (feed.get("pdf_url") or "").strip()
         if not pdf_url:
             print(f"[handball] {gender}: missing pdf_url -> skipping")
@@ -216,11 +286,17 @@ def fetch_handball_items(year: int = 2026) -> tuple[list[dict], list[dict]]:
         tv = (feed.get("channel") or "").strip()
 
         print(f"[handball] {gender}: downloading pdf -> {pdf_url}")
-        r = requests.get(pdf_url, timeout=90)
-        r.raise_for_status()
-
-        lines = _extract_pdf_lines(r.content)
-        items = _parse_matches(lines, year=year, category=category, tv=tv)
+        with metrics().source(feed.get("id") or f"handball_{gender}:{category}"), download(
+            pdf_url,
+            timeout=90,
+            max_age=feed.get("cache_max_age"),
+            max_bytes=PDF_MAX_BYTES,
+            expect="pdf",
+        ) as fh:
+            with metrics().stage("parse"):
+                items, lines, pg = _parse_pdf_incremental(fh, source=pdf_url, year=year, category=category, tv=tv)
+            metrics().items(after=len(items))
+        print(f"[handball] {gender}: pages={pg['pages']} re-parsed={pg['changed']} reused={pg['pages'] - pg['changed']}")
 
         if not items:
             # debug: vis litt av linjene for å se hvordan PDF-en faktisk ser ut
@@ -229,8 +305,8 @@ def fetch_handball_items(year: int = 2026) -> tuple[list[dict], list[dict]]:
 
         return items
 
-    men_items: list[dict] = []
-    women_items: list[dict] = []
+    men_items: list[Item] = []
+    women_items: list[Item] = []
 
     for f in men_feeds:
         if isinstance(f, dict) and f.get("type") == "handball_pdf" and f.get("enabled", True):
@@ -240,7 +316,9 @@ def fetch_handball_items(year: int = 2026) -> tuple[list[dict], list[dict]]:
         if isinstance(f, dict) and f.get("type") == "handball_pdf" and f.get("enabled", True):
             women_items += handle(f, "women")
 
-    men_items.sort(key=lambda x: x.get("start") or "")
-    women_items.sort(key=lambda x: x.get("start") or "")
+    sort_items(men_items)
+    sort_items(women_items)
     print(f"[handball] men={len(men_items)} women={len(women_items)}")
+    print(f"[handball] pdf cache: {pdf_cache().report()}")
+    print(f"[handball] pdf extract: {extract_report()}")
     return men_items, women_items
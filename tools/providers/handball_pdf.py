@@ -1,22 +1,19 @@
 # tools/providers/handball_pdf.py
 from __future__ import annotations
 import re
-from datetime import datetime
-from pypdf import PdfReader
-from tools.lib.http import get_bytes
-from tools.lib.timeutil import OSLO
+from mmap import mmap
+from typing import BinaryIO
+from tools.lib.http import download
+from tools.lib.pdfextract import extract_text
+from tools.lib.timeutil import iso_from_epoch, oslo_epoch
 
 DATE_RE = re.compile(r"\b(\d{2})\.(\d{2})\.(\d{4})\b")
 TIME_RE = re.compile(r"\b(\d{1,2}):(\d{2})\b")
+PDF_MAX_BYTES = 40 * 1024 * 1024
 
-def _extract_text(pdf_bytes: bytes) -> str:
-    reader = PdfReader(io_bytes := __import__("io").BytesIO(pdf_bytes))
-    chunks = []
-    for p in reader.pages:
-        t = p.extract_text() or ""
-        if t.strip():
-            chunks.append(t)
-    return "\n".join(chunks)
+def _extract_text(pdf_src: bytes | BinaryIO | mmap) -> str:
+    # bare tekst-passet; linjene strippes og tomme linjer droppes
+    return extract_text(pdf_src)
 
 def _parse_lines_to_events(text: str) -> list[dict]:
     events: list[dict] = []
@@ -54,7 +51,10 @@ def _parse_lines_to_events(text: str) -> list[dict]:
                 home, away = a.strip()[:80], b.strip()[:80]
 
         # create Oslo time ISO (assume local time in schedule PDFs)
-        dt = datetime(year, mon, day, hh, mm, tzinfo=OSLO).isoformat(timespec="seconds")
+        start_ts = oslo_epoch(year, mon, day, hh, mm)
+        if start_ts is None:
+            continue
+        dt = iso_from_epoch(start_ts)
 
         events.append({
             "start": dt,
@@ -68,6 +68,6 @@ def _parse_lines_to_events(text: str) -> list[dict]:
 def fetch(pdf_url: str) -> list[dict]:
     if not pdf_url:
         raise ValueError("handball_pdf: pdf_url is empty")
-    pdf_bytes = get_bytes(pdf_url)
-    text = _extract_text(pdf_bytes)
+    with download(pdf_url, max_bytes=PDF_MAX_BYTES, expect="pdf") as fh:
+        text = _extract_text(fh)
     return _parse_lines_to_events(text)
@@ -2,53 +2,32 @@
 from __future__ import annotations
 
 import json
-import re
-from datetime import datetime, timezone
+from datetime import timezone
 from tools.lib.http import get_text
+from tools.lib.ics import iter_events, to_datetime
 
-def _parse_ics_datetime(v: str) -> str:
+def _parse_ics_datetime(v: str, tzid: str | None = None) -> str | None:
     """
     Supports:
     - 20260118T180000Z
-    - 20260118T180000
+    - 20260118T180000 (UTC, eller TZID-sonen når den er satt)
     - 20260118
     """
-    v = v.strip()
-    if v.endswith("Z"):
-        dt = datetime.strptime(v, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
-        return dt.isoformat(timespec="seconds")
-    if "T" in v:
-        dt = datetime.strptime(v, "%Y%m%dT%H%M%S").replace(tzinfo=timezone.utc)
-        return dt.isoformat(timespec="seconds")
-    dt = datetime.strptime(v, "%Y%m%d").replace(tzinfo=timezone.utc)
-    return dt.isoformat(timespec="seconds")
+    dt = to_datetime(v, tzid, timezone.utc)
+    return dt.isoformat(timespec="seconds") if dt else None
 
 def _ics_events(text: str) -> list[dict]:
-    # split VEVENT blocks
+    # felles strømmende parser: én passering, folded lines og TZID håndteres der
     events = []
-    blocks = re.split(r"BEGIN:VEVENT", text)
-    for b in blocks[1:]:
-        b = b.split("END:VEVENT")[0]
-        lines = [ln.strip() for ln in b.splitlines() if ln.strip() and not ln.startswith("END:")]
-        kv = {}
-        for ln in lines:
-            # handle folded lines (simple best-effort)
-            if ln.startswith(" "):
-                continue
-            if ":" not in ln:
-                continue
-            k, val = ln.split(":", 1)
-            k = k.split(";", 1)[0].upper()
-            kv[k] = val.strip()
-        if "DTSTART" in kv:
-            title = kv.get("SUMMARY") or kv.get("DESCRIPTION") or "Handball"
-            start = _parse_ics_datetime(kv["DTSTART"])
-            loc = kv.get("LOCATION")
-            events.append({
-                "start": start,
-                "title": title,
-                "venue": loc
-            })
+    for ev in iter_events(text, keys=("DTSTART", "SUMMARY", "DESCRIPTION", "LOCATION")):
+        start = _parse_ics_datetime(ev.get("DTSTART") or "", ev.tzid())
+        if not start:
+            continue
+        events.append({
+            "start": start,
+            "title": ev.get("SUMMARY") or ev.get("DESCRIPTION") or "Handball",
+            "venue": ev.get("LOCATION")
+        })
     return events
 
 def fetch(source: dict) -> list[dict]:
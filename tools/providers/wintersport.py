@@ -3,12 +3,17 @@ from __future__ import annotations
 
 import json
 import hashlib
+from datetime import timezone
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
-import requests
-
 from providers.fis_ical import fetch_fis_ical_events
+from tools.lib.http import get_bytes
+from tools.lib.memo import request_key, run_memo
+from tools.lib.metrics import metrics
+from tools.lib.normalize import Item, item_ts, merge_genders, sort_items
+from tools.lib.sportapi import iter_events
+from tools.lib.timeutil import to_epoch
 
 OSLO = ZoneInfo("Europe/Oslo")
 
@@ -23,7 +28,7 @@ def _read_sources() -> dict:
     return json.loads(path.read_text(encoding="utf-8"))
 
 
-def _biathlon_api(season_id: int, level: int) -> list[dict]:
+def _biathlon_api(season_id: int, level: int) -> list[Item]:
     """
     BiathlonResults SportAPI (enkelt – du har allerede base_url/season_id/level i sources).
     Vi henter EVENTS (races) og mapper til items med start/title.
@@ -32,127 +37,104 @@ def _biathlon_api(season_id: int, level: int) -> list[dict]:
     # Denne endpointruta fungerer typisk:
     # /Events?SeasonId=2526&Level=3
     url = f"{base}/Events"
-    r = requests.get(url, params={"SeasonId": season_id, "Level": level}, timeout=60)
-    r.raise_for_status()
-    data = r.json()
+    params = {"SeasonId": season_id, "Level": level}
+    # men- og women-feedene peker ofte på samme season/level: én henting per kjøring (delt liste)
+    return run_memo().do(request_key(url, params, "wintersport"), lambda: _biathlon_items(url, params))
+
+
+def _biathlon_items(url: str, params: dict) -> list[Item]:
+    payload = get_bytes(url, params=params, timeout=60)
 
-    out: list[dict] = []
-    for ev in data or []:
+    out: list[Item] = []
+    for ev in iter_events(payload):
         # Typisk felter: StartTime, Description, ShortDescription, etc.
         start = ev.get("StartTime") or ev.get("startTime") or ev.get("StartDate") or ""
         title = ev.get("Description") or ev.get("ShortDescription") or ev.get("Name") or "Biathlon"
         gender = (ev.get("Gender") or ev.get("gender") or "").lower()  # "m"/"w"/"mixed" etc
         venue = ev.get("Venue") or ev.get("Location") or ""
-        if not start:
+        start_ts = to_epoch(start, timezone.utc)  # SportAPI: UTC, ofte uten Z
+        if start_ts is None:
             continue
 
         out.append(
-            {
-                "sport": "wintersport",
-                "start": start,
-                "title": str(title),
-                "venue": str(venue),
-                "where": [],
-                "source": "biathlon_api",
-                "gender": "women" if gender in ("w", "women", "female") else ("men" if gender in ("m", "men", "male") else None),
-            }
+            Item(
+                sport="wintersport",
+                start=start,
+                start_ts=start_ts,
+                title=str(title),
+                venue=str(venue),
+                source="biathlon_api",
+                gender="women" if gender in ("w", "women", "female") else ("men" if gender in ("m", "men", "male") else None),
+            )
         )
 
-    out.sort(key=lambda x: x.get("start") or "")
-    return out
+    return sort_items(out)
 
 
-def fetch_wintersport_items(year: int = 2026) -> tuple[list[dict], list[dict]]:
+def fetch_wintersport_items(year: int = 2026) -> list[Item]:
     """
-    Returnerer (men_items, women_items) med MASSE events:
+    Returnerer alle vintersport-items én gang hver, med gender "men"/"women"/"mixed":
       - Skiskyting: BiathlonResults SportAPI
       - Langrenn/hopp/alpint/kombinert: FIS iCalendar
+    Samme renn fra både men- og women-feeden (samme id) blir ett item med gender "mixed";
+    men/women-filene er utdrag av listen (normalize.gender_items).
     """
     src = _read_sources()
     ws = (src.get("sports") or {}).get("wintersport") or {}
 
-    men_items: list[dict] = []
-    women_items: list[dict] = []
+    items_out: list[Item] = []
 
-    def add(item: dict):
-        # Normaliser id + felt for frontend (din app.js leser start/title)
-        start = str(item.get("start") or "")
-        title = str(item.get("title") or "")
-        if not start or not title:
+    def add(item: Item, tv: str, gender: str | None):
+        # Normaliser id + felt for frontend (din app.js leser start/title).
+        # item er delt (memo) og endres ikke; tv/gender fra feeden går rett inn i det nye Item-et.
+        start = str(item.start or "")
+        title = str(item.title or "")
+        start_ts = item_ts(item)
+        if start_ts is None or not title:
             return
 
-        gender = item.get("gender")  # "men"/"women"/None
         eid = _stable_id("wintersport", str(year), start, title)
-        out = {
-            "id": eid,
-            "sport": "wintersport",
-            "start": start,
-            "title": title,
-            "tv": item.get("tv") or "",
-            "where": item.get("where") or [],
-            "venue": item.get("venue") or "",
-            "source": item.get("source") or "unknown",
-        }
-        if gender == "women":
-            women_items.append(out)
-        elif gender == "men":
-            men_items.append(out)
-        else:
-            # hvis ukjent kjønn: legg i begge (bedre enn “0”)
-            men_items.append(out)
-            women_items.append(out)
-
-    # --- FIS feeds (CC/JP/AL/NK) ---
-    # sources.json -> wintersport.men/women[] kan inneholde type:"fis_ical"
-    for feed in (ws.get("men") or []):
-        if not isinstance(feed, dict) or not feed.get("enabled"):
-            continue
-        if feed.get("type") == "fis_ical":
-            sector = (feed.get("sectorcode") or "").strip()
-            cat = (feed.get("categorycode") or "WC").strip()
-            tv = (feed.get("channel") or "").strip()
-            items = fetch_fis_ical_events(seasoncode=year, sectorcode=sector, categorycode=cat)
-            for it in items:
-                it["tv"] = tv
-                it["gender"] = "men"  # feed er “men”
-                add(it)
-        if feed.get("type") == "biathlon_api":
-            api = feed.get("api") or {}
-            tv = (feed.get("channel") or "").strip()
-            season_id = int(api.get("season_id"))
-            level = int(api.get("level", 3))
-            items = _biathlon_api(season_id, level)
-            for it in items:
-                it["tv"] = tv
-                # biathlon kan inneholde kjønn – men feed er “men”
-                if it.get("gender") is None:
-                    it["gender"] = "men"
-                add(it)
-
-    for feed in (ws.get("women") or []):
-        if not isinstance(feed, dict) or not feed.get("enabled"):
-            continue
-        if feed.get("type") == "fis_ical":
-            sector = (feed.get("sectorcode") or "").strip()
-            cat = (feed.get("categorycode") or "WC").strip()
-            tv = (feed.get("channel") or "").strip()
-            items = fetch_fis_ical_events(seasoncode=year, sectorcode=sector, categorycode=cat)
-            for it in items:
-                it["tv"] = tv
-                it["gender"] = "women"
-                add(it)
-        if feed.get("type") == "biathlon_api":
-            api = feed.get("api") or {}
-            tv = (feed.get("channel") or "").strip()
-            season_id = int(api.get("season_id"))
-            level = int(api.get("level", 3))
-            items = _biathlon_api(season_id, level)
-            for it in items:
-                it["tv"] = tv
-                if it.get("gender") is None:
-                    it["gender"] = "women"
-                add(it)
-
-    men_items.sort(key=lambda x: x.get("start") or "")
-    women_items.sort(key=lambda x: x.get("start") or "")
-    return men_items, women_items
+        items_out.append(Item(
+            id=eid,
+            sport="wintersport",
+            start=start,
+            start_ts=start_ts,
+            title=title,
+            tv=tv,
+            where=item.where,
+            venue=item.venue or "",
+            source=item.source or "unknown",
+            # "men"/"women"; ukjent -> "mixed" i merge_genders
+            gender=gender,
+        ))
+
+    # --- FIS feeds (CC/JP/AL/NK) + skiskyting ---
+    # sources.json -> wintersport.men/women[] kan inneholde type:"fis_ical" / "biathlon_api".
+    # Hentingen er memoisert per URL+params, så en feed som står under begge kjønn koster én henting;
+    # resultatet er delt, og add() bygger ett nytt Item per renn i stedet for å kopiere listen.
+    for feed_gender in ("men", "women"):
+        for feed in (ws.get(feed_gender) or []):
+            if not isinstance(feed, dict) or not feed.get("enabled"):
+                continue
+            sid = feed.get("id") or f"{feed.get('type')}:{feed_gender}:{feed.get('sectorcode') or ''}"
+            n0 = len(items_out)
+            if feed.get("type") == "fis_ical":
+                sector = (feed.get("sectorcode") or "").strip()
+                cat = (feed.get("categorycode") or "WC").strip()
+                tv = (feed.get("channel") or "").strip()
+                with metrics().source(sid):
+                    for it in fetch_fis_ical_events(seasoncode=year, sectorcode=sector, categorycode=cat):
+                        add(it, tv, feed_gender)  # feed er "men"/"women"
+                    metrics().items(after=len(items_out) - n0)
+            if feed.get("type") == "biathlon_api":
+                api = feed.get("api") or {}
+                tv = (feed.get("channel") or "").strip()
+                season_id = int(api.get("season_id"))
+                level = int(api.get("level", 3))
+                with metrics().source(sid):
+                    for it in _biathlon_api(season_id, level):
+                        # biathlon kan inneholde kjønn – ellers gjelder feedens
+                        add(it, tv, it.gender or feed_gender)
+                    metrics().items(after=len(items_out) - n0)
+
+    return merge_genders(sort_items(items_out))
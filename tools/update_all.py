@@ -2,19 +2,38 @@
 # tools/fetch_football_2026.py
 
 import json
-import re
-from datetime import datetime
+import sys
+from functools import partial
 from pathlib import Path
 
-import requests
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tools.lib.archive import setup_from_argv  # noqa: E402
+from tools.lib.entities import entities  # noqa: E402
+from tools.lib.hosthealth import health  # noqa: E402
+from tools.lib.http import add_hook, cache, get_text  # noqa: E402
+from tools.lib.ics import iter_events, to_datetime  # noqa: E402
+from tools.lib.jsonio import atomic_write_json  # noqa: E402
+from tools.lib.merge import merge_sources  # noqa: E402
+from tools.lib.metrics import metrics, start_run  # noqa: E402
+from tools.lib.normalize import sort_items  # noqa: E402
+from tools.lib.pool import Task, run_tasks  # noqa: E402
+from tools.lib.timeutil import OSLO, iso_from_epoch, to_epoch, year_window  # noqa: E402
 
 YEAR = 2026
-ROOT = Path(__file__).resolve().parents[1]
+YEAR_LO, YEAR_HI = year_window(YEAR)
 SOURCES_PATH = ROOT / "data" / "_meta" / "sources.json"
 OUT_DIR = ROOT / "data" / "2026"
 OUT_DIR.mkdir(parents=True, exist_ok=True)
 
-UA = "Grenland-Live/1.0 (+https://grenland-live.no)"
+# Samtidig henting: maks tråder, maks samtidige kall per host, og totalt tidsbudsjett (sek)
+FETCH_WORKERS = 8
+FETCH_PER_HOST = 2
+FETCH_DEADLINE = 300
+
+ICS_KEYS = ("DTSTART", "SUMMARY", "LOCATION")
 
 
 def read_json(path: Path):
@@ -33,11 +52,7 @@ def read_json(path: Path):
 
 
 def write_json(path: Path, payload):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(
-        json.dumps(payload, ensure_ascii=False, indent=2),
-        encoding="utf-8"
-    )
+    atomic_write_json(path, payload, indent=2)
 
 
 def load_existing_list(path: Path, keys=("games", "items")):
@@ -53,78 +68,32 @@ def load_existing_list(path: Path, keys=("games", "items")):
     return []
 
 
-def http_get(url: str) -> str:
-    r = requests.get(
+def http_get(url: str, max_age: float | None = None) -> str:
+    # conditional GET via data/_meta/http_cache (304 -> cachet body)
+    return get_text(
         url,
-        headers={"User-Agent": UA, "Accept": "*/*"},
-        timeout=30
+        headers={"Accept": "*/*"},
+        timeout=30,
+        max_age=max_age,
     )
-    r.raise_for_status()
-    return r.text
 
 
 def extract_ics(text: str) -> str:
     t = text.strip()
 
     # JSON-wrapped ICS (or plain text containing ICS)
-    if "BEGIN:VCALENDAR" in t and "END:VCALENDAR" in t:
-        m = re.search(r"(BEGIN:VCALENDAR.*END:VCALENDAR)", t, re.S)
-        if m:
-            return m.group(1)
+    # første BEGIN til siste END (samme utsnitt som en grådig regex, uten å skanne teksten flere ganger)
+    a = t.find("BEGIN:VCALENDAR")
+    b = t.rfind("END:VCALENDAR")
+    if a >= 0 and b > a:
+        return t[a:b + len("END:VCALENDAR")]
 
     return ""
 
 
 def parse_ics_events(ics_text: str):
-    lines = [ln.rstrip("\n") for ln in ics_text.splitlines()]
-
-    # Unfold lines (continuation lines start with space)
-    unfolded = []
-    for ln in lines:
-        if ln.startswith(" ") and unfolded:
-            unfolded[-1] += ln[1:]
-        else:
-            unfolded.append(ln)
-
-    events = []
-    cur = None
-
-    for ln in unfolded:
-        if ln == "BEGIN:VEVENT":
-            cur = {}
-        elif ln == "END:VEVENT":
-            if cur:
-                events.append(cur)
-            cur = None
-        elif cur is not None:
-            if ln.startswith("DTSTART"):
-                cur["DTSTART"] = ln.split(":", 1)[-1].strip()
-            elif ln.startswith("SUMMARY:"):
-                cur["SUMMARY"] = ln.split(":", 1)[-1].strip()
-            elif ln.startswith("LOCATION:"):
-                cur["LOCATION"] = ln.split(":", 1)[-1].strip()
-
-    return events
-
-
-def dt_to_iso(dt_raw: str) -> str:
-    dt_raw = dt_raw.strip()
-
-    # UTC
-    if dt_raw.endswith("Z"):
-        base = dt_raw[:-1]
-        dt = datetime.strptime(base, "%Y%m%dT%H%M%S")
-        return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
-
-    # Local no-Z
-    if "T" in dt_raw:
-        fmt = "%Y%m%dT%H%M%S" if len(dt_raw) >= 15 else "%Y%m%dT%H%M"
-        dt = datetime.strptime(dt_raw, fmt)
-        return dt.strftime("%Y-%m-%dT%H:%M:%S+01:00")
-
-    # Date only
-    dt = datetime.strptime(dt_raw, "%Y%m%d")
-    return dt.strftime("%Y-%m-%dT00:00:00+01:00")
+    # felles strømmende parser (tools/lib/ics.py); bare feltene vi bruker beholdes
+    return list(iter_events(ics_text, keys=ICS_KEYS))
 
 
 def parse_summary(summary: str):
@@ -138,20 +107,31 @@ def parse_summary(summary: str):
     return s.strip(), "Ukjent"
 
 
-def fetch_nff_ics(url: str, league_name: str, default_tv: str):
-    text = http_get(url)
+def fetch_nff_ics(url: str, league_name: str, default_tv: str, max_age: float | None = None):
+    text = http_get(url, max_age=max_age)
+
+    with metrics().stage("parse"):
+        ics = extract_ics(text)
+        if not ics:
+            # sometimes endpoint is direct ICS already
+            if "BEGIN:VCALENDAR" in text and "END:VCALENDAR" in text:
+                ics = text
+
+        if not ics:
+            raise RuntimeError("No ICS found in response")
+
+        raw_events = parse_ics_events(ics)
+
+    with metrics().stage("normalize"):
+        games = _nff_games(raw_events, league_name, default_tv)
 
-    ics = extract_ics(text)
-    if not ics:
-        # sometimes endpoint is direct ICS already
-        if "BEGIN:VCALENDAR" in text and "END:VCALENDAR" in text:
-            ics = text
+    metrics().items(before=len(raw_events), after=len(games))
+    return games
 
-    if not ics:
-        raise RuntimeError("No ICS found in response")
 
-    raw_events = parse_ics_events(ics)
+def _nff_games(raw_events, league_name: str, default_tv: str):
     games = []
+    team_fields = entities().team_fields
 
     for ev in raw_events:
         dt = ev.get("DTSTART")
@@ -159,17 +139,22 @@ def fetch_nff_ics(url: str, league_name: str, default_tv: str):
         if not dt or not summ:
             continue
 
-        iso = dt_to_iso(dt)
-        if not iso.startswith(f"{YEAR}-"):
+        # DTSTART -> epoch én gang (Z, TZID eller naiv Oslo-tid); kickoff formateres fra den
+        start = to_datetime(dt, ev.tzid(), OSLO)
+        if start is None:
+            continue
+        ts = int(start.timestamp())
+        if not YEAR_LO <= ts < YEAR_HI:
             continue
 
         home, away = parse_summary(summ)
 
         games.append({
             "league": league_name,
-            "home": home,
-            "away": away,
-            "kickoff": iso,
+            # kanoniske lagnavn + home_id/away_id (data/_meta/entities.json)
+            **team_fields(home, away),
+            "kickoff": iso_from_epoch(ts),
+            "start_ts": ts,
             "channel": default_tv or "Ukjent",
             "where": ["Vikinghjørnet", "Gimle Pub"],
         })
@@ -177,21 +162,32 @@ def fetch_nff_ics(url: str, league_name: str, default_tv: str):
     return games
 
 
-def fetch_fixturedownload_json(url: str, league_name: str, default_tv: str):
-    raw = http_get(url)
-    data = json.loads(raw)
+def fetch_fixturedownload_json(url: str, league_name: str, default_tv: str, max_age: float | None = None):
+    raw = http_get(url, max_age=max_age)
+
+    with metrics().stage("parse"):
+        data = json.loads(raw)
 
-    # data can be list or dict with list inside
-    if isinstance(data, dict):
-        for k in ("matches", "fixtures", "games", "data"):
-            if isinstance(data.get(k), list):
-                data = data[k]
-                break
+        # data can be list or dict with list inside
+        if isinstance(data, dict):
+            for k in ("matches", "fixtures", "games", "data"):
+                if isinstance(data.get(k), list):
+                    data = data[k]
+                    break
 
     if not isinstance(data, list):
         raise RuntimeError("Unexpected FixtureDownload JSON shape")
 
+    with metrics().stage("normalize"):
+        games = _fixturedownload_games(data, league_name, default_tv)
+
+    metrics().items(before=len(data), after=len(games))
+    return games
+
+
+def _fixturedownload_games(data: list, league_name: str, default_tv: str):
     games = []
+    team_fields = entities().team_fields
 
     for m in data:
         date = (m.get("Date") or m.get("date") or "").strip()
@@ -205,14 +201,15 @@ def fetch_fixturedownload_json(url: str, league_name: str, default_tv: str):
         # Build ISO
         iso = f"{date}T{time}:00+01:00" if time else f"{date}T00:00:00+01:00"
 
-        if not iso.startswith(f"{YEAR}-"):
+        ts = to_epoch(iso)
+        if ts is None or not YEAR_LO <= ts < YEAR_HI:
             continue
 
         games.append({
             "league": league_name,
-            "home": home,
-            "away": away,
+            **team_fields(home, away),
             "kickoff": iso,
+            "start_ts": ts,
             "channel": default_tv or "Ukjent",
             "where": ["Vikinghjørnet", "Gimle Pub"],
         })
@@ -220,12 +217,33 @@ def fetch_fixturedownload_json(url: str, league_name: str, default_tv: str):
     return games
 
 
+def fetch_games(source_id: str, typ: str, url: str, league_name: str, default_tv: str, max_age: float | None = None):
+    with metrics().source(source_id):
+        if typ == "nff_ics":
+            return fetch_nff_ics(url, league_name, default_tv, max_age)
+        if typ == "fixturedownload_json":
+            return fetch_fixturedownload_json(url, league_name, default_tv, max_age)
+        raise RuntimeError(f"Unknown type: {typ}")
+
+
+def _rel(path: Path) -> str:
+    try:
+        return path.relative_to(ROOT).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
 def main():
+    setup_from_argv("update_all")
+    run = start_run("update_all")
+    add_hook(run.on_http)
     sources = read_json(SOURCES_PATH)
 
     football = sources["sports"]["football"]
-    summary_all = []
 
+    jobs = []
+    # per jobb: (liga-key, kildenavn, prioritet); flere kilder kan fylle samme liga
+    metas = []
     for comp in football:
         if not comp.get("enabled", True):
             continue
@@ -236,44 +254,83 @@ def main():
         if key == "laliga":
             key = "la_liga"
 
-        out_path = OUT_DIR / f"{key}.json"
-
         league_name = comp.get("name", key)
         default_tv = comp.get("default_tv", "Ukjent")
         url = comp["url"]
         typ = comp["type"]
+        # valgfritt per kilde: hvor lenge (sek) en cachet respons regnes som fersk uten revalidering
+        max_age = comp.get("cache_max_age")
+        # lavere tall vinner når flere kilder har samme kamp; ellers rekkefølgen i sources.json
+        name = comp.get("id") or typ
+
+        # samme id i metrics som Task-nøkkelen, så flere kilder for én liga ikke slås sammen
+        sid = f"{key}:{name}"
+        jobs.append(Task(key=sid, url=url, fn=partial(fetch_games, sid, typ, url, league_name, default_tv, max_age)))
+        metas.append((key, name, comp.get("priority", 0)))
+
+    # Hent alle kilder samtidig; resultatene behandles i samme rekkefølge som sources.json
+    outcomes = run_tasks(
+        jobs,
+        max_workers=FETCH_WORKERS,
+        per_host=FETCH_PER_HOST,
+        deadline=FETCH_DEADLINE,
+    )
+
+    by_league: dict = {}
+    for (key, name, prio), (games, err) in zip(metas, outcomes):
+        fetched = by_league.setdefault(key, [])
+        if err is not None:
+            print(f"[FAIL] {key} ({name}): {err}")
+            continue
+        fetched.append((prio, name, games or []))
+
+    league_games = []
+    for key, fetched in by_league.items():
+        out_path = OUT_DIR / f"{key}.json"
+        fetched.sort(key=lambda x: x[0])
 
         try:
-            if typ == "nff_ics":
-                games = fetch_nff_ics(url, league_name, default_tv)
-            elif typ == "fixturedownload_json":
-                games = fetch_fixturedownload_json(url, league_name, default_tv)
-            else:
-                raise RuntimeError(f"Unknown type: {typ}")
-
-            # IKKE OVERSKRIV MED TOMT
+            # samme kamp fra flere kilder (ulik staving/tidsformat) -> ett item, felt etter kildeprioritet
+            with metrics().stage("merge", key):
+                games = sort_items(merge_sources([(name, g) for _prio, name, g in fetched], sport="football"))
+
+            # IKKE OVERSKRIV MED TOMT (alle kilder feilet eller ga 0)
             if len(games) == 0:
                 existing = load_existing_list(out_path, keys=("games",))
                 if existing:
                     print(f"[KEEP] {key}: fetched 0, keeping existing ({len(existing)})")
-                    summary_all.extend(existing)
-                    continue
+                    league_games.append((key, existing))
+                continue
 
-            write_json(out_path, {"games": games})
-            print(f"[OK] {key}: wrote {len(games)} -> {out_path.as_posix()}")
-            summary_all.extend(games)
+            with run.write(_rel(out_path), len(games)):
+                write_json(out_path, {"games": games})
+            n_in = sum(len(g) for _prio, _name, g in fetched)
+            print(f"[OK] {key}: wrote {len(games)} ({n_in} from {len(fetched)} source(s)) -> {out_path.as_posix()}")
+            league_games.append((key, games))
 
         except Exception as e:
             print(f"[FAIL] {key}: {e}. Keeping existing if any.")
             existing = load_existing_list(out_path, keys=("games",))
             if existing:
-                summary_all.extend(existing)
+                league_games.append((key, existing))
             continue
 
-    # Optional aggregate
+    # Optional aggregate: én passering til over alle ligaene (samme kamp kan ligge i flere)
+    summary_all = sort_items(merge_sources(league_games, sport="football"))
     agg_path = OUT_DIR / "football.json"
-    write_json(agg_path, {"games": summary_all})
+    with run.write(_rel(agg_path), len(summary_all)):
+        write_json(agg_path, {"games": summary_all})
     print(f"[OK] football aggregate: {len(summary_all)}")
+    print(f"[CACHE] {cache().report()}")
+
+    # circuit breaker per host -> pipeline_status.json (hvilke hosts som hoppes over, og hvor ofte)
+    hosts = health().snapshot()
+    for host, st in hosts.items():
+        if st["state"] != "closed" or st["skips_this_run"]:
+            print(f"[HOST] {host}: {st['state']} skipped={st['skips_this_run']} last={st['last_status']}")
+
+    # tidsbruk per kilde/target: kort sammendrag i status, full post i rullerende JSONL-historikk
+    run.publish(hosts=hosts)
 
 
 if __name__ == "__main__":